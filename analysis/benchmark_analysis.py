@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
 
 import pandas as pd
 
+from offer_metrics import add_metrics, sensitivity_summary, sensitivity_table
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
@@ -12,43 +15,31 @@ OFFERS_PATH = DATA_DIR / "offers_template.csv"
 
 OUTPUT_METRICS = Path(__file__).resolve().parent / "benchmark_metrics.csv"
 OUTPUT_SUMMARY = Path(__file__).resolve().parent / "benchmark_summary.csv"
+OUTPUT_SENSITIVITY = Path(__file__).resolve().parent / "benchmark_sensitivity.csv"
+OUTPUT_SENSITIVITY_OFFERS = Path(__file__).resolve().parent / "benchmark_sensitivity_offers.csv"
 
 
-def _price_per_class(row: pd.Series, assumed_classes: int) -> float | None:
-    price = row.get("price_eur")
-    offer_type = str(row.get("offer_type") or "").strip().lower()
-    sessions = row.get("sessions_included")
-
-    if pd.isna(price):
-        return None
-
-    if offer_type in {"drop_in", "drop-in", "single"}:
-        return float(price)
-
-    if offer_type in {"pack", "bundle"}:
-        if pd.notna(sessions) and sessions and float(sessions) > 0:
-            return float(price) / float(sessions)
-        return None
-
-    if offer_type in {"membership", "subscription"}:
-        if pd.notna(sessions) and sessions and float(sessions) > 0:
-            return float(price) / float(sessions)
-        return float(price) / float(assumed_classes)
-
-    return None
-
-
-def _monthly_equivalent(row: pd.Series) -> float | None:
-    price = row.get("price_eur")
-    duration_days = row.get("duration_days")
-
-    if pd.isna(price) or pd.isna(duration_days) or not duration_days:
-        return None
-
-    return float(price) / float(duration_days) * 30.0
+def _parse_levels(value: str) -> list[int]:
+    """"4-20" or "4,8,12" -> classes per month."""
+    levels: list[int] = []
+    for part in value.split(","):
+        low, _, high = part.partition("-")
+        levels.extend(range(int(low), int(high or low) + 1))
+    if not levels or min(levels) <= 0:
+        raise argparse.ArgumentTypeError("usage levels must be positive")
+    return sorted(set(levels))
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute offer price metrics and tier summaries.")
+    parser.add_argument(
+        "--sweep",
+        type=_parse_levels,
+        metavar="LEVELS",
+        help="Also write price per class for these assumed classes per month, e.g. 4-20 or 4,8,12.",
+    )
+    args = parser.parse_args()
+
     offers = pd.read_csv(OFFERS_PATH)
     competitors = pd.read_csv(COMPETITORS_PATH)
 
@@ -56,14 +47,7 @@ def main() -> None:
         print("No offers found in data/offers_template.csv. Fill the template and rerun.")
         return
 
-    offers = offers.copy()
-    offers["price_per_class_assumed_8"] = offers.apply(
-        lambda row: _price_per_class(row, assumed_classes=8), axis=1
-    )
-    offers["price_per_class_assumed_12"] = offers.apply(
-        lambda row: _price_per_class(row, assumed_classes=12), axis=1
-    )
-    offers["monthly_equivalent"] = offers.apply(_monthly_equivalent, axis=1)
+    offers = add_metrics(offers)
 
     merged = offers.merge(competitors, on="competitor_id", how="left", suffixes=("", "_competitor"))
     merged.to_csv(OUTPUT_METRICS, index=False)
@@ -78,6 +62,12 @@ def main() -> None:
     print(f"Wrote offer-level metrics: {OUTPUT_METRICS}")
     print(f"Wrote tier summary: {OUTPUT_SUMMARY}")
 
+    if args.sweep:
+        table = sensitivity_table(merged, args.sweep)
+        table.to_csv(OUTPUT_SENSITIVITY_OFFERS, index=False)
+        sensitivity_summary(table).to_csv(OUTPUT_SENSITIVITY, index=False)
+        print(f"Wrote sensitivity sweep over {len(args.sweep)} usage levels: {OUTPUT_SENSITIVITY}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from urllib.parse import urljoin, urlparse
+
+from html_text import iter_text_blocks
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+FIXTURES_DIR = BASE_DIR / "data" / "fixtures" / "booking"
+
+EURO_SIGN = "\N{EURO SIGN}"
+
+# Keys that booking platforms use for an offer's name, price and details.
+NAME_KEYS = ("name", "title", "label", "Name", "productName", "display_name")
+PRICE_KEYS = ("price", "Price", "OnlinePrice", "amount", "price_eur", "priceValue", "unit_price")
+CENT_PRICE_KEYS = ("price_cents", "amount_cents", "priceInCents")
+DETAIL_KEYS = ("description", "Description", "subtitle", "details", "validity", "duration")
+# Numeric fields rendered with a unit so offer inference can read them.
+COUNT_KEYS = {"credits": "credits", "sessions": "classes", "Count": "classes"}
+
+# Embedded JSON state that the platforms' pages are rendered from.
+JSON_SCRIPT_RE = re.compile(
+    r"<script[^>]*(?:type=[\"']application/(?:ld\+)?json[\"']|id=[\"']__(?:NEXT|NUXT)_DATA__[\"'])[^>]*>"
+    r"(.*?)</script>",
+    re.I | re.S,
+)
+
+PRICE_TEXT_RE = re.compile(rf"(?:{EURO_SIGN}|EUR)\s?\d+[.,]?\d*|\d+[.,]?\d*\s?(?:{EURO_SIGN}|EUR)", re.I)
+
+
+def _first_path_segments(url: str, count: int) -> str:
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split("/") if segment]
+    return f"{parsed.scheme}://{parsed.netloc}/" + "".join(f"{segment}/" for segment in segments[:count])
+
+
+def _host_root(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+@dataclass(frozen=True)
+class Connector:
+    """A booking platform: how to recognise its links and where its prices live.
+
+    studio_root maps any link into the platform to the studio's base URL, and
+    pricing_paths are tried relative to it after the link itself.
+    """
+
+    platform: str
+    domains: tuple[str, ...]
+    studio_root: Callable[[str], str]
+    pricing_paths: tuple[str, ...] = ()
+    fixture: str = ""
+
+    def matches(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith(f".{domain}") for domain in self.domains)
+
+    def pricing_urls(self, url: str) -> list[str]:
+        root = self.studio_root(url)
+        urls = [url, *(urljoin(root, path) for path in self.pricing_paths)]
+        return list(dict.fromkeys(urls))
+
+    def parse(self, body: str) -> list[tuple[str, str]]:
+        """(raw_price, context) pairs from a pricing page or API response."""
+        hits = [_offer_hit(offer) for offer in _iter_offers(_json_documents(body))]
+        hits = [hit for hit in hits if hit]
+        if hits:
+            return list(dict.fromkeys(hits))
+        return _html_list_prices(body)
+
+
+# The pricing paths and the samples in data/fixtures/booking are hand-built
+# from the platforms' public pages and are NOT captured responses: they are
+# unverified until replaced by a real capture of each platform.
+CONNECTORS = [
+    Connector(
+        platform="mindbody",
+        domains=("mindbodyonline.com", "mindbody.io", "healcode.com"),
+        studio_root=_host_root,
+        fixture="mindbody.html",
+    ),
+    Connector(
+        platform="momoyoga",
+        domains=("momoyoga.com",),
+        studio_root=lambda url: _first_path_segments(url, 1),
+        pricing_paths=("prices", "pricing"),
+        fixture="momoyoga.html",
+    ),
+    Connector(
+        platform="eversports",
+        domains=("eversports.nl", "eversports.com", "eversports.de"),
+        studio_root=lambda url: _first_path_segments(url, 2),
+        pricing_paths=("prices",),
+        fixture="eversports.html",
+    ),
+    Connector(
+        platform="bsport",
+        domains=("bsport.io",),
+        studio_root=_host_root,
+        pricing_paths=("offers",),
+        fixture="bsport.json",
+    ),
+]
+
+
+def find_connector(url: str) -> Connector | None:
+    for connector in CONNECTORS:
+        if connector.matches(url):
+            return connector
+    return None
+
+
+def fetch_prices(
+    connector: Connector, url: str, fetch_text: Callable[[str], str]
+) -> tuple[str, str, list[tuple[str, str]]] | None:
+    """Try the connector's pricing URLs; (url, body, hits) for the first with prices."""
+    for candidate in connector.pricing_urls(url):
+        try:
+            body = fetch_text(candidate)
+        except Exception:
+            continue
+        hits = connector.parse(body)
+        if hits:
+            return candidate, body, hits
+    return None
+
+
+def _json_documents(body: str) -> list[Any]:
+    stripped = body.lstrip()
+    if stripped.startswith(("{", "[")):
+        try:
+            return [json.loads(stripped)]
+        except json.JSONDecodeError:
+            pass
+    documents = []
+    for blob in JSON_SCRIPT_RE.findall(body):
+        try:
+            documents.append(json.loads(blob))
+        except json.JSONDecodeError:
+            continue
+    return documents
+
+
+def _iter_offers(node: Any) -> Iterator[dict[str, Any]]:
+    """Every dict in the JSON tree that has both a name and a price."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _iter_offers(item)
+        return
+    if not isinstance(node, dict):
+        return
+    if _offer_name(node) and _offer_price(node) is not None:
+        yield node
+        return
+    for value in node.values():
+        yield from _iter_offers(value)
+
+
+def _offer_name(node: dict[str, Any]) -> str:
+    for key in NAME_KEYS:
+        value = node.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return ""
+
+
+def _to_number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"\d[\d.,]*", value)
+        if match:
+            return float(_decimal_string(match.group(0).rstrip(".,")))
+    return None
+
+
+def _decimal_string(number: str) -> str:
+    """Normalize separators ("1.150,00" -> "1150.00") like pricing_crawl._parse_price.
+
+    With both separators the last one is the decimal mark, so "1,150.00"
+    works too; a lone comma is a decimal comma.
+    """
+    if "," in number and "." in number:
+        thousands = "." if number.rfind(",") > number.rfind(".") else ","
+        number = number.replace(thousands, "")
+    return number.replace(",", ".")
+
+
+def _offer_price(node: dict[str, Any]) -> float | None:
+    for key in CENT_PRICE_KEYS:
+        cents = _to_number(node.get(key))
+        if cents is not None:
+            return cents / 100
+    for key in PRICE_KEYS:
+        value = node.get(key)
+        if isinstance(value, dict):
+            # {"amount": 12.5, "currency": "EUR"} style money objects.
+            value = value.get("amount", value.get("value"))
+        price = _to_number(value)
+        if price is not None:
+            return price
+    offers = node.get("offers")
+    if isinstance(offers, dict):
+        # JSON-LD Product/Service with a nested Offer.
+        return _to_number(offers.get("price"))
+    return None
+
+
+def _format_price(price: float) -> str:
+    if price == int(price):
+        return f"{EURO_SIGN}{int(price)}"
+    return f"{EURO_SIGN}{price:.2f}".replace(".", ",")
+
+
+def _offer_hit(node: dict[str, Any]) -> tuple[str, str] | None:
+    price = _offer_price(node)
+    if price is None or price <= 0:
+        return None
+    offers = node.get("offers") if isinstance(node.get("offers"), dict) else {}
+    currency = node.get("currency") or node.get("priceCurrency") or offers.get("priceCurrency")
+    if isinstance(node.get("price"), dict):
+        currency = currency or node["price"].get("currency")
+    currency = str(currency or "EUR").upper()
+    if currency != "EUR":
+        return None
+    raw_price = _format_price(price)
+    details = [str(node[key]) for key in DETAIL_KEYS if node.get(key) not in (None, "")]
+    details += [f"{node[key]} {unit}" for key, unit in COUNT_KEYS.items() if node.get(key) not in (None, "")]
+    context = " ".join([_offer_name(node), *details, raw_price])
+    return raw_price, " ".join(context.split())
+
+
+def _html_list_prices(body: str) -> list[tuple[str, str]]:
+    """One hit per row, list item or card holding a single price."""
+    units: dict[int, list[str]] = {}
+    for block in iter_text_blocks(body):
+        if block.containers:
+            units.setdefault(block.containers[-1][0], []).append(block.text)
+    hits = []
+    for texts in units.values():
+        text = " ".join(texts)
+        prices = PRICE_TEXT_RE.findall(text)
+        if len(prices) == 1:
+            hits.append((prices[0], text))
+    return hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run each booking connector over its sample fixture offline (hand-built, unverified samples)."
+    )
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Fixture directory.")
+    args = parser.parse_args()
+
+    failures = 0
+    for connector in CONNECTORS:
+        path = args.fixtures / connector.fixture
+        if not path.exists():
+            print(f"{connector.platform}: missing fixture {path}")
+            failures += 1
+            continue
+        hits = connector.parse(path.read_text(encoding="utf-8"))
+        print(f"{connector.platform}: {len(hits)} prices")
+        for raw_price, context in hits:
+            print(f"  {raw_price:>8}  {context}")
+        if not hits:
+            failures += 1
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,31 @@
 from __future__ import annotations
 
+import argparse
 import csv
-import json
 import math
-import time
+import re
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from typing import Any, Callable, TypeVar
+
+import numpy as np
+
+from places_client import (
+    CACHE_PATH,
+    MAX_SEARCH_RESULTS,
+    PlacesBudgetExceeded,
+    PlacesClient,
+    SearchResults,
+    read_key,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
-KEY_PATH = Path(r"C:\Users\Bram Verlaan\Documents\Projects\Python\GooglePlaces_key.txt")
 OUT_PATH = DATA_DIR / "competitors_template.csv"
 
-USER_AGENT = "YogaBenchmarkBot/1.0 (contact: local)"
-
 KEYWORDS = [
     "yoga studio",
     "hot yoga",
@@ -33,132 +40,394 @@ LOCATIONS = [
 ]
 
 
-def _read_key(path: Path) -> str:
-    raw = path.read_text(encoding="utf-8").strip()
-    if not raw:
-        raise RuntimeError(f"Empty API key file: {path}")
-    return raw
-
+EARTH_RADIUS_M = 6371000.0
+WALK_M_PER_MIN = 80  # ~4.8 km/h
+BIKE_M_PER_MIN = 250  # ~15 km/h
+# Upper distance (m) of each tier; anything further is the next tier.
+TIER_THRESHOLDS_M = [1200, 4500]
 
-def _fetch_json(url: str) -> dict[str, Any]:
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(request, timeout=30) as response:
-        return json.loads(response.read().decode("utf-8"))
+# (south, west, north, east) of each city for --mode grid.
+CITY_BBOXES = {
+    "Amsterdam": (52.278, 4.728, 52.431, 5.079),
+    "Haarlem": (52.345, 4.585, 52.420, 4.705),
+}
+CELL_KM = 2.0
+MIN_CELL_M = 250
+METRES_PER_DEGREE = 111_320
 
+# An existing competitor with the same name this close keeps its id.
+ID_MATCH_M = 75
+ID_RE = re.compile(r"^comp-(\d+)$")
 
-def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    r = 6371000.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
-    return 2 * r * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+FIELDNAMES = [
+    "competitor_id",
+    "name",
+    "brand",
+    "website",
+    "address",
+    "postcode",
+    "city",
+    "latitude",
+    "longitude",
+    "distance_walk_min",
+    "distance_bike_min",
+    "tier",
+    "segment",
+    "proposition_notes",
+    "last_checked_date",
+]
 
 
-def _place_text_search(api_key: str, query: str) -> dict[str, Any]:
-    params = {"query": query, "key": api_key}
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json?" + urlencode(params)
-    return _fetch_json(url)
+def _haversine_matrix(
+    lat: np.ndarray, lon: np.ndarray, anchor_lat: np.ndarray, anchor_lon: np.ndarray
+) -> np.ndarray:
+    """Great-circle distance in metres, one row per place and one column per anchor."""
+    phi1 = np.radians(anchor_lat)[np.newaxis, :]
+    phi2 = np.radians(lat)[:, np.newaxis]
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon)[:, np.newaxis] - np.radians(anchor_lon)[np.newaxis, :]
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
 
-def _text_search_paged(api_key: str, query: str) -> list[dict[str, Any]]:
-    results: list[dict[str, Any]] = []
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json?" + urlencode(
-        {"query": query, "key": api_key}
+def _assign_anchors(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    anchors: list[dict[str, Any]],
+    tier_thresholds: list[float] = TIER_THRESHOLDS_M,
+) -> dict[str, np.ndarray]:
+    """Nearest anchor, distance, walk/bike minutes and tier number for every place."""
+    distances = _haversine_matrix(
+        lat,
+        lon,
+        np.array([anchor["latitude"] for anchor in anchors], dtype=float),
+        np.array([anchor["longitude"] for anchor in anchors], dtype=float),
     )
-    while True:
-        data = _fetch_json(url)
-        results.extend(data.get("results", []))
-        token = data.get("next_page_token")
-        if not token:
-            break
-        time.sleep(2.0)
-        url = "https://maps.googleapis.com/maps/api/place/textsearch/json?" + urlencode(
-            {"pagetoken": token, "key": api_key}
+    nearest = distances.argmin(axis=1)
+    dist_m = distances[np.arange(len(lat)), nearest]
+    return {
+        "nearest": nearest,
+        "dist_m": dist_m,
+        "walk_min": np.rint(dist_m / WALK_M_PER_MIN).astype(int),
+        "bike_min": np.rint(dist_m / BIKE_M_PER_MIN).astype(int),
+        "tier": np.searchsorted(np.sort(tier_thresholds), dist_m, side="left") + 1,
+    }
+
+
+@dataclass(frozen=True)
+class _Cell:
+    south: float
+    west: float
+    north: float
+    east: float
+
+    @property
+    def center(self) -> tuple[float, float]:
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    @property
+    def height_m(self) -> float:
+        return (self.north - self.south) * METRES_PER_DEGREE
+
+    @property
+    def width_m(self) -> float:
+        return (self.east - self.west) * METRES_PER_DEGREE * math.cos(math.radians(self.center[0]))
+
+    @property
+    def radius_m(self) -> float:
+        """Radius of the circle through the cell's corners."""
+        return math.hypot(self.height_m, self.width_m) / 2
+
+    def split(self) -> list["_Cell"]:
+        lat, lng = self.center
+        return [
+            _Cell(self.south, self.west, lat, lng),
+            _Cell(self.south, lng, lat, self.east),
+            _Cell(lat, self.west, self.north, lng),
+            _Cell(lat, lng, self.north, self.east),
+        ]
+
+
+def _tile(bbox: tuple[float, float, float, float], cell_km: float) -> list[_Cell]:
+    """Cover the box with a grid of cells about cell_km on a side."""
+    box = _Cell(*bbox)
+    rows = max(1, math.ceil(box.height_m / (cell_km * 1000)))
+    cols = max(1, math.ceil(box.width_m / (cell_km * 1000)))
+    dlat = (box.north - box.south) / rows
+    dlng = (box.east - box.west) / cols
+    return [
+        _Cell(
+            box.south + row * dlat,
+            box.west + col * dlng,
+            box.south + (row + 1) * dlat,
+            box.west + (col + 1) * dlng,
         )
-    return results
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _unless_over_budget(func: Callable[[T], R]) -> Callable[[T], R | None]:
+    """func, returning None instead of raising once the Places budget is spent."""
+
+    def call(item: T) -> R | None:
+        try:
+            return func(item)
+        except PlacesBudgetExceeded:
+            return None
+
+    return call
+
+
+def _grid_places(
+    client: PlacesClient,
+    bbox: tuple[float, float, float, float],
+    keywords: list[str],
+    cell_km: float = CELL_KM,
+    min_cell_m: float = MIN_CELL_M,
+) -> tuple[list[dict[str, Any]], bool]:
+    """Nearby-search every cell x keyword, splitting cells whose search hit the result cap.
+
+    Each round of cells runs concurrently; places are deduped by place_id and
+    kept only when they fall inside the box. Once the Places budget is spent
+    no more cells are split; returns (places, complete).
+    """
+    south, west, north, east = bbox
+    units = [(cell, keyword) for cell in _tile(bbox, cell_km) for keyword in keywords]
+    places: dict[str, dict[str, Any]] = {}
+    searched = split = skipped = 0
+
+    def search(unit: tuple[_Cell, str]) -> SearchResults:
+        cell, keyword = unit
+        return client.nearby_search(*cell.center, cell.radius_m, keyword)
+
+    while units:
+        next_units = []
+        for (cell, keyword), results in zip(units, client.map(_unless_over_budget(search), units)):
+            if results is None:
+                skipped += 1
+                continue
+            searched += 1
+            for item in results:
+                place_id = item.get("place_id")
+                location = item.get("geometry", {}).get("location", {})
+                lat, lng = location.get("lat"), location.get("lng")
+                if not place_id or lat is None or lng is None:
+                    continue
+                if south <= lat <= north and west <= lng <= east:
+                    places.setdefault(place_id, item)
+            if not results.complete:
+                # The budget ran out between pages: keep what was found.
+                skipped += 1
+                continue
+            if len(results) >= MAX_SEARCH_RESULTS and min(cell.height_m, cell.width_m) / 2 >= min_cell_m:
+                split += 1
+                next_units.extend((child, keyword) for child in cell.split())
+        if skipped:
+            skipped += len(next_units)
+            break
+        units = next_units
+    print(f"Grid: {searched} cell searches, {split} cells split, {len(places)} places")
+    if skipped:
+        print(f"Places budget spent: skipped {skipped} cell searches")
+    return list(places.values()), not skipped
+
+
+def _load_existing(path: Path) -> list[dict[str, str]]:
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _assign_stable_ids(rows: list[dict[str, str]], existing: list[dict[str, str]]) -> None:
+    """Reuse the id of the existing competitor with the same name within ID_MATCH_M.
+
+    Rows without a match get new ids after the highest existing number, in
+    row order, so rerunning discovery does not renumber known studios.
+    """
+    by_name: dict[str, list[dict[str, str]]] = {}
+    numbers = [0]
+    for row in existing:
+        match = ID_RE.match(row.get("competitor_id") or "")
+        if match:
+            numbers.append(int(match.group(1)))
+        try:
+            float(row.get("latitude") or ""), float(row.get("longitude") or "")
+        except ValueError:
+            continue
+        by_name.setdefault((row.get("name") or "").strip().casefold(), []).append(row)
 
+    used: set[str] = set()
+    unmatched = []
+    for row in rows:
+        candidates = [
+            old
+            for old in by_name.get(row["name"].strip().casefold(), [])
+            if old.get("competitor_id") and old["competitor_id"] not in used
+        ]
+        if candidates:
+            distances = _haversine_matrix(
+                np.array([float(row["latitude"])]),
+                np.array([float(row["longitude"])]),
+                np.array([float(old["latitude"]) for old in candidates]),
+                np.array([float(old["longitude"]) for old in candidates]),
+            )[0]
+            nearest = int(distances.argmin())
+            if distances[nearest] <= ID_MATCH_M:
+                row["competitor_id"] = candidates[nearest]["competitor_id"]
+                used.add(row["competitor_id"])
+                continue
+        unmatched.append(row)
 
+    next_number = max(numbers) + 1
+    for row in unmatched:
+        row["competitor_id"] = f"comp-{next_number:03d}"
+        next_number += 1
 
 
 def main() -> None:
-    api_key = _read_key(KEY_PATH)
+    parser = argparse.ArgumentParser(description="Find yoga studios near each Movements location via Google Places.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Places requests.")
+    parser.add_argument("--max-requests", type=int, default=None, help="Stop after this many uncached Places requests.")
+    parser.add_argument("--max-cost", type=float, default=None, help="Stop once the estimated Places cost (USD) would pass this.")
+    parser.add_argument("--cache-ttl-days", type=float, default=30, help="Reuse cached Places responses younger than this.")
+    parser.add_argument(
+        "--tier-thresholds",
+        type=lambda value: [float(part) for part in value.split(",")],
+        default=TIER_THRESHOLDS_M,
+        help="Comma-separated upper distances in metres for Tier 1, Tier 2, ... (default 1200,4500).",
+    )
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH, help="Places cache database.")
+    parser.add_argument(
+        "--mode",
+        choices=["anchors", "grid"],
+        default="anchors",
+        help="anchors: text search around each location; grid: nearby search over tiles of the city box.",
+    )
+    parser.add_argument("--city", choices=sorted(CITY_BBOXES), default="Amsterdam", help="City box for --mode grid.")
+    parser.add_argument(
+        "--bbox",
+        type=lambda value: tuple(float(part) for part in value.split(",")),
+        help="south,west,north,east box for --mode grid (overrides --city).",
+    )
+    parser.add_argument("--cell-km", type=float, default=CELL_KM, help="Initial grid cell size in km.")
+    parser.add_argument(
+        "--min-cell-m",
+        type=float,
+        default=MIN_CELL_M,
+        help="Cells whose search hits the result cap are split until they are this small.",
+    )
+    args = parser.parse_args()
+    if args.bbox is not None and len(args.bbox) != 4:
+        parser.error("--bbox needs south,west,north,east")
+
     DATA_DIR.mkdir(parents=True, exist_ok=True)
+    client = PlacesClient(
+        read_key(),
+        cache_path=args.cache,
+        ttl_days=args.cache_ttl_days,
+        max_requests=args.max_requests,
+        max_cost=args.max_cost,
+        max_concurrency=args.workers,
+    )
 
-    anchors: list[dict[str, Any]] = []
-    for name, address in LOCATIONS:
-        anchor_query = f"Movements Yoga {address}"
-        anchor = _place_text_search(api_key, anchor_query)
-        if not anchor.get("results"):
+    def geocode(location: tuple[str, str]) -> dict[str, Any]:
+        name, address = location
+        results = client.text_search(f"Movements Yoga {address}", all_pages=False)
+        if not results:
             raise RuntimeError(f"Could not geocode {name} via Google Places.")
-        anchor_loc = anchor["results"][0]["geometry"]["location"]
-        anchors.append(
-            {
-                "name": name,
-                "latitude": float(anchor_loc["lat"]),
-                "longitude": float(anchor_loc["lng"]),
-            }
-        )
+        anchor_loc = results[0]["geometry"]["location"]
+        return {
+            "name": name,
+            "latitude": float(anchor_loc["lat"]),
+            "longitude": float(anchor_loc["lng"]),
+        }
 
-    seen_ids: set[str] = set()
-    places: list[dict[str, Any]] = []
-    for anchor in anchors:
-        for keyword in KEYWORDS:
-            query = f"{keyword} near {anchor['name']} {anchor['latitude']},{anchor['longitude']}"
-            for item in _text_search_paged(api_key, query):
-                place_id = item.get("place_id")
-                if not place_id or place_id in seen_ids:
+    with client:
+        # Uncached lookups past --max-requests/--max-cost come back as None and
+        # are skipped, so a capped run still writes what it found.
+        anchors = client.map(_unless_over_budget(geocode), LOCATIONS)
+        if not all(anchors):
+            print("Places budget spent before every location was geocoded; nothing written.")
+            print(client.summary())
+            return
+        incomplete = False
+        if args.mode == "grid":
+            places, complete = _grid_places(
+                client,
+                args.bbox or CITY_BBOXES[args.city],
+                KEYWORDS,
+                cell_km=args.cell_km,
+                min_cell_m=args.min_cell_m,
+            )
+            incomplete = not complete
+        else:
+            queries = [
+                f"{keyword} near {anchor['name']} {anchor['latitude']},{anchor['longitude']}"
+                for anchor in anchors
+                for keyword in KEYWORDS
+            ]
+            # Results come back in query order, so dedup keeps the serial behaviour.
+            result_lists = client.map(_unless_over_budget(client.text_search), queries)
+            skipped = sum(results is None for results in result_lists)
+            truncated = sum(results is not None and not results.complete for results in result_lists)
+            if skipped or truncated:
+                incomplete = True
+                print(
+                    f"Places budget spent: skipped {skipped} of {len(queries)} searches, "
+                    f"{truncated} cut short before their last page"
+                )
+            seen_ids: set[str] = set()
+            places = []
+            for results in result_lists:
+                if results is None:
                     continue
-                seen_ids.add(place_id)
-                places.append(item)
+                for item in results:
+                    place_id = item.get("place_id")
+                    if not place_id or place_id in seen_ids:
+                        continue
+                    seen_ids.add(place_id)
+                    places.append(item)
+        print(client.summary())
 
-    rows: list[dict[str, str]] = []
+    located = []
     for item in places:
-        name = item.get("name") or ""
         geometry = item.get("geometry", {}).get("location", {})
-        lat = geometry.get("lat")
-        lon = geometry.get("lng")
-        if lat is None or lon is None:
-            continue
-
-        min_dist = None
-        nearest_name = ""
-        for anchor in anchors:
-            dist_m = _haversine(anchor["latitude"], anchor["longitude"], float(lat), float(lon))
-            if min_dist is None or dist_m < min_dist:
-                min_dist = dist_m
-                nearest_name = anchor["name"]
-        if min_dist is None:
-            continue
-        dist_m = min_dist
-        walk_min = round(dist_m / 80)  # ~4.8 km/h
-        bike_min = round(dist_m / 250)  # ~15 km/h
-        if dist_m <= 1200:
-            tier = "Tier 1"
-        elif dist_m <= 4500:
-            tier = "Tier 2"
-        else:
-            tier = "Tier 3"
+        if geometry.get("lat") is not None and geometry.get("lng") is not None:
+            located.append((item, float(geometry["lat"]), float(geometry["lng"])))
+    assigned = _assign_anchors(
+        np.array([lat for _, lat, _ in located], dtype=float),
+        np.array([lon for _, _, lon in located], dtype=float),
+        anchors,
+        args.tier_thresholds,
+    )
 
+    rows: list[dict[str, str]] = []
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    for index, (item, lat, lon) in enumerate(located):
         address = item.get("formatted_address") or item.get("vicinity") or ""
         rows.append(
             {
-                "competitor_id": f"comp-{len(rows)+1:03d}",
-                "name": name,
+                "competitor_id": "",
+                "name": item.get("name") or "",
                 "brand": "",
                 "website": "",
                 "address": address,
                 "postcode": "",
-                "city": "Amsterdam",
-                "latitude": f"{float(lat):.6f}",
-                "longitude": f"{float(lon):.6f}",
-                "distance_walk_min": str(walk_min),
-                "distance_bike_min": str(bike_min),
-                "tier": tier,
+                "city": args.city if args.mode == "grid" else "Amsterdam",
+                "latitude": f"{lat:.6f}",
+                "longitude": f"{lon:.6f}",
+                "distance_walk_min": str(assigned["walk_min"][index]),
+                "distance_bike_min": str(assigned["bike_min"][index]),
+                "tier": f"Tier {assigned['tier'][index]}",
                 "segment": "yoga studio",
-                "proposition_notes": f"nearest_location={nearest_name}",
-                "last_checked_date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+                "proposition_notes": f"nearest_location={anchors[assigned['nearest'][index]]['name']}",
+                "last_checked_date": today,
             }
         )
 
@@ -169,28 +438,17 @@ def main() -> None:
         and "movementsyoga.com" not in row["website"].lower()
     ]
     rows.sort(key=lambda r: int(r["distance_bike_min"]))
+    existing = _load_existing(OUT_PATH)
+    _assign_stable_ids(rows, existing)
+    if incomplete:
+        # A capped run only refreshes the studios it found; keep the others.
+        found = {row["competitor_id"] for row in rows}
+        kept = [row for row in existing if row.get("competitor_id") not in found]
+        rows.extend({field: row.get(field) or "" for field in FIELDNAMES} for row in kept)
+        print(f"Kept {len(kept)} existing competitors the capped run did not reach")
 
     with OUT_PATH.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "competitor_id",
-                "name",
-                "brand",
-                "website",
-                "address",
-                "postcode",
-                "city",
-                "latitude",
-                "longitude",
-                "distance_walk_min",
-                "distance_bike_min",
-                "tier",
-                "segment",
-                "proposition_notes",
-                "last_checked_date",
-            ],
-        )
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(rows)
 
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+HISTORY_DIR = DATA_DIR / "history"
+
+# The append-only CSV histories written before this store; `import` loads them.
+LEGACY_HISTORY = {
+    "offers": DATA_DIR / "offers_history.csv",
+    "web_candidates": DATA_DIR / "web_candidates_history.csv",
+}
+
+DATASETS = ["offers", "web_candidates"]
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+def _dataset_dir(dataset: str, root: Path) -> Path:
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown history dataset: {dataset} (expected one of {', '.join(DATASETS)})")
+    return root / dataset
+
+
+def _load_json(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_json(path: Path, data: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _digest(columns: list[str], rows: list[dict[str, str]]) -> str:
+    payload = json.dumps([columns, [[row.get(column) or "" for column in columns] for row in rows]])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(dataset: str, root: Path = HISTORY_DIR) -> dict[str, dict]:
+    """snapshot_date -> {"partition", "rows", "digest"} for the stored snapshots."""
+    return _load_json(_dataset_dir(dataset, root) / "manifest.json")
+
+
+def snapshot_dates(dataset: str, root: Path = HISTORY_DIR) -> list[str]:
+    return sorted(load_manifest(dataset, root))
+
+
+def _write_parquet(path: Path, columns: list[str], rows: list[dict[str, str]]) -> None:
+    # Categoricals are written as Parquet dictionary columns.
+    frame = pd.DataFrame(
+        {column: pd.Categorical([row.get(column) or "" for row in rows]) for column in columns}
+    )
+    frame.to_parquet(path / "part.parquet", index=False)
+
+
+def _write_csv(path: Path, dictionary_path: Path, columns: list[str], rows: list[dict[str, str]]) -> None:
+    """CSV fallback: values become integer codes into one dictionary per dataset.
+
+    The dictionary is shared by all partitions and only grows, so a value
+    repeated every week is stored once.
+    """
+    dictionary: dict[str, list[str]] = _load_json(dictionary_path)
+    encoded: dict[str, list] = {}
+    for column in columns:
+        values = [row.get(column) or "" for row in rows]
+        known = dictionary.setdefault(column, [])
+        index = {value: code for code, value in enumerate(known)}
+        codes = []
+        for value in values:
+            if value not in index:
+                index[value] = len(known)
+                known.append(value)
+            codes.append(index[value])
+        encoded[column] = codes
+    pd.DataFrame(encoded, columns=columns).to_csv(path / "part.csv", index=False)
+    _save_json(dictionary_path, dictionary)
+
+
+def write_snapshot(
+    dataset: str,
+    rows: list[dict[str, str]],
+    snapshot_date: str,
+    root: Path = HISTORY_DIR,
+    use_parquet: bool | None = None,
+) -> bool:
+    """Store rows as the dataset's snapshot for snapshot_date.
+
+    A snapshot identical to the previous one only gets a manifest entry that
+    points at that partition, so unchanged weeks take no space. Returns False
+    when nothing was written. Rewriting a date replaces its snapshot.
+    """
+    dataset_dir = _dataset_dir(dataset, root)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    columns = [column for column in (rows[0].keys() if rows else []) if column != "snapshot_date"]
+    digest = _digest(columns, rows)
+    manifest = load_manifest(dataset, root)
+    if manifest.get(snapshot_date, {}).get("digest") == digest:
+        return False
+
+    partition = f"snapshot_date={snapshot_date}"
+    path = dataset_dir / partition
+    shared = sorted(
+        date for date, entry in manifest.items() if entry["partition"] == partition and date != snapshot_date
+    )
+    if shared:
+        # Later snapshots reuse this date's partition: hand it over to the
+        # first of them before the date gets its new rows.
+        moved = f"snapshot_date={shared[0]}"
+        path.rename(dataset_dir / moved)
+        for date in shared:
+            manifest[date]["partition"] = moved
+        _save_json(dataset_dir / "manifest.json", manifest)
+
+    previous = [date for date in sorted(manifest) if date < snapshot_date]
+    if previous and manifest[previous[-1]]["digest"] == digest:
+        manifest[snapshot_date] = dict(manifest[previous[-1]])
+        _save_json(dataset_dir / "manifest.json", manifest)
+        if path.exists():
+            shutil.rmtree(path)
+        return False
+
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir()
+    if PARQUET_AVAILABLE if use_parquet is None else use_parquet:
+        _write_parquet(path, columns, rows)
+    else:
+        _write_csv(path, dataset_dir / "dictionary.json", columns, rows)
+
+    manifest[snapshot_date] = {"partition": partition, "rows": len(rows), "digest": digest}
+    _save_json(dataset_dir / "manifest.json", manifest)
+    return True
+
+
+def _read_partition(path: Path, columns: list[str] | None) -> pd.DataFrame:
+    """One partition; CSV partitions are left as dictionary codes."""
+    if (path / "part.parquet").exists():
+        if columns is None:
+            return pd.read_parquet(path / "part.parquet")
+        import pyarrow.parquet as pq  # type: ignore
+
+        available = pq.read_schema(path / "part.parquet").names
+        return pd.read_parquet(path / "part.parquet", columns=[column for column in columns if column in available])
+
+    with (path / "part.csv").open("r", encoding="utf-8", newline="") as handle:
+        header = next(csv.reader(handle), [])
+    usecols = header if columns is None else [column for column in header if column in columns]
+    return pd.read_csv(path / "part.csv", usecols=usecols, dtype=np.int32)
+
+
+def read_history(
+    dataset: str,
+    start: str | None = None,
+    end: str | None = None,
+    columns: Iterable[str] | None = None,
+    root: Path = HISTORY_DIR,
+) -> pd.DataFrame:
+    """Snapshots from start to end (inclusive ISO dates) with a snapshot_date column.
+
+    Only the partitions in the range and the requested columns are read.
+    Values come back exactly as stored, as categoricals of strings; use
+    pd.to_numeric for prices and counts.
+    """
+    dataset_dir = _dataset_dir(dataset, root)
+    manifest = load_manifest(dataset, root)
+    dates = [
+        date for date in sorted(manifest) if (start is None or date >= start) and (end is None or date <= end)
+    ]
+    columns = [column for column in columns if column != "snapshot_date"] if columns is not None else None
+    dictionary: dict[str, list[str]] = _load_json(dataset_dir / "dictionary.json")
+
+    partitions: dict[str, pd.DataFrame] = {}
+    coded, decoded = [], []
+    for date in dates:
+        partition = manifest[date]["partition"]
+        if partition not in partitions:
+            partitions[partition] = _read_partition(dataset_dir / partition, columns)
+        frame = partitions[partition]
+        is_coded = (dataset_dir / partition / "part.csv").exists()
+        (coded if is_coded else decoded).append((date, frame))
+
+    def stack(parts: list[tuple[str, pd.DataFrame]]) -> pd.DataFrame:
+        frame = pd.concat([part for _, part in parts], ignore_index=True)
+        frame["snapshot_date"] = pd.Categorical(
+            np.repeat([date for date, _ in parts], [len(part) for _, part in parts])
+        )
+        return frame
+
+    frames = []
+    if coded:
+        # Concatenate the integer codes and decode each column once.
+        history = stack(coded)
+        for column in history.columns:
+            if column != "snapshot_date":
+                codes = history[column].fillna(-1).to_numpy(dtype=np.int32)
+                history[column] = pd.Categorical.from_codes(codes, categories=dictionary[column])
+        frames.append(history)
+    if decoded:
+        frames.append(stack(decoded))
+    if not frames:
+        return pd.DataFrame(columns=[*(columns or []), "snapshot_date"])
+
+    history = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    if len(frames) > 1:
+        history = history.sort_values("snapshot_date", kind="stable", ignore_index=True)
+    if decoded:
+        # Per-partition categories (Parquet, or both formats) concatenate to
+        # objects; re-encode so the result stays compact.
+        for column in history.columns:
+            if history[column].dtype != "category":
+                history[column] = history[column].astype("category")
+    if columns is not None:
+        history = history.reindex(columns=[*columns, "snapshot_date"])
+    return history
+
+
+def import_legacy_csv(dataset: str, path: Path, root: Path = HISTORY_DIR) -> tuple[int, int]:
+    """Load an old append-only history CSV; returns (snapshots, partitions written)."""
+    if not path.exists():
+        return 0, 0
+    by_date: dict[str, list[dict[str, str]]] = {}
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            by_date.setdefault(row.get("snapshot_date") or "", []).append(row)
+    written = 0
+    for snapshot_date in sorted(date for date in by_date if date):
+        written += write_snapshot(dataset, by_date[snapshot_date], snapshot_date, root)
+    return len(by_date), written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Partitioned offers/web candidates history.")
+    parser.add_argument("command", choices=["import", "export", "list"], help="What to do.")
+    parser.add_argument("dataset", choices=DATASETS, help="History dataset.")
+    parser.add_argument("--root", type=Path, default=HISTORY_DIR, help="History store directory.")
+    parser.add_argument("--input", type=Path, help="Legacy history CSV to import (default: data/<dataset>_history.csv).")
+    parser.add_argument("--start", help="First snapshot_date to export (YYYY-MM-DD).")
+    parser.add_argument("--end", help="Last snapshot_date to export (YYYY-MM-DD).")
+    parser.add_argument("--columns", help="Comma-separated columns to export (default: all).")
+    parser.add_argument("--output", type=Path, help="CSV output for export.")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        path = args.input or LEGACY_HISTORY[args.dataset]
+        snapshots, written = import_legacy_csv(args.dataset, path, args.root)
+        print(f"Imported {snapshots} {args.dataset} snapshots from {path} ({written} partitions written)")
+    elif args.command == "list":
+        manifest = load_manifest(args.dataset, args.root)
+        for date in sorted(manifest):
+            entry = manifest[date]
+            print(f"{date}  {entry['rows']:>6} rows  {entry['partition']}")
+    else:
+        columns = args.columns.split(",") if args.columns else None
+        history = read_history(args.dataset, args.start, args.end, columns, args.root)
+        if args.output is None:
+            print(history.to_string(max_rows=20))
+            return
+        history.to_csv(args.output, index=False)
+        print(f"Exported {len(history)} rows: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
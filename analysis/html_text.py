@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Iterator
+
+
+# Content of these elements is never visible text. Struck-through text is
+# dropped too: on pricing pages it is the old price next to the current one.
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "del", "s", "strike"}
+
+# Elements that end the current text block when they open or close.
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "section",
+    "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul", "option",
+    "button", "label", "body", "title",
+}
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+# An open tag closes an earlier open sibling of these tags, up to (not past)
+# the listed parents, the way browsers handle omitted end tags.
+IMPLICIT_CLOSE = {
+    "li": ({"li"}, {"ul", "ol"}),
+    "tr": ({"tr", "td", "th"}, {"table", "thead", "tbody", "tfoot"}),
+    "td": ({"td", "th"}, {"tr", "table"}),
+    "th": ({"td", "th"}, {"tr", "table"}),
+    "dt": ({"dt", "dd"}, {"dl"}),
+    "dd": ({"dt", "dd"}, {"dl"}),
+    "option": ({"option"}, {"select", "datalist"}),
+    "p": ({"p"}, BLOCK_TAGS - {"p"}),
+}
+
+CARD_HINT_RE = re.compile(
+    r"card|plan|pric|tier|package|product|membership|abonnement|tarie", re.I
+)
+
+CHUNK_SIZE = 256 * 1024
+
+
+@dataclass(frozen=True)
+class TextBlock:
+    """A run of visible text and where it sits in the page.
+
+    containers lists the (id, kind) of every table row, list item or card
+    around the text, outermost first; ids are unique within a page. heading
+    is the most recent heading before the block, ignoring headings inside
+    containers that have already closed.
+    """
+
+    text: str
+    tag: str
+    containers: tuple[tuple[int, str], ...]
+    heading: str
+
+    @property
+    def container(self) -> int:
+        return self.containers[-1][0] if self.containers else 0
+
+    @property
+    def container_kind(self) -> str:
+        return self.containers[-1][1] if self.containers else ""
+
+
+def _container_kind(tag: str, attrs: list[tuple[str, str | None]]) -> str:
+    if tag == "tr":
+        return "row"
+    if tag == "li":
+        return "item"
+    if tag == "article":
+        return "card"
+    if tag in {"div", "section"}:
+        hints = " ".join(value or "" for name, value in attrs if name in {"class", "id"})
+        if hints and CARD_HINT_RE.search(hints):
+            return "card"
+    return ""
+
+
+class _BlockParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[TextBlock] = []
+        # (tag, container id, container kind, heading when it opened) for every
+        # open element.
+        self._stack: list[tuple[str, int, str, str]] = []
+        self._skipping: list[str] = []
+        self._parts: list[str] = []
+        self._containers = 0
+        self._heading = ""
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._skipping or tag in SKIP_TAGS:
+            if tag in SKIP_TAGS and tag not in VOID_TAGS:
+                self._skipping.append(tag)
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        else:
+            # Tags separate words even when inline, as in the old regex stripping.
+            self._parts.append(" ")
+        if tag in VOID_TAGS:
+            return
+        if tag in IMPLICIT_CLOSE:
+            self._close_sibling(*IMPLICIT_CLOSE[tag])
+        kind = _container_kind(tag, attrs)
+        container = 0
+        if kind:
+            self._containers += 1
+            container = self._containers
+        self._stack.append((tag, container, kind, self._heading))
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in SKIP_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skipping:
+            if tag == self._skipping[-1]:
+                self._skipping.pop()
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        else:
+            self._parts.append(" ")
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                self._pop_to(index)
+                break
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self._parts.append(data)
+
+    def _close_sibling(self, siblings: set[str], parents: set[str]) -> None:
+        for index in range(len(self._stack) - 1, -1, -1):
+            open_tag = self._stack[index][0]
+            if open_tag in parents:
+                return
+            if open_tag in siblings:
+                self._flush()
+                self._pop_to(index)
+                return
+
+    def _pop_to(self, index: int) -> None:
+        # A heading inside a card or row only labels that card or row.
+        for _, _, kind, heading in self._stack[index:]:
+            if kind:
+                self._heading = heading
+                break
+        del self._stack[index:]
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._parts).split())
+        self._parts = []
+        if not text:
+            return
+        tag = self._stack[-1][0] if self._stack else ""
+        containers = tuple((container, kind) for _, container, kind, _ in self._stack if kind)
+        if tag in HEADING_TAGS:
+            self._heading = text
+        self.blocks.append(TextBlock(text, tag, containers, self._heading))
+
+    def close(self) -> None:
+        super().close()
+        self._flush()
+
+    def drain(self) -> list[TextBlock]:
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+
+def iter_text_blocks(html_text: str, chunk_size: int = CHUNK_SIZE) -> Iterator[TextBlock]:
+    """Yield the visible text blocks of a page in document order.
+
+    The page is parsed in chunks and blocks are yielded as they complete, so
+    callers can start extracting before the whole page has been tokenized.
+    Script, style, noscript, template, svg and struck-through content is
+    skipped.
+    """
+    parser = _BlockParser()
+    for start in range(0, len(html_text), chunk_size):
+        parser.feed(html_text[start : start + chunk_size])
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
+
+
+def html_to_text(html_text: str) -> str:
+    """Visible text of a page with whitespace collapsed, one space between blocks."""
+    return " ".join(block.text for block in iter_text_blocks(html_text))
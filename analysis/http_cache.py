@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+CACHE_DIR = DATA_DIR / "http_cache"
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# A lock file older than this was left behind by a crashed run.
+LOCK_STALE_SECONDS = 60
+
+
+def body_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write data so readers see the old file or the whole new one, never a partial write."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Hold path as a lock file shared by every process using the cache."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    path.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        path.unlink(missing_ok=True)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    etag: str
+    last_modified: str
+    body_hash: str
+    size: int
+    fetched_at: float
+    last_used: float
+
+
+class HttpCache:
+    """On-disk HTTP cache keyed by URL with conditional revalidation.
+
+    Entries younger than ttl_seconds are served without a request. Older
+    entries are revalidated with If-None-Match / If-Modified-Since, and a 304
+    reuses the stored body. Call save() (or use it as a context manager) to
+    persist the index; it merges with the index on disk under a lock file,
+    so runs sharing the directory keep each other's entries, and then evicts
+    the least recently used bodies past max_bytes. Bodies are written
+    atomically and checked against their hash when read.
+    """
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        user_agent: str = "",
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self._directory = directory
+        self._index_path = directory / "index.json"
+        self._lock_path = directory / "index.lock"
+        self._user_agent = user_agent
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = self._load_index()
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0}
+
+    def __enter__(self) -> "HttpCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.save()
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            raw = json.loads(self._index_path.read_text(encoding="utf-8"))
+            return {key: CacheEntry(**value) for key, value in raw.items()}
+        except (json.JSONDecodeError, TypeError):
+            return {}
+
+    def save(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self._lock_path), self._lock:
+            # Another run may have saved since this one loaded the index.
+            for key, entry in self._load_index().items():
+                mine = self._entries.get(key)
+                if mine is None or entry.fetched_at > mine.fetched_at:
+                    self._entries[key] = entry
+                elif entry.last_used > mine.last_used:
+                    mine.last_used = entry.last_used
+            for key in [key for key in self._entries if not self._body_path(key).exists()]:
+                del self._entries[key]
+            self._evict()
+            payload = json.dumps({key: asdict(entry) for key, entry in self._entries.items()})
+            _write_atomic(self._index_path, payload.encode("utf-8"))
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self._directory / f"{key}.html"
+
+    def _read_body(self, key: str, entry: CacheEntry) -> str | None:
+        """The stored body, or None if it is missing or not the one the entry describes."""
+        try:
+            data = self._body_path(key).read_bytes()
+        except OSError:
+            return None
+        if hashlib.sha1(data).hexdigest() != entry.body_hash:
+            return None
+        return data.decode("utf-8")
+
+    def _store(self, key: str, url: str, text: str, etag: str, last_modified: str) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        _write_atomic(self._body_path(key), data)
+        now = time.time()
+        with self._lock:
+            self._entries[key] = CacheEntry(
+                url=url,
+                etag=etag,
+                last_modified=last_modified,
+                body_hash=hashlib.sha1(data).hexdigest(),
+                size=len(data),
+                fetched_at=now,
+                last_used=now,
+            )
+
+    def _evict(self) -> None:
+        total = sum(entry.size for entry in self._entries.values())
+        if total <= self._max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1].last_used):
+            if total <= self._max_bytes:
+                break
+            total -= entry.size
+            del self._entries[key]
+            self._body_path(key).unlink(missing_ok=True)
+
+    def fetch_text(self, url: str, timeout: float = 25) -> str:
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+        cached = self._read_body(key, entry) if entry else None
+        now = time.time()
+
+        if entry and cached is not None:
+            if now - entry.fetched_at < self._ttl:
+                with self._lock:
+                    entry.last_used = now
+                    self.stats["fresh"] += 1
+                return cached
+
+        headers = {"User-Agent": self._user_agent} if self._user_agent else {}
+        if entry and cached is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        request = Request(url, headers=headers)
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                text = response.read().decode(charset, errors="replace")
+                etag = response.headers.get("ETag") or ""
+                last_modified = response.headers.get("Last-Modified") or ""
+        except HTTPError as exc:
+            if exc.code == 304 and entry and cached is not None:
+                with self._lock:
+                    entry.fetched_at = now
+                    entry.last_used = now
+                    self.stats["revalidated"] += 1
+                return cached
+            raise
+
+        self._store(key, url, text, etag, last_modified)
+        with self._lock:
+            self.stats["fetched"] += 1
+        return text
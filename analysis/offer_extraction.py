@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import re
+
+
+CLASS_TYPE_MAP = [
+    ("private", "private"),
+    ("hot pilates", "hot_pilates"),
+    ("hot yoga", "hot_yoga"),
+    ("vinyasa", "vinyasa"),
+    ("ashtanga", "ashtanga"),
+    ("yin", "yin"),
+    ("kundalini", "kundalini"),
+    ("pilates", "pilates"),
+    ("barre", "barre"),
+    ("power yoga", "power_yoga"),
+    ("hatha", "hatha"),
+    ("yoga", "yoga"),
+]
+
+OFFER_TYPE_HINTS = [
+    ("drop-in", "drop_in"),
+    ("drop in", "drop_in"),
+    ("single", "drop_in"),
+    ("intro", "intro"),
+    ("trial", "intro"),
+    ("proef", "intro"),
+]
+
+PACK_HINTS = [
+    "class card",
+    "classcard",
+    "strippenkaart",
+    "rittenkaart",
+    "lessenkaart",
+    "lessen kaart",
+    "pack",
+    "pass",
+    "kaart",
+    "credits",
+    "credit",
+    "unit",
+    "units",
+]
+
+MEMBERSHIP_HINTS = [
+    "membership",
+    "abonnement",
+    "unlimited",
+    "onbeperkt",
+    "monthly",
+    "per month",
+    "maand",
+    "weekly",
+    "per week",
+    "week",
+    "yearly",
+    "per year",
+    "jaar",
+]
+
+# Checked in order against the text around the price; the first unit with a hit wins.
+PRICE_UNIT_TERMS = [
+    ("week", ["per week", "weekly", "week"]),
+    ("month", ["per month", "monthly", "maand"]),
+    ("6_months", ["half year", "halfyear", "6 months", "6 maand", "6 maanden"]),
+    ("4_weeks", ["per 4 weeks", "4 weeks", "4 weken"]),
+    ("year", ["per year", "yearly", "jaar"]),
+    ("class", ["per class", "per lesson", "single"]),
+]
+
+DURATION_TERMS = [
+    ("28 days", "28"),
+    ("1 month", "30"),
+    ("one month", "30"),
+    ("3 months", "90"),
+    ("3 maand", "90"),
+    ("6 months", "180"),
+    ("6 maand", "180"),
+    ("1 year", "365"),
+]
+
+UNIT_DURATION_DAYS = {
+    "week": "7",
+    "month": "30",
+    "4_weeks": "28",
+    "6_months": "180",
+    "year": "365",
+}
+
+UNLIMITED_TERMS = ["unlimited", "onbeperkt", "no limit", "geen limiet"]
+MEMBERSHIP_TERMS = ["membership", "abonnement"]
+
+MONTH_TO_MONTH_TERMS = [
+    "month-to-month",
+    "month to month",
+    "no commitment",
+    "cancel anytime",
+    "geen binding",
+    "opzegbaar",
+    "maand-tot-maand",
+]
+
+# (terms, contract_type, minimum commitment months, cancellation notice days)
+COMMITMENT_TERMS = [
+    (["12 month", "12-month", "annual", "yearly", "jaar", "12 maanden"], "annual", "12", "0"),
+    (["6 month", "6-month", "half year", "6 maanden"], "semi_annual", "6", "0"),
+    (["3 month", "3-month", "quarterly", "3 maanden"], "quarterly", "3", "0"),
+    (["intro", "trial", "proef"], "intro", "0", "0"),
+]
+
+# (terms, class_style, intensity_level) for yoga classes, checked in order.
+YOGA_STYLE_TERMS = [
+    (["power", "athletic"], "power_yoga", "high"),
+    (["yin", "restorative", "gentle", "slow"], "yin_restorative", "low"),
+    (["bikram", "26+2", "26 postures"], "bikram_26_2", "high"),
+    (["ashtanga"], "ashtanga", "moderate"),
+    (["hatha"], "hatha", "moderate"),
+]
+FLOW_TERMS = ["vinyasa", "flow"]
+POWER_FLOW_TERMS = ["power", "athletic", "strong"]
+
+SESSION_PATTERNS = [
+    re.compile(r"\b(\d{1,2})\s*(?:class|classes|lessen|lessons)\b", re.I),
+    re.compile(r"\b(\d{1,2})\s*(?:x|times)\b", re.I),
+    re.compile(r"\b(\d{1,2})\s*(?:unit|units|credit|credits)\b", re.I),
+    re.compile(r"\b(\d{1,2})\s*(?:ritten|rittenkaart)\b", re.I),
+]
+CLASS_LENGTH_PATTERN = re.compile(r"\b(\d{2,3})\s*(?:min|minutes)\b", re.I)
+WEEKS_PATTERN = re.compile(r"\b(\d+)\s*week")
+NOTICE_PATTERN = re.compile(r"(\d+)\s*(?:days?|dagen)\s*(?:notice|opzegtermijn)")
+USAGE_WEEK_PATTERNS = [
+    re.compile(r"(\d+)\s*(?:x|times)?\s*(?:per|/)\s*week"),
+    re.compile(r"(\d+)\s*(?:classes?|lessen)\s*(?:per|/)\s*week"),
+    re.compile(r"(\d+)x\s*(?:per|/)\s*week"),
+]
+USAGE_MONTH_PATTERNS = [
+    re.compile(r"(\d+)\s*(?:x|times)?\s*(?:per|/)\s*(?:month|maand)"),
+    re.compile(r"(\d+)\s*(?:classes?|lessen)\s*(?:per|/)\s*(?:month|maand)"),
+    re.compile(r"(\d+)x\s*(?:per|/)\s*(?:month|maand)"),
+]
+
+# Context within this many characters of the price decides the price unit.
+PRICE_WINDOW_CHARS = 40
+
+PACK_SET = frozenset(PACK_HINTS)
+MEMBERSHIP_HINT_SET = frozenset(MEMBERSHIP_HINTS)
+UNLIMITED_SET = frozenset(UNLIMITED_TERMS)
+MEMBERSHIP_SET = frozenset(MEMBERSHIP_TERMS)
+MONTH_TO_MONTH_SET = frozenset(MONTH_TO_MONTH_TERMS)
+COMMITMENT_SETS = [
+    (frozenset(terms), contract_type, months, notice_days)
+    for terms, contract_type, months, notice_days in COMMITMENT_TERMS
+]
+YOGA_STYLE_SETS = [(frozenset(terms), style, intensity) for terms, style, intensity in YOGA_STYLE_TERMS]
+FLOW_SET = frozenset(FLOW_TERMS)
+POWER_FLOW_SET = frozenset(POWER_FLOW_TERMS)
+MONTH_WORDS = frozenset(["month", "maand"])
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher that finds every occurrence of every keyword in one scan.
+
+    The goto/fail links are folded into a transition table up front, so the
+    scan is a single dict lookup per character.
+    """
+
+    def __init__(self, keywords: list[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[list[str]] = [[]]
+        for keyword in dict.fromkeys(keywords):
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(keyword)
+
+        fail = [0] * len(goto)
+        transitions: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = list(goto[0].values())
+        for state in queue:
+            outputs[state].extend(outputs[fail[state]])
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0)
+                queue.append(child)
+        self._transitions = transitions
+        self._outputs = [tuple(output) for output in outputs]
+
+    def find(self, text: str) -> dict[str, list[int]]:
+        """Map each keyword found in text to the start offsets of its occurrences."""
+        hits: dict[str, list[int]] = {}
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        for index, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            for keyword in outputs[state]:
+                hits.setdefault(keyword, []).append(index - len(keyword) + 1)
+        return hits
+
+
+def _all_keywords() -> list[str]:
+    keywords = [hint for hint, _ in CLASS_TYPE_MAP]
+    keywords += [hint for hint, _ in OFFER_TYPE_HINTS]
+    keywords += PACK_HINTS + MEMBERSHIP_HINTS
+    keywords += [term for _, terms in PRICE_UNIT_TERMS for term in terms]
+    keywords += [term for term, _ in DURATION_TERMS]
+    keywords += UNLIMITED_TERMS + MEMBERSHIP_TERMS + MONTH_TO_MONTH_TERMS
+    keywords += [term for terms, *_ in COMMITMENT_TERMS for term in terms]
+    keywords += [term for terms, *_ in YOGA_STYLE_TERMS for term in terms]
+    keywords += FLOW_TERMS + POWER_FLOW_TERMS + ["reformer"]
+    # Gates for the regex fallbacks: they cannot match without these words.
+    keywords += ["week", "month", "maand"]
+    return keywords
+
+
+KEYWORDS = KeywordAutomaton(_all_keywords())
+
+
+def _price_window(lower: str, raw_price: str) -> tuple[int, int]:
+    if not raw_price:
+        return 0, len(lower)
+    idx = lower.find(raw_price.lower())
+    if idx == -1:
+        return 0, len(lower)
+    return max(0, idx - PRICE_WINDOW_CHARS), min(len(lower), idx + PRICE_WINDOW_CHARS)
+
+
+def _price_unit(hits: dict[str, list[int]], window: tuple[int, int]) -> str:
+    start, end = window
+    for unit, terms in PRICE_UNIT_TERMS:
+        for term in terms:
+            for pos in hits.get(term, ()):
+                if start <= pos and pos + len(term) <= end:
+                    return unit
+    return ""
+
+
+def _has_any(hits: dict[str, list[int]], terms: frozenset[str]) -> bool:
+    return not hits.keys().isdisjoint(terms)
+
+
+def _offer_type(hits: dict[str, list[int]]) -> str:
+    if _has_any(hits, PACK_SET):
+        return "pack"
+    if _has_any(hits, MEMBERSHIP_HINT_SET):
+        return "membership"
+    for hint, offer_type in OFFER_TYPE_HINTS:
+        if hint in hits:
+            return offer_type
+    return "unknown"
+
+
+def _class_type(hits: dict[str, list[int]]) -> tuple[str, str]:
+    for hint, class_type in CLASS_TYPE_MAP:
+        if hint in hits:
+            return class_type, "hot" if "hot" in hint else ""
+    return "", ""
+
+
+def _first_group(patterns: list[re.Pattern[str]], text: str) -> str:
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return ""
+
+
+def _duration_days(lower: str, hits: dict[str, list[int]], price_unit: str) -> str:
+    for term, days in DURATION_TERMS:
+        if term in hits:
+            return days
+    if "week" in hits:
+        weeks = WEEKS_PATTERN.search(lower)
+        if weeks:
+            return str(int(weeks.group(1)) * 7)
+    return UNIT_DURATION_DAYS.get(price_unit, "")
+
+
+def _usage_restrictions(lower: str, hits: dict[str, list[int]]) -> tuple[str, str, str]:
+    if _has_any(hits, UNLIMITED_SET):
+        return ("unlimited", "", "")
+    if "week" in hits:
+        value = _first_group(USAGE_WEEK_PATTERNS, lower)
+        if value:
+            return ("classes_per_week", value, "week")
+    if _has_any(hits, MONTH_WORDS):
+        value = _first_group(USAGE_MONTH_PATTERNS, lower)
+        if value:
+            return ("classes_per_month", value, "month")
+    if _has_any(hits, MEMBERSHIP_SET):
+        return ("unlimited", "", "")
+    return ("", "", "")
+
+
+def _contract_terms(lower: str, hits: dict[str, list[int]]) -> tuple[str, str, str]:
+    if _has_any(hits, MONTH_TO_MONTH_SET):
+        notice = NOTICE_PATTERN.search(lower)
+        return ("month_to_month", "1", notice.group(1) if notice else "30")
+    for terms, contract_type, months, notice_days in COMMITMENT_SETS:
+        if _has_any(hits, terms):
+            return (contract_type, months, notice_days)
+    if _has_any(hits, MEMBERSHIP_SET):
+        return ("month_to_month", "1", "30")
+    return ("", "", "")
+
+
+def _class_style(class_type: str, hits: dict[str, list[int]]) -> tuple[str, str]:
+    if class_type in ("yoga", "hot_yoga"):
+        if _has_any(hits, FLOW_SET):
+            if _has_any(hits, POWER_FLOW_SET):
+                return ("power_yoga", "high")
+            return ("vinyasa_flow", "moderate")
+        for terms, style, intensity in YOGA_STYLE_SETS:
+            if _has_any(hits, terms):
+                return (style, intensity)
+    if class_type == "pilates":
+        if "reformer" in hits:
+            return ("reformer_pilates", "moderate")
+        return ("mat_pilates", "moderate")
+    return ("", "")
+
+
+def infer_offer_fields(context: str, raw_price: str) -> dict[str, str]:
+    """Infer every offer field for one price hit, keyed by offer column name.
+
+    The context is lowercased and scanned for keywords once; the regexes only
+    run when the words they need are present.
+    """
+    lower = context.lower()
+    hits = KEYWORDS.find(lower)
+    price_unit = _price_unit(hits, _price_window(lower, raw_price))
+    class_type, heat = _class_type(hits)
+    usage_limit_type, usage_limit_value, usage_limit_period = _usage_restrictions(lower, hits)
+    contract_type, contract_months, cancellation_notice_days = _contract_terms(lower, hits)
+    class_style, intensity_level = _class_style(class_type, hits)
+    class_length = CLASS_LENGTH_PATTERN.search(context)
+    return {
+        "offer_type": _offer_type(hits),
+        "class_type": class_type,
+        "heat": heat,
+        "class_length_min": class_length.group(1) if class_length else "",
+        "sessions_included": _first_group(SESSION_PATTERNS, context),
+        "duration_days": _duration_days(lower, hits, price_unit),
+        "price_unit": price_unit,
+        "contract_months": contract_months,
+        "usage_limit_type": usage_limit_type,
+        "usage_limit_value": usage_limit_value,
+        "usage_limit_period": usage_limit_period,
+        "contract_type": contract_type,
+        "cancellation_notice_days": cancellation_notice_days,
+        "class_style": class_style,
+        "intensity_level": intensity_level,
+    }
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+import history_store
+from price_normalization import DROP_IN_TYPES, PER_ASSUMED_CLASS_TYPES, PER_SESSION_TYPES
+
+OUTPUT_HISTORY_METRICS = Path(__file__).resolve().parent / "offers_history_metrics.csv"
+
+ASSUMED_CLASSES = (8, 12)
+
+# Columns carried into the long-format sensitivity table.
+SWEEP_ID_COLUMNS = ["offer_id", "competitor_id", "tier", "offer_type", "offer_name", "snapshot_date"]
+
+
+def _numeric(offers: pd.DataFrame, column: str) -> pd.Series:
+    if column not in offers:
+        return pd.Series(np.nan, index=offers.index)
+    return pd.to_numeric(offers[column], errors="coerce")
+
+
+def _offer_types(offers: pd.DataFrame) -> pd.Series:
+    if "offer_type" not in offers:
+        return pd.Series("", index=offers.index)
+    return offers["offer_type"].fillna("").astype(str).str.strip().str.lower()
+
+
+def _price_per_class_parts(offers: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(price, fixed price per class, mask of offers priced per assumed class).
+
+    Column-wise version of price_normalization.price_per_class, using its
+    type groups; tests/test_price_metrics.py checks that the two agree.
+    """
+    price = _numeric(offers, "price_eur").to_numpy(dtype=float)
+    sessions = _numeric(offers, "sessions_included").to_numpy(dtype=float)
+    offer_type = _offer_types(offers)
+    has_sessions = sessions > 0
+    is_drop_in = offer_type.isin(DROP_IN_TYPES).to_numpy()
+    per_session = offer_type.isin(PER_SESSION_TYPES).to_numpy() & has_sessions & ~is_drop_in
+    assumed = offer_type.isin(PER_ASSUMED_CLASS_TYPES).to_numpy() & ~is_drop_in & ~per_session
+    fixed = np.full(len(offers), np.nan)
+    fixed[is_drop_in] = price[is_drop_in]
+    fixed[per_session] = price[per_session] / sessions[per_session]
+    return price, fixed, assumed
+
+
+def price_per_class(offers: pd.DataFrame, assumed_classes: int) -> pd.Series:
+    """Price per class, with assumed_classes per month for memberships without a session count."""
+    price, fixed, assumed = _price_per_class_parts(offers)
+    values = np.where(assumed, price / float(assumed_classes), fixed)
+    return pd.Series(values, index=offers.index, dtype=float)
+
+
+def price_per_class_sweep(offers: pd.DataFrame, levels: Iterable[float]) -> np.ndarray:
+    """Price per class for every offer (rows) at every assumed usage level (columns)."""
+    levels = np.asarray(list(levels), dtype=float)
+    price, fixed, assumed = _price_per_class_parts(offers)
+    return np.where(assumed[:, np.newaxis], price[:, np.newaxis] / levels[np.newaxis, :], fixed[:, np.newaxis])
+
+
+def sensitivity_table(offers: pd.DataFrame, levels: Iterable[int]) -> pd.DataFrame:
+    """Long format: one row per offer and assumed_classes with its price_per_class."""
+    levels = list(levels)
+    values = price_per_class_sweep(offers, levels)
+    id_columns = [column for column in SWEEP_ID_COLUMNS if column in offers]
+    table = offers.loc[offers.index.repeat(len(levels)), id_columns].reset_index(drop=True)
+    table["assumed_classes"] = np.tile(levels, len(offers))
+    table["price_per_class"] = values.ravel()
+    return table
+
+
+def sensitivity_summary(table: pd.DataFrame) -> pd.DataFrame:
+    """Price per class by assumed_classes, tier and offer_type (count/min/median/max)."""
+    keys = ["assumed_classes"] + [column for column in ("tier", "offer_type") if column in table]
+    return (
+        table.groupby(keys, dropna=False)["price_per_class"]
+        .agg(["count", "min", "median", "max"])
+        .reset_index()
+    )
+
+
+def monthly_equivalent(offers: pd.DataFrame) -> pd.Series:
+    """Price scaled to 30 days for offers with a duration (see price_normalization)."""
+    price = _numeric(offers, "price_eur")
+    duration_days = _numeric(offers, "duration_days")
+    return price / duration_days.where(duration_days != 0) * 30.0
+
+
+def add_metrics(offers: pd.DataFrame, assumed_classes: Iterable[int] = ASSUMED_CLASSES) -> pd.DataFrame:
+    """Copy of offers with price_per_class_assumed_<n> and monthly_equivalent columns."""
+    offers = offers.copy()
+    for classes in assumed_classes:
+        offers[f"price_per_class_assumed_{classes}"] = price_per_class(offers, classes)
+    offers["monthly_equivalent"] = monthly_equivalent(offers)
+    return offers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Add price metrics to an offers CSV or to the offers history.")
+    parser.add_argument(
+        "input", type=Path, nargs="?", help="Offers CSV (default: every offers snapshot in the history store)."
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT_HISTORY_METRICS, help="CSV output with metrics.")
+    parser.add_argument(
+        "--assumed-classes",
+        type=lambda value: [int(part) for part in value.split(",")],
+        default=list(ASSUMED_CLASSES),
+        help="Comma-separated classes per month assumed for unlimited memberships.",
+    )
+    args = parser.parse_args()
+
+    if args.input is None:
+        # Stored values are string categoricals; plain objects keep fillna("") working.
+        offers = history_store.read_history("offers").astype(object)
+        if offers.empty:
+            print(f"No offers snapshots in {history_store.HISTORY_DIR}")
+            return
+    elif not args.input.exists():
+        print(f"Missing input file: {args.input}")
+        return
+    else:
+        offers = pd.read_csv(args.input, low_memory=False)
+    offers = add_metrics(offers, args.assumed_classes)
+    offers.to_csv(args.output, index=False)
+    print(f"Wrote {len(offers)} offers with metrics: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+STORE_PATH = DATA_DIR / "benchmark.sqlite"
+
+COMPETITORS_CSV = DATA_DIR / "competitors_template.csv"
+OFFERS_CSV = DATA_DIR / "offers_template.csv"
+PRICING_PAGES_CSV = DATA_DIR / "pricing_pages.csv"
+
+COMPETITOR_FIELDS = [
+    "competitor_id",
+    "name",
+    "brand",
+    "website",
+    "address",
+    "postcode",
+    "city",
+    "latitude",
+    "longitude",
+    "distance_walk_min",
+    "distance_bike_min",
+    "tier",
+    "segment",
+    "proposition_notes",
+    "last_checked_date",
+]
+
+OFFER_FIELDS = [
+    "offer_id",
+    "competitor_id",
+    "offer_type",
+    "offer_name",
+    "class_type",
+    "heat",
+    "class_length_min",
+    "sessions_included",
+    "duration_days",
+    "price_eur",
+    "price_unit",
+    "currency",
+    "auto_renew",
+    "contract_months",
+    "booking_limit",
+    "intro_restrictions",
+    "usage_limit_type",
+    "usage_limit_value",
+    "usage_limit_period",
+    "contract_type",
+    "cancellation_notice_days",
+    "class_style",
+    "intensity_level",
+    "source_url",
+    "last_checked_date",
+]
+
+PRICING_PAGE_FIELDS = [
+    "competitor_id",
+    "competitor_name",
+    "page_url",
+    "price_raw",
+    "price_eur",
+    "context",
+    "last_checked_date",
+]
+
+TABLE_FIELDS = {
+    "competitors": COMPETITOR_FIELDS,
+    "offers": OFFER_FIELDS,
+    "pricing_pages": PRICING_PAGE_FIELDS,
+}
+
+# Values are stored as TEXT, exactly as they appear in the CSV templates, so an
+# import/export round trip is lossless.
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS competitors (
+    {", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in COMPETITOR_FIELDS)},
+    PRIMARY KEY (competitor_id)
+);
+CREATE TABLE IF NOT EXISTS offers (
+    {", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in OFFER_FIELDS)},
+    PRIMARY KEY (competitor_id, offer_id)
+);
+CREATE INDEX IF NOT EXISTS idx_offers_competitor ON offers (competitor_id);
+CREATE INDEX IF NOT EXISTS idx_offers_type ON offers (offer_type);
+CREATE TABLE IF NOT EXISTS pricing_pages (
+    {", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in PRICING_PAGE_FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS idx_pricing_pages_competitor ON pricing_pages (competitor_id);
+"""
+
+
+def connect(path: Path = STORE_PATH) -> sqlite3.Connection:
+    """Open the store in WAL mode so readers see a consistent snapshot during writes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Run a write transaction and bump the store revision on commit."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        _bump_revision(conn)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _bump_revision(conn: sqlite3.Connection) -> None:
+    revision = read_revision(conn) + 1
+    conn.executemany(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        [("revision", str(revision)), ("updated_at", f"{time.time():.3f}")],
+    )
+
+
+def read_revision(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+    return int(row["value"]) if row else 0
+
+
+def read_updated_at(conn: sqlite3.Connection) -> float:
+    row = conn.execute("SELECT value FROM meta WHERE key = 'updated_at'").fetchone()
+    return float(row["value"]) if row else 0.0
+
+
+def _values(row: dict[str, str], fields: list[str]) -> tuple[str, ...]:
+    return tuple(str(row.get(name) or "") for name in fields)
+
+
+def _insert_sql(table: str, fields: list[str], upsert: bool = False) -> str:
+    columns = ", ".join(fields)
+    placeholders = ", ".join("?" for _ in fields)
+    verb = "INSERT OR REPLACE" if upsert else "INSERT"
+    return f"{verb} INTO {table} ({columns}) VALUES ({placeholders})"
+
+
+def upsert_competitors(conn: sqlite3.Connection, rows: Iterable[dict[str, str]]) -> None:
+    conn.executemany(
+        _insert_sql("competitors", COMPETITOR_FIELDS, upsert=True),
+        [_values(row, COMPETITOR_FIELDS) for row in rows if row.get("competitor_id")],
+    )
+
+
+def upsert_offers(conn: sqlite3.Connection, rows: Iterable[dict[str, str]]) -> None:
+    conn.executemany(
+        _insert_sql("offers", OFFER_FIELDS, upsert=True),
+        [_values(row, OFFER_FIELDS) for row in rows],
+    )
+
+
+def replace_competitor_offers(
+    conn: sqlite3.Connection,
+    competitor_id: str,
+    rows: list[dict[str, str]],
+    offer_id_prefix: str = "auto-",
+) -> None:
+    """Replace one competitor's crawled offers.
+
+    Only offers whose id starts with offer_id_prefix are removed, so curated
+    rows and other competitors are left untouched.
+    """
+    conn.execute(
+        "DELETE FROM offers WHERE competitor_id = ? AND offer_id LIKE ? || '%'",
+        (competitor_id, offer_id_prefix),
+    )
+    upsert_offers(conn, rows)
+
+
+def replace_competitor_pricing_pages(
+    conn: sqlite3.Connection, competitor_id: str, rows: list[dict[str, str]]
+) -> None:
+    conn.execute("DELETE FROM pricing_pages WHERE competitor_id = ?", (competitor_id,))
+    conn.executemany(
+        _insert_sql("pricing_pages", PRICING_PAGE_FIELDS),
+        [_values(row, PRICING_PAGE_FIELDS) for row in rows],
+    )
+
+
+def remove_crawled_except(
+    conn: sqlite3.Connection, competitor_ids: Iterable[str], offer_id_prefix: str = "auto-"
+) -> int:
+    """Delete the crawled offers and pricing pages of every competitor not in competitor_ids.
+
+    Used after a full crawl, whose CSVs only hold the competitors it crawled.
+    Returns the number of offers removed.
+    """
+    keep = set(competitor_ids)
+    stale = [
+        row["competitor_id"]
+        for row in conn.execute(
+            "SELECT DISTINCT competitor_id FROM offers WHERE offer_id LIKE ? || '%' "
+            "UNION SELECT DISTINCT competitor_id FROM pricing_pages",
+            (offer_id_prefix,),
+        )
+        if row["competitor_id"] not in keep
+    ]
+    removed = 0
+    for competitor_id in stale:
+        cursor = conn.execute(
+            "DELETE FROM offers WHERE competitor_id = ? AND offer_id LIKE ? || '%'",
+            (competitor_id, offer_id_prefix),
+        )
+        removed += cursor.rowcount
+        conn.execute("DELETE FROM pricing_pages WHERE competitor_id = ?", (competitor_id,))
+    return removed
+
+
+def load_rows(conn: sqlite3.Connection, table: str, order_by: str = "rowid") -> list[dict[str, str]]:
+    fields = TABLE_FIELDS[table]
+    cursor = conn.execute(f"SELECT {', '.join(fields)} FROM {table} ORDER BY {order_by}")
+    return [dict(row) for row in cursor]
+
+
+def load_dataset(conn: sqlite3.Connection) -> tuple[list[dict[str, str]], list[dict[str, str]], int]:
+    """Read competitors and offers from a single snapshot.
+
+    Returns (competitors, offers, revision).
+    """
+    conn.execute("BEGIN")
+    try:
+        competitors = load_rows(conn, "competitors")
+        offers = load_rows(conn, "offers")
+        revision = read_revision(conn)
+    finally:
+        conn.execute("COMMIT")
+    return competitors, offers, revision
+
+
+def _csv_signature(path: Path) -> str:
+    try:
+        stat = path.stat()
+    except OSError:
+        return ""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def record_csv_sync(conn: sqlite3.Connection, table: str, path: Path) -> None:
+    """Mark the CSV as in step with table, e.g. after writing both from the same rows."""
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (f"csv_signature:{table}", _csv_signature(path)),
+    )
+
+
+def import_csv(conn: sqlite3.Connection, table: str, path: Path) -> int:
+    """Replace the contents of table with the rows of a CSV in the template schema."""
+    if not path.exists():
+        return 0
+    fields = TABLE_FIELDS[table]
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        rows = [_values(row, fields) for row in csv.DictReader(handle)]
+    with transaction(conn):
+        conn.execute(f"DELETE FROM {table}")
+        conn.executemany(_insert_sql(table, fields, upsert=True), rows)
+        record_csv_sync(conn, table, path)
+    return len(rows)
+
+
+def sync_csvs(conn: sqlite3.Connection, tables: Iterable[tuple[str, Path]]) -> list[str]:
+    """Re-import every CSV changed (mtime or size) since it was last synced.
+
+    Scripts that only write the CSVs (competitor discovery, manual edits) are
+    picked up this way. Returns the re-imported tables.
+    """
+    synced = []
+    for table, path in tables:
+        signature = _csv_signature(path)
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"csv_signature:{table}",)).fetchone()
+        if signature and (row is None or row["value"] != signature):
+            import_csv(conn, table, path)
+            synced.append(table)
+    return synced
+
+
+def export_csv(conn: sqlite3.Connection, table: str, path: Path) -> int:
+    """Write table to a CSV in the template schema; empty tables leave the file alone."""
+    rows = load_rows(conn, table)
+    if not rows:
+        return 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=TABLE_FIELDS[table])
+        writer.writeheader()
+        writer.writerows(rows)
+    with transaction(conn):
+        record_csv_sync(conn, table, path)
+    return len(rows)
+
+
+CSV_TABLES = [
+    ("competitors", COMPETITORS_CSV),
+    ("offers", OFFERS_CSV),
+    ("pricing_pages", PRICING_PAGES_CSV),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import/export the SQLite benchmark store.")
+    parser.add_argument("command", choices=["import", "export"], help="Direction of the CSV sync.")
+    parser.add_argument("--db", type=Path, default=STORE_PATH, help="SQLite store path.")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "export":
+        # Never overwrite CSV edits the store has not seen yet.
+        for table in sync_csvs(conn, CSV_TABLES):
+            print(f"Re-imported {table}: the CSV changed since the last sync")
+    for table, path in CSV_TABLES:
+        if args.command == "import":
+            count = import_csv(conn, table, path)
+            print(f"Imported {count} rows into {table} from {path}")
+        else:
+            count = export_csv(conn, table, path)
+            print(f"Exported {count} rows from {table} to {path}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
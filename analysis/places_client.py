@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+DEFAULT_KEY_PATHS = [
+    Path(r"C:\Users\Bram Verlaan\Documents\Projects\Python\GooglePlaces_key.txt"),
+    DATA_DIR / "GooglePlaces_key.txt",
+    DATA_DIR / "google_places_key.txt",
+]
+
+CACHE_PATH = DATA_DIR / "places_cache.sqlite"
+# Website lookups from before the SQLite cache; imported once.
+LEGACY_CACHE_PATH = DATA_DIR / "places_cache.json"
+
+API_URL = "https://maps.googleapis.com/maps/api/place"
+USER_AGENT = "YogaBenchmarkBot/1.0 (contact: local)"
+
+DETAILS_FIELDS = "name,formatted_address,website,url,formatted_phone_number"
+
+# Estimated USD per request, from the Places API list prices (Text/Nearby
+# Search, Place Details with contact data). Only used for the run budget.
+REQUEST_COST = {"textsearch": 0.032, "nearbysearch": 0.032, "details": 0.020}
+
+# Text and nearby searches return at most this many results over three pages.
+MAX_SEARCH_RESULTS = 60
+
+# Answers that mean "nothing there"; cached for negative_ttl_days.
+NEGATIVE_STATUSES = {"ZERO_RESULTS", "NOT_FOUND"}
+
+# A next_page_token takes a moment to become valid; poll with these delays.
+PAGE_TOKEN_DELAYS = [0.5, 1.0, 1.5, 2.0, 3.0]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    negative INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class PlacesError(RuntimeError):
+    pass
+
+
+class PlacesBudgetExceeded(PlacesError):
+    pass
+
+
+class SearchResults(list):
+    """Search results; complete is False when the budget ran out before the last page."""
+
+    complete = True
+
+
+def _read_key_from_path(path: Path) -> str:
+    raw = path.read_text(encoding="utf-8").strip()
+    if not raw:
+        raise RuntimeError(f"Empty API key file: {path}")
+    return raw
+
+
+def read_key() -> str:
+    env_key = os.getenv("GOOGLE_PLACES_KEY")
+    if env_key:
+        return env_key.strip()
+    env_path = os.getenv("GOOGLE_PLACES_KEY_PATH")
+    if env_path:
+        path = Path(env_path)
+        if path.exists():
+            return _read_key_from_path(path)
+    for path in DEFAULT_KEY_PATHS:
+        if path.exists():
+            return _read_key_from_path(path)
+    raise RuntimeError(
+        "Google Places API key not found. Set GOOGLE_PLACES_KEY or GOOGLE_PLACES_KEY_PATH."
+    )
+
+
+def _fetch_json(url: str, timeout: float = 30) -> dict[str, Any]:
+    request = Request(url, headers={"User-Agent": USER_AGENT})
+    with urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class PlacesClient:
+    """Google Places text search and details with a persistent cache and a budget.
+
+    Responses are cached in SQLite per request with their fetch time, so each
+    entry expires on its own after ttl_days and a run only writes the entries
+    it fetched. "No result" answers are cached for negative_ttl_days. Once
+    max_requests or max_cost (USD) is spent, further uncached requests raise
+    PlacesBudgetExceeded. map() runs lookups concurrently.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cache_path: Path = CACHE_PATH,
+        ttl_days: float = 30,
+        negative_ttl_days: float = 7,
+        max_requests: int | None = None,
+        max_cost: float | None = None,
+        max_concurrency: int = 4,
+        fetch_json: Callable[[str], dict[str, Any]] = _fetch_json,
+    ) -> None:
+        self._api_key = api_key
+        self._ttl = ttl_days * 86400
+        self._negative_ttl = negative_ttl_days * 86400
+        self._max_requests = max_requests
+        self._max_cost = max_cost
+        self._max_concurrency = max_concurrency
+        self._fetch_json = fetch_json
+        self._lock = threading.Lock()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not cache_path.exists()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        if is_new and cache_path == CACHE_PATH:
+            self._import_legacy_cache(LEGACY_CACHE_PATH)
+        self.stats = {"requests": 0, "cached": 0, "negative": 0, "cost": 0.0}
+
+    def __enter__(self) -> "PlacesClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def summary(self) -> str:
+        stats = self.stats
+        return (
+            f"Places: {stats['requests']} requests (~${stats['cost']:.2f}), "
+            f"{stats['cached']} cached, {stats['negative']} cached as no result"
+        )
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Apply func to items concurrently; results keep the input order."""
+        items = list(items)
+        if self._max_concurrency <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self._max_concurrency) as executor:
+            return list(executor.map(func, items))
+
+    def _cached(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, fetched_at, negative FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        response, fetched_at, negative = row
+        ttl = self._negative_ttl if negative else self._ttl
+        if time.time() - fetched_at > ttl:
+            return None
+        with self._lock:
+            self.stats["negative" if negative else "cached"] += 1
+        return json.loads(response)
+
+    def _store(self, key: str, data: dict[str, Any]) -> None:
+        negative = data.get("status") in NEGATIVE_STATUSES
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, fetched_at, negative) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data), time.time(), int(negative)),
+            )
+
+    def _spend(self, endpoint: str) -> None:
+        cost = REQUEST_COST.get(endpoint, 0.0)
+        with self._lock:
+            if self._max_requests is not None and self.stats["requests"] >= self._max_requests:
+                raise PlacesBudgetExceeded(f"Places request budget of {self._max_requests} spent")
+            if self._max_cost is not None and self.stats["cost"] + cost > self._max_cost:
+                raise PlacesBudgetExceeded(f"Places cost budget of ${self._max_cost:.2f} spent")
+            self.stats["requests"] += 1
+            self.stats["cost"] += cost
+
+    def _request(self, endpoint: str, params: dict[str, str]) -> dict[str, Any]:
+        self._spend(endpoint)
+        url = f"{API_URL}/{endpoint}/json?" + urlencode({**params, "key": self._api_key})
+        data = self._fetch_json(url)
+        status = data.get("status", "OK")
+        if status not in {"OK", *NEGATIVE_STATUSES}:
+            raise PlacesError(f"Places {endpoint} failed: {status} {data.get('error_message', '')}".strip())
+        return data
+
+    def _cached_request(self, endpoint: str, params: dict[str, str]) -> dict[str, Any]:
+        key = f"{endpoint}|{urlencode(sorted(params.items()))}"
+        data = self._cached(key)
+        if data is None:
+            data = self._request(endpoint, params)
+            self._store(key, data)
+        return data
+
+    def _next_page(self, endpoint: str, token: str) -> dict[str, Any]:
+        # Tokens are single-use and short-lived, so pages after the first are
+        # never cached on their own (the whole result list is).
+        for delay in PAGE_TOKEN_DELAYS:
+            time.sleep(delay)
+            self._spend(endpoint)
+            url = f"{API_URL}/{endpoint}/json?" + urlencode({"pagetoken": token, "key": self._api_key})
+            data = self._fetch_json(url)
+            status = data.get("status", "OK")
+            if status == "INVALID_REQUEST":
+                # The token is not valid yet.
+                continue
+            if status not in {"OK", *NEGATIVE_STATUSES}:
+                raise PlacesError(f"Places {endpoint} page failed: {status} {data.get('error_message', '')}".strip())
+            return data
+        raise PlacesError(f"Places {endpoint} page token did not become valid after {len(PAGE_TOKEN_DELAYS)} tries")
+
+    def _search(self, endpoint: str, params: dict[str, str], all_pages: bool) -> SearchResults:
+        """Results of a search, cached only once every page has been read.
+
+        When the budget runs out part-way, the pages already paid for are
+        returned uncached with complete set to False.
+        """
+        key_params = {**params, **({"pages": "all"} if all_pages else {})}
+        key = f"{endpoint}|{urlencode(sorted(key_params.items()))}"
+        cached = self._cached(key)
+        if cached is not None:
+            return SearchResults(cached.get("results", []))
+        data = self._request(endpoint, params)
+        results = SearchResults(data.get("results", []))
+        token = data.get("next_page_token") if all_pages else None
+        try:
+            while token:
+                page = self._next_page(endpoint, token)
+                results.extend(page.get("results", []))
+                token = page.get("next_page_token")
+        except PlacesBudgetExceeded:
+            results.complete = False
+            return results
+        self._store(key, {"status": data.get("status", "OK"), "results": results})
+        return results
+
+    def text_search(self, query: str, all_pages: bool = True) -> SearchResults:
+        """Results for a text search; with all_pages, every page (up to 60 results)."""
+        return self._search("textsearch", {"query": query}, all_pages)
+
+    def nearby_search(
+        self, lat: float, lng: float, radius_m: float, keyword: str, all_pages: bool = True
+    ) -> SearchResults:
+        """Places matching keyword within radius_m of a point (up to 60 results)."""
+        params = {"location": f"{lat:.6f},{lng:.6f}", "radius": str(round(radius_m)), "keyword": keyword}
+        return self._search("nearbysearch", params, all_pages)
+
+    def details(self, place_id: str, fields: str = DETAILS_FIELDS) -> dict[str, Any]:
+        data = self._cached_request("details", {"place_id": place_id, "fields": fields})
+        return data.get("result", {})
+
+    def find_website(self, name: str, address: str, city: str) -> dict[str, str]:
+        """place_id, website and formatted_address for a studio, or {} when not found."""
+        results = self.text_search(f"{name} {address} {city}", all_pages=False)
+        if not results or not results[0].get("place_id"):
+            return {}
+        place_id = results[0]["place_id"]
+        details = self.details(place_id)
+        return {
+            "place_id": place_id,
+            "website": details.get("website", ""),
+            "formatted_address": details.get("formatted_address", ""),
+        }
+
+    def _import_legacy_cache(self, path: Path) -> None:
+        """Seed the cache from the old name|address|city -> website JSON.
+
+        The old file had no timestamps, so its entries count as fetched now.
+        """
+        if not path.exists():
+            return
+        try:
+            legacy = json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return
+        for cache_key, entry in legacy.items():
+            place_id = entry.get("place_id")
+            if not place_id:
+                continue
+            query = cache_key.replace("|", " ")
+            search_key = f"textsearch|{urlencode([('query', query)])}"
+            self._store(search_key, {"status": "OK", "results": [{"place_id": place_id}]})
+            details_key = f"details|{urlencode(sorted({'place_id': place_id, 'fields': DETAILS_FIELDS}.items()))}"
+            result = {"website": entry.get("website", ""), "formatted_address": entry.get("formatted_address", "")}
+            self._store(details_key, {"status": "OK", "result": result})
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Mapping
+
+DROP_IN_TYPES = ["drop_in", "drop-in", "single"]
+PACK_TYPES = ["pack", "bundle"]
+MEMBERSHIP_TYPES = ["membership", "subscription"]
+
+# Price per class rules, shared with the column-wise offer_metrics: drop-ins
+# cost their price, these types their price per included session when the
+# count is known, and these the price over the assumed classes otherwise.
+PER_SESSION_TYPES = PACK_TYPES + MEMBERSHIP_TYPES
+PER_ASSUMED_CLASS_TYPES = MEMBERSHIP_TYPES
+
+ASSUMED_CLASSES = 8
+
+# Days covered by a recurring price_unit (same as offer_extraction's durations).
+UNIT_DAYS = {
+    "week": 7,
+    "4_weeks": 28,
+    "month": 30,
+    "6_months": 180,
+    "year": 365,
+}
+
+# Numeric columns added to every offer by normalize_offers().
+METRIC_FIELDS = [
+    "price_per_class",
+    "monthly_equivalent",
+    "price_per_4_weeks",
+    "price_per_6_months",
+    "price_per_year",
+    "visits_per_week",
+    "visits_per_month",
+    "discount_vs_drop_in",
+]
+
+
+def to_number(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def offer_type(offer: Mapping[str, Any]) -> str:
+    return str(offer.get("offer_type") or "").strip().lower()
+
+
+def price_per_class(offer: Mapping[str, Any], assumed_classes: int = ASSUMED_CLASSES) -> float | None:
+    """Drop-ins as is, packs per session, memberships per session or per
+    assumed_classes when the sessions are unknown/unlimited."""
+    price = to_number(offer.get("price_eur"))
+    if price is None:
+        return None
+    kind = offer_type(offer)
+    sessions = to_number(offer.get("sessions_included"))
+    if kind in DROP_IN_TYPES:
+        return price
+    if kind in PER_SESSION_TYPES and sessions is not None and sessions > 0:
+        return price / sessions
+    if kind in PER_ASSUMED_CLASS_TYPES:
+        return price / float(assumed_classes)
+    return None
+
+
+def monthly_equivalent(offer: Mapping[str, Any]) -> float | None:
+    """Price scaled to 30 days of duration_days."""
+    price = to_number(offer.get("price_eur"))
+    duration_days = to_number(offer.get("duration_days"))
+    if price is None or not duration_days:
+        return None
+    return price / duration_days * 30.0
+
+
+def period_days(offer: Mapping[str, Any]) -> float | None:
+    """Days a recurring price pays for: its price_unit, else a membership's duration."""
+    unit = str(offer.get("price_unit") or "").strip().lower()
+    if unit in UNIT_DAYS:
+        return float(UNIT_DAYS[unit])
+    duration_days = to_number(offer.get("duration_days"))
+    if offer_type(offer) in MEMBERSHIP_TYPES and duration_days and duration_days > 0:
+        return duration_days
+    return None
+
+
+def derive_metrics(
+    offer: Mapping[str, Any],
+    drop_in_price: float | None = None,
+    assumed_classes: int = ASSUMED_CLASSES,
+) -> dict[str, float | None]:
+    """All METRIC_FIELDS for one offer; drop_in_price is the studio's own drop-in."""
+    price = to_number(offer.get("price_eur"))
+    per_class = price_per_class(offer, assumed_classes)
+    period = period_days(offer)
+    sessions = to_number(offer.get("sessions_included"))
+    duration_days = to_number(offer.get("duration_days"))
+    counts_visits = (
+        offer_type(offer) in PACK_TYPES + MEMBERSHIP_TYPES
+        and sessions is not None
+        and sessions > 0
+        and duration_days is not None
+        and duration_days > 0
+    )
+
+    def per_period(days: int) -> float | None:
+        if price is None or period is None:
+            return None
+        return price / period * days
+
+    return {
+        "price_per_class": per_class,
+        "monthly_equivalent": monthly_equivalent(offer),
+        "price_per_4_weeks": per_period(UNIT_DAYS["4_weeks"]),
+        "price_per_6_months": per_period(UNIT_DAYS["6_months"]),
+        "price_per_year": per_period(UNIT_DAYS["year"]),
+        "visits_per_week": sessions / (duration_days / 7) if counts_visits else None,
+        "visits_per_month": sessions / (duration_days / 30) if counts_visits else None,
+        "discount_vs_drop_in": (
+            1 - per_class / drop_in_price if per_class is not None and drop_in_price else None
+        ),
+    }
+
+
+def drop_in_prices(offers: Iterable[Mapping[str, Any]]) -> dict[str, float]:
+    """Cheapest positive drop-in price per competitor_id."""
+    prices: dict[str, float] = {}
+    for offer in offers:
+        if offer_type(offer) not in DROP_IN_TYPES:
+            continue
+        price = to_number(offer.get("price_eur"))
+        competitor_id = offer.get("competitor_id") or ""
+        if price and price > 0 and (competitor_id not in prices or price < prices[competitor_id]):
+            prices[competitor_id] = price
+    return prices
+
+
+def normalize_offers(
+    offers: list[dict[str, Any]], assumed_classes: int = ASSUMED_CLASSES
+) -> list[dict[str, Any]]:
+    """Copies of offers with the numeric METRIC_FIELDS added."""
+    drop_ins = drop_in_prices(offers)
+    return [
+        {
+            **offer,
+            **derive_metrics(offer, drop_ins.get(offer.get("competitor_id") or ""), assumed_classes),
+        }
+        for offer in offers
+    ]
@@ -1,31 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
 import json
 import re
-import html
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 import os
-from typing import Any
-from urllib.parse import urlparse, urlencode, urljoin
+from itertools import chain
+from typing import Any, Callable, Iterable, Iterator
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse, urljoin
 from urllib.request import Request, urlopen
 
+import offer_store
+from offer_extraction import infer_offer_fields
+from booking_connectors import fetch_prices, find_connector
+from html_text import TextBlock, html_to_text, iter_text_blocks
+from http_cache import CACHE_DIR, HttpCache, body_hash
+from places_client import PlacesBudgetExceeded, PlacesClient, read_key
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
-DEFAULT_KEY_PATHS = [
-    Path(r"C:\Users\Bram Verlaan\Documents\Projects\Python\GooglePlaces_key.txt"),
-    Path(__file__).resolve().parents[1] / "data" / "GooglePlaces_key.txt",
-    Path(__file__).resolve().parents[1] / "data" / "google_places_key.txt",
-]
 COMPETITORS_PATH = DATA_DIR / "competitors_template.csv"
 PINS_PATH = DATA_DIR / "pinned_competitors.json"
 
-PLACES_CACHE_PATH = DATA_DIR / "places_cache.json"
 PRICING_PAGES_PATH = DATA_DIR / "pricing_pages.csv"
 OFFERS_AUTO_PATH = DATA_DIR / "offers_auto.csv"
 OFFERS_TEMPLATE_PATH = DATA_DIR / "offers_template.csv"
@@ -66,62 +72,6 @@ EXTERNAL_LINK_HINTS = [
     "store",
 ]
 
-CLASS_TYPE_MAP = [
-    ("private", "private"),
-    ("hot pilates", "hot_pilates"),
-    ("hot yoga", "hot_yoga"),
-    ("vinyasa", "vinyasa"),
-    ("ashtanga", "ashtanga"),
-    ("yin", "yin"),
-    ("kundalini", "kundalini"),
-    ("pilates", "pilates"),
-    ("barre", "barre"),
-    ("power yoga", "power_yoga"),
-    ("hatha", "hatha"),
-    ("yoga", "yoga"),
-]
-
-OFFER_TYPE_HINTS = [
-    ("drop-in", "drop_in"),
-    ("drop in", "drop_in"),
-    ("single", "drop_in"),
-    ("intro", "intro"),
-    ("trial", "intro"),
-    ("proef", "intro"),
-]
-
-PACK_HINTS = [
-    "class card",
-    "classcard",
-    "strippenkaart",
-    "rittenkaart",
-    "lessenkaart",
-    "lessen kaart",
-    "pack",
-    "pass",
-    "kaart",
-    "credits",
-    "credit",
-    "unit",
-    "units",
-]
-
-MEMBERSHIP_HINTS = [
-    "membership",
-    "abonnement",
-    "unlimited",
-    "onbeperkt",
-    "monthly",
-    "per month",
-    "maand",
-    "weekly",
-    "per week",
-    "week",
-    "yearly",
-    "per year",
-    "jaar",
-]
-
 IGNORE_TERMS = [
     "towel",
     "mat",
@@ -140,81 +90,378 @@ IGNORE_TERMS = [
 ]
 
 
-def _read_key_from_path(path: Path) -> str:
-    raw = path.read_text(encoding="utf-8").strip()
-    if not raw:
-        raise RuntimeError(f"Empty API key file: {path}")
-    return raw
+def _fetch_text(url: str, timeout: float = 25) -> str:
+    request = Request(url, headers={"User-Agent": USER_AGENT})
+    with urlopen(request, timeout=timeout) as response:
+        charset = response.headers.get_content_charset() or "utf-8"
+        return response.read().decode(charset, errors="replace")
 
 
-def _read_key() -> str:
-    env_key = os.getenv("GOOGLE_PLACES_KEY")
-    if env_key:
-        return env_key.strip()
-    env_path = os.getenv("GOOGLE_PLACES_KEY_PATH")
-    if env_path:
-        path = Path(env_path)
-        if path.exists():
-            return _read_key_from_path(path)
-    for path in DEFAULT_KEY_PATHS:
-        if path.exists():
-            return _read_key_from_path(path)
-    raise RuntimeError(
-        "Google Places API key not found. Set GOOGLE_PLACES_KEY or GOOGLE_PLACES_KEY_PATH."
-    )
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
 
 
-def _fetch_json(url: str) -> dict[str, Any]:
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(request, timeout=25) as response:
-        return json.loads(response.read().decode("utf-8"))
+class PoliteFetcher:
+    """Thread-safe wrapper around a fetch function.
 
+    Caps the number of requests in flight overall and per domain, spaces out
+    request starts to the same domain and retries transient failures with
+    exponential backoff.
+    """
 
-def _fetch_text(url: str) -> str:
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(request, timeout=25) as response:
-        charset = response.headers.get_content_charset() or "utf-8"
-        return response.read().decode(charset, errors="replace")
+    def __init__(
+        self,
+        fetch: Callable[[str, float], str],
+        max_concurrency: int = 8,
+        per_domain: int = 2,
+        min_interval: float = 0.3,
+        timeout: float = 25,
+        retries: int = 2,
+        backoff: float = 1.0,
+    ) -> None:
+        self._fetch = fetch
+        self._global = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._per_domain = max(1, per_domain)
+        self._min_interval = min_interval
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._lock = threading.Lock()
+        self._domain_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    def _domain_slot(self, domain: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._domain_slots.get(domain)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._per_domain)
+                self._domain_slots[domain] = slot
+            return slot
+
+    def _wait_turn(self, domain: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(domain, now))
+            self._next_start[domain] = start + self._min_interval
+        if start > now:
+            time.sleep(start - now)
 
+    def fetch_text(self, url: str) -> str:
+        domain = _normalize_domain(url)
+        with self._global, self._domain_slot(domain):
+            for attempt in range(self._retries + 1):
+                self._wait_turn(domain)
+                try:
+                    return self._fetch(url, self._timeout)
+                except HTTPError as exc:
+                    if exc.code not in RETRYABLE_STATUS or attempt == self._retries:
+                        raise
+                except (URLError, TimeoutError, ConnectionError):
+                    if attempt == self._retries:
+                        raise
+                time.sleep(self._backoff * (2**attempt))
+        raise RuntimeError(f"Unreachable retry loop for {url}")
+
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "texttrack", "manifest"}
+
+TRACKER_DOMAINS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "analytics.tiktok.com",
+    "snap.licdn.com",
+    "bat.bing.com",
+    "cookiebot.com",
+    "onetrust.com",
+    "youtube.com",
+    "vimeo.com",
+]
 
-class PlaywrightSession:
-    def __init__(self, user_agent: str) -> None:
+# Resolves as soon as a euro amount is visible in the rendered text.
+PRICE_READY_JS = (
+    "() => /(?:\u20ac|EUR)\\s?\\d|\\d\\s?(?:\u20ac|EUR)/i"
+    ".test(document.body ? document.body.innerText : '')"
+)
+
+
+def _is_tracker(url: str) -> bool:
+    host = _normalize_domain(url).split(":")[0]
+    return any(host == domain or host.endswith("." + domain) for domain in TRACKER_DOMAINS)
+
+
+class PlaywrightPool:
+    """Render pages with a pool of Chromium contexts sharing one browser.
+
+    Playwright runs on a private event loop thread; fetch_text can be called
+    from any crawl worker and at most pool_size pages render at once. Images,
+    fonts, media and known trackers are aborted, and a page counts as ready
+    once a euro price is visible or the network has gone quiet, whichever
+    comes first. Render times are kept in render_times. With lazy=True
+    Chromium is only launched by the first fetch_text call.
+
+    Each slot is a (context, page) pair; a slot whose page was closed goes
+    back with page None and gets a new page (or context) when next used, so
+    the pool never shrinks. Waiting longer than acquire_timeout for a free
+    slot raises instead of blocking the crawl.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        pool_size: int = 4,
+        ready_timeout: float = 8,
+        lazy: bool = False,
+        acquire_timeout: float = 180,
+    ) -> None:
         self._user_agent = user_agent
+        self._pool_size = max(1, pool_size)
+        self._ready_timeout = ready_timeout
+        self._acquire_timeout = acquire_timeout
+        self._lazy = lazy
+        self._start_lock = threading.Lock()
+        self._async_playwright = None
+        self.render_times: list[tuple[str, float, str]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
         self._playwright = None
         self._browser = None
-        self._context = None
-        self._page = None
+        self._contexts: list[Any] = []
+        self._idle: asyncio.Queue | None = None
 
-    def __enter__(self) -> "PlaywrightSession":
+    def __enter__(self) -> "PlaywrightPool":
         try:
-            from playwright.sync_api import sync_playwright  # type: ignore
+            from playwright.async_api import async_playwright  # type: ignore
         except Exception as exc:  # pragma: no cover - import guard
             raise RuntimeError(
                 "Playwright is not installed. Run: pip install playwright"
             ) from exc
-        self._playwright = sync_playwright().start()
-        self._browser = self._playwright.chromium.launch(headless=True)
-        self._context = self._browser.new_context(user_agent=self._user_agent)
-        self._page = self._context.new_page()
+        self._async_playwright = async_playwright
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="playwright-pool", daemon=True)
+        self._thread.start()
+        if not self._lazy:
+            try:
+                self._ensure_started()
+            except BaseException:
+                self.__exit__(None, None, None)
+                raise
         return self
 
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._idle is None:
+                self._run(self._start(self._async_playwright))
+
     def __exit__(self, exc_type, exc, tb) -> None:
-        if self._context:
-            self._context.close()
+        if not self._loop:
+            return
+        try:
+            self._run(self._stop())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread:
+                self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def _run(self, coro) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _start(self, async_playwright) -> None:
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._idle = asyncio.Queue()
+        for _ in range(self._pool_size):
+            context = await self._new_context()
+            try:
+                page = await context.new_page()
+            except Exception:
+                page = None
+            self._idle.put_nowait((context, page))
+
+    async def _new_context(self):
+        context = await self._browser.new_context(user_agent=self._user_agent)
+        await context.route("**/*", self._route)
+        self._contexts.append(context)
+        return context
+
+    async def _open_page(self, context):
+        """(context, page) for a slot; a context that cannot open pages is replaced."""
+        try:
+            return context, await context.new_page()
+        except Exception:
+            if context in self._contexts:
+                self._contexts.remove(context)
+            try:
+                await context.close()
+            except Exception:
+                pass
+            context = await self._new_context()
+            return context, await context.new_page()
+
+    async def _stop(self) -> None:
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
         if self._browser:
-            self._browser.close()
+            await self._browser.close()
         if self._playwright:
-            self._playwright.stop()
+            await self._playwright.stop()
+
+    @staticmethod
+    async def _route(route) -> None:
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or _is_tracker(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _wait_ready(self, page) -> str:
+        ready_ms = self._ready_timeout * 1000
+        waiters = {
+            asyncio.ensure_future(page.wait_for_function(PRICE_READY_JS, timeout=ready_ms)): "price",
+            asyncio.ensure_future(page.wait_for_load_state("networkidle", timeout=ready_ms)): "idle",
+        }
+        pending = set(waiters)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return waiters[task]
+            return "timeout"
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _render(self, url: str, timeout: float) -> str:
+        try:
+            context, page = await asyncio.wait_for(self._idle.get(), timeout=self._acquire_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"No Playwright page free after {self._acquire_timeout:g}s") from None
+        if page is None or page.is_closed():
+            try:
+                context, page = await self._open_page(context)
+            except BaseException:
+                self._idle.put_nowait((context, None))
+                raise
+        started = time.monotonic()
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+            reason = await self._wait_ready(page)
+            content = await page.content()
+            self.render_times.append((url, time.monotonic() - started, reason))
+            return content
+        finally:
+            # A closed page is replaced lazily by the next render.
+            self._idle.put_nowait((context, None if page.is_closed() else page))
+
+    def fetch_text(self, url: str, timeout: float = 30) -> str:
+        if not self._loop:
+            raise RuntimeError("Playwright pool not started.")
+        self._ensure_started()
+        return self._run(self._render(url, timeout))
+
+
+FETCH_STRATEGY_PATH = DATA_DIR / "fetch_strategy.json"
+
+# Booking platforms whose widgets only render client-side.
+WIDGET_MARKERS = [hint for hint in EXTERNAL_LINK_HINTS if hint not in {"shop", "store"}]
+
+MIN_STATIC_TEXT_CHARS = 200
+
+
+def _looks_js_rendered(html_text: str, text: str) -> bool:
+    if len(text.strip()) < MIN_STATIC_TEXT_CHARS:
+        return True
+    lower = html_text.lower()
+    return any(marker in lower for marker in WIDGET_MARKERS)
+
+
+class HybridFetcher:
+    """Fetch with plain HTTP first and escalate to the renderer only when needed.
+
+    A page is rendered when the static HTML yields no prices and looks
+    JS-rendered (almost no text, or a booking widget marker). Domains whose
+    prices only appear rendered are remembered in FETCH_STRATEGY_PATH so later
+    fetches go straight to the renderer. "static" is recorded when the static
+    HTML had prices, but it is informational only: every page is still probed,
+    because one domain can mix plain pages with JS-widget pricing pages.
+    """
+
+    def __init__(
+        self,
+        static_fetch: Callable[[str], str],
+        render_fetch: Callable[[str], str],
+        path: Path = FETCH_STRATEGY_PATH,
+    ) -> None:
+        self._static_fetch = static_fetch
+        self._render_fetch = render_fetch
+        self._path = path
+        self._lock = threading.Lock()
+        self.strategy: dict[str, dict[str, str]] = self._load()
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        if not self._path.exists():
+            return {}
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self.strategy, indent=2, sort_keys=True)
+        self._path.write_text(payload, encoding="utf-8")
+
+    def _remember(self, domain: str, mode: str) -> None:
+        with self._lock:
+            self.strategy[domain] = {
+                "mode": mode,
+                "checked": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            }
 
     def fetch_text(self, url: str) -> str:
-        if not self._page:
-            raise RuntimeError("Playwright page not initialized.")
+        domain = _normalize_domain(url)
+        with self._lock:
+            known = self.strategy.get(domain, {}).get("mode")
+        if known == "render":
+            return self._render_fetch(url)
+
+        html_text = self._static_fetch(url)
+        text = html_to_text(html_text)
+        if _extract_prices(text):
+            self._remember(domain, "static")
+            return html_text
+        if not _looks_js_rendered(html_text, text):
+            return html_text
+
         try:
-            self._page.goto(url, wait_until="networkidle", timeout=30000)
+            rendered = self._render_fetch(url)
         except Exception:
-            self._page.goto(url, wait_until="domcontentloaded", timeout=30000)
-        self._page.wait_for_timeout(1200)
-        return self._page.content()
+            return html_text
+        if not _extract_prices(html_to_text(rendered)):
+            return html_text
+        self._remember(domain, "render")
+        return rendered
+
+
+def _print_render_times(render_times: list[tuple[str, float, str]]) -> None:
+    for url, seconds, reason in render_times:
+        print(f"Rendered {url} in {seconds:.2f}s (ready: {reason})")
+    if render_times:
+        durations = sorted(seconds for _, seconds, _ in render_times)
+        median = durations[len(durations) // 2]
+        print(
+            f"Rendered {len(durations)} pages: median {median:.2f}s, "
+            f"max {durations[-1]:.2f}s, total {sum(durations):.2f}s"
+        )
 
 
 def _load_competitors() -> list[dict[str, str]]:
@@ -239,32 +486,6 @@ def _load_pins() -> set[str]:
     return set(str(item) for item in ids)
 
 
-def _load_places_cache() -> dict[str, Any]:
-    if not PLACES_CACHE_PATH.exists():
-        return {}
-    try:
-        return json.loads(PLACES_CACHE_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return {}
-
-
-def _save_places_cache(cache: dict[str, Any]) -> None:
-    PLACES_CACHE_PATH.write_text(json.dumps(cache, indent=2), encoding="utf-8")
-
-
-def _places_text_search(api_key: str, query: str) -> dict[str, Any]:
-    params = {"query": query, "key": api_key}
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json?" + urlencode(params)
-    return _fetch_json(url)
-
-
-def _places_details(api_key: str, place_id: str) -> dict[str, Any]:
-    fields = "name,formatted_address,website,url,formatted_phone_number"
-    params = {"place_id": place_id, "fields": fields, "key": api_key}
-    url = "https://maps.googleapis.com/maps/api/place/details/json?" + urlencode(params)
-    return _fetch_json(url).get("result", {})
-
-
 def _normalize_domain(url: str) -> str:
     parsed = urlparse(url)
     return parsed.netloc.lower()
@@ -284,7 +505,8 @@ def _collect_links(html: str, base_url: str) -> list[str]:
         if is_external and not (has_pricing_hint or has_external_hint):
             continue
         if has_pricing_hint or has_external_hint:
-            normalized.append(absolute.split("?")[0])
+            # Booking platforms identify the studio in the query string.
+            normalized.append(absolute if find_connector(absolute) else absolute.split("?")[0])
     # de-dup
     deduped = []
     for link in normalized:
@@ -293,28 +515,135 @@ def _collect_links(html: str, base_url: str) -> list[str]:
     return deduped[:6]
 
 
+# Euro amounts with the currency before or after the number.
+_CURRENCY = rf"(?:EUR|{re.escape(EURO_SIGN)}|&euro;|&#8364;|&#x20ac;)"
+_NUMBER = r"\d+[.,]?\d*(?:,-)?"
+PRICE_RE = re.compile(
+    rf"(?:{_CURRENCY}\s?{_NUMBER}|{_NUMBER}\s?{_CURRENCY})", flags=re.IGNORECASE
+)
+PRICE_CONTEXT_CHARS = 60
+# Text kept back when no price was found, in case one straddles two blocks.
+PRICE_TAIL_CHARS = 64
+NOISE_TERMS = ["facebook", "instagram", "cookie", "privacy", "terms", "newsletter"]
+
+
+def _price_hit(text: str, match: re.Match[str]) -> tuple[str, str] | None:
+    context_start = max(0, match.start() - PRICE_CONTEXT_CHARS)
+    context_end = min(len(text), match.end() + PRICE_CONTEXT_CHARS)
+    context = text[context_start:context_end]
+    context = re.sub(r"\s+", " ", context).strip()
+    if not _is_offer_context(context):
+        return None
+    return match.group(0), context
+
+
+def _is_offer_context(context: str) -> bool:
+    lower = context.lower()
+    if "{" in context or "}" in context:
+        return False
+    if any(term in lower for term in NOISE_TERMS):
+        return False
+    return not any(term in lower for term in IGNORE_TERMS)
+
+
+def _iter_prices(blocks: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Yield (raw_price, context) pairs from a stream of text blocks.
+
+    Blocks are joined with single spaces, as in html_to_text(), but only a
+    rolling window of text is held: a price is emitted once the text after it
+    is long enough to fill its context.
+    """
+    buffer = ""
+    pos = 0
+    for block in chain(blocks, [None]):
+        final = block is None
+        if not final:
+            buffer = f"{buffer} {block}" if buffer else block
+        while True:
+            match = PRICE_RE.search(buffer, pos)
+            if match is None:
+                if not final:
+                    pos = max(pos, len(buffer) - PRICE_TAIL_CHARS)
+                break
+            if not final and match.end() + PRICE_CONTEXT_CHARS > len(buffer):
+                pos = match.start()
+                break
+            pos = match.end()
+            hit = _price_hit(buffer, match)
+            if hit:
+                yield hit
+        cut = max(0, pos - PRICE_CONTEXT_CHARS)
+        buffer = buffer[cut:]
+        pos -= cut
+
+
 def _extract_prices(text: str) -> list[tuple[str, str]]:
+    return list(_iter_prices([text]))
+
+
+# Card text beyond this is clipped around the price, so feature lists do not
+# swamp the offer context.
+CARD_CONTEXT_CHARS = 300
+
+
+def _card_context(text: str, raw_price: str) -> str:
+    if len(text) <= CARD_CONTEXT_CHARS:
+        return text
+    idx = text.find(raw_price)
+    if idx + len(raw_price) <= CARD_CONTEXT_CHARS:
+        return text[:CARD_CONTEXT_CHARS]
+    half = CARD_CONTEXT_CHARS // 2
+    start = max(0, idx - half)
+    return text[start : start + CARD_CONTEXT_CHARS]
+
+
+def _page_prices(blocks: list[TextBlock]) -> list[tuple[str, str]]:
+    """(raw_price, context) hits for a page, one per pricing card where possible.
+
+    A table row, list item or card whose text holds a single price (repeats of
+    the same amount count once) becomes one hit with the whole unit as its
+    context, plus the section heading when the unit has none. The outermost
+    such container wins, so a card keeps its feature list. Prices outside
+    any unit fall back to the text window around them.
+    """
+    block_prices = [PRICE_RE.findall(block.text) for block in blocks]
+    members: dict[int, list[int]] = {}
+    amounts: dict[int, set[str]] = {}
+    for index, block in enumerate(blocks):
+        for container, _ in block.containers:
+            members.setdefault(container, []).append(index)
+            amounts.setdefault(container, set()).update(_parse_price(raw) for raw in block_prices[index])
+
     hits: list[tuple[str, str]] = []
-    # capture euro patterns (prefix or suffix)
-    currency = rf"(?:EUR|{re.escape(EURO_SIGN)}|&euro;|&#8364;|&#x20ac;)"
-    number = r"\d+[.,]?\d*(?:,-)?"
-    prefix = rf"{currency}\s?{number}"
-    suffix = rf"{number}\s?{currency}"
-    pattern = rf"(?:{prefix}|{suffix})"
-    for match in re.finditer(pattern, text, flags=re.IGNORECASE):
-        raw = match.group(0)
-        context_start = max(0, match.start() - 60)
-        context_end = min(len(text), match.end() + 60)
-        context = text[context_start:context_end]
-        context = re.sub(r"\s+", " ", context).strip()
-        lower = context.lower()
-        if "{" in context or "}" in context:
-            continue
-        if any(term in lower for term in ["facebook", "instagram", "cookie", "privacy", "terms", "newsletter"]):
+    loose: list[str] = []
+    index = 0
+    while index < len(blocks):
+        block = blocks[index]
+        unit = None
+        if block_prices[index]:
+            unit = next(
+                (container for container, _ in block.containers if len(amounts[container]) == 1),
+                None,
+            )
+        if unit is None:
+            loose.append(block.text)
+            index += 1
             continue
-        if any(term in lower for term in IGNORE_TERMS):
-            continue
-        hits.append((raw, context))
+        # The unit's leading blocks (its title, say) were queued as loose text.
+        del loose[len(loose) - (index - members[unit][0]) :]
+        hits.extend(_iter_prices(loose))
+        loose = []
+        unit_blocks = [blocks[member] for member in members[unit]]
+        text = " ".join(unit_block.text for unit_block in unit_blocks)
+        heading = unit_blocks[0].heading
+        if heading and heading not in text:
+            text = f"{heading} {text}"
+        raw_price = block_prices[index][0]
+        context = _card_context(text, raw_price)
+        if _is_offer_context(context):
+            hits.append((raw_price, context))
+        index = members[unit][-1] + 1
+    hits.extend(_iter_prices(loose))
     return hits
 
 
@@ -378,225 +707,496 @@ def _clean_offer_name(
     return context.strip()[:100]
 
 
-def _infer_offer_type(context: str) -> str:
-    lower = context.lower()
-    if any(hint in lower for hint in PACK_HINTS):
-        return "pack"
-    if any(hint in lower for hint in MEMBERSHIP_HINTS):
-        return "membership"
-    for hint, offer_type in OFFER_TYPE_HINTS:
-        if hint in lower:
-            return offer_type
-    return "unknown"
+def _resolve_website(places: PlacesClient, row: dict[str, str]) -> str:
+    website = row.get("website") or ""
+    if website:
+        return website
+    try:
+        found = places.find_website(
+            row.get("name") or "", row.get("address") or "", row.get("city") or "Amsterdam"
+        )
+    except PlacesBudgetExceeded:
+        return ""
+    return found.get("website", "")
+
+
+def _page_offers(
+    competitor_id: str,
+    name: str,
+    page_url: str,
+    html_text: str,
+) -> tuple[list[dict[str, str]], list[tuple[str, dict[str, str]]]]:
+    """Extract pricing rows and (offer_key, offer) pairs without offer_id from one page."""
+    return _hits_to_offers(competitor_id, name, page_url, _page_prices(list(iter_text_blocks(html_text))))
+
+
+def _hits_to_offers(
+    competitor_id: str,
+    name: str,
+    page_url: str,
+    hits: Iterable[tuple[str, str]],
+) -> tuple[list[dict[str, str]], list[tuple[str, dict[str, str]]]]:
+    """Pricing rows and (offer_key, offer) pairs without offer_id for (raw_price, context) hits."""
+    pricing_rows: list[dict[str, str]] = []
+    offer_rows: list[tuple[str, dict[str, str]]] = []
+    offer_keys: set[str] = set()
+    for raw_price, context in hits:
+        price_value = _parse_price(raw_price)
+        pricing_rows.append(
+            {
+                "competitor_id": competitor_id,
+                "competitor_name": name,
+                "page_url": page_url,
+                "price_raw": raw_price,
+                "price_eur": price_value,
+                "context": context,
+                "last_checked_date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            }
+        )
 
+        fields = infer_offer_fields(context, raw_price)
+        offer_name = _clean_offer_name(
+            context,
+            fields["offer_type"],
+            fields["sessions_included"],
+            fields["duration_days"],
+            fields["price_unit"],
+        )
+        key_parts = [
+            competitor_id,
+            fields["offer_type"],
+            fields["class_type"],
+            fields["heat"],
+            fields["class_length_min"],
+            fields["sessions_included"],
+            fields["duration_days"],
+            fields["price_unit"],
+            price_value,
+        ]
+        offer_key = "|".join(key_parts)
+        if offer_key in offer_keys:
+            continue
+        offer_keys.add(offer_key)
+
+        offer_rows.append(
+            (
+                offer_key,
+                {
+                    "offer_id": "",
+                    "competitor_id": competitor_id,
+                    "offer_type": fields["offer_type"],
+                    "offer_name": offer_name,
+                    "class_type": fields["class_type"],
+                    "heat": fields["heat"],
+                    "class_length_min": fields["class_length_min"],
+                    "sessions_included": fields["sessions_included"],
+                    "duration_days": fields["duration_days"],
+                    "price_eur": price_value,
+                    "price_unit": fields["price_unit"],
+                    "currency": "EUR",
+                    "auto_renew": "",
+                    "contract_months": fields["contract_months"],
+                    "booking_limit": "",
+                    "intro_restrictions": "",
+                    "usage_limit_type": fields["usage_limit_type"],
+                    "usage_limit_value": fields["usage_limit_value"],
+                    "usage_limit_period": fields["usage_limit_period"],
+                    "contract_type": fields["contract_type"],
+                    "cancellation_notice_days": fields["cancellation_notice_days"],
+                    "class_style": fields["class_style"],
+                    "intensity_level": fields["intensity_level"],
+                    "source_url": page_url,
+                    "last_checked_date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+                },
+            )
+        )
+    return pricing_rows, offer_rows
 
-def _infer_class_type(context: str) -> tuple[str, str]:
-    lower = context.lower()
-    heat = ""
-    for hint, class_type in CLASS_TYPE_MAP:
-        if hint in lower:
-            if "hot" in hint:
-                heat = "hot"
-            return class_type, heat
-    return "", heat
-
-
-def _infer_sessions(context: str) -> str:
-    patterns = [
-        r"\b(\d{1,2})\s*(?:class|classes|lessen|lessons)\b",
-        r"\b(\d{1,2})\s*(?:x|times)\b",
-        r"\b(\d{1,2})\s*(?:unit|units|credit|credits)\b",
-        r"\b(\d{1,2})\s*(?:ritten|rittenkaart)\b",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, context, re.I)
-        if match:
-            return match.group(1)
-    return ""
 
+PAGE_EXTRACTIONS_PATH = CACHE_DIR / "page_extractions.json"
+# Bump when _page_offers output changes so stored extractions are redone.
+EXTRACTOR_VERSION = 3
 
-def _nearest_period(context: str, raw_price: str) -> str:
-    lower = context.lower()
-    if not raw_price:
-        return lower
-    idx = lower.find(raw_price.lower())
-    if idx == -1:
-        return lower
-    start = max(0, idx - 40)
-    end = min(len(lower), idx + 40)
-    return lower[start:end]
-
-
-def _infer_price_unit(context: str, raw_price: str) -> str:
-    window = _nearest_period(context, raw_price)
-    if any(term in window for term in ["per week", "weekly", "week"]):
-        return "week"
-    if any(term in window for term in ["per month", "monthly", "maand"]):
-        return "month"
-    if any(term in window for term in ["half year", "halfyear", "6 months", "6 maand", "6 maanden"]):
-        return "6_months"
-    if any(term in window for term in ["per 4 weeks", "4 weeks", "4 weken"]):
-        return "4_weeks"
-    if any(term in window for term in ["per year", "yearly", "jaar"]):
-        return "year"
-    if any(term in window for term in ["per class", "per lesson", "single"]):
-        return "class"
-    return ""
-
-
-def _infer_duration_days(context: str, raw_price: str, price_unit: str) -> str:
-    lower = context.lower()
-    if "28 days" in lower:
-        return "28"
-    if "1 month" in lower or "one month" in lower:
-        return "30"
-    if "3 months" in lower or "3 maand" in lower:
-        return "90"
-    if "6 months" in lower or "6 maand" in lower:
-        return "180"
-    if "1 year" in lower:
-        return "365"
-    weeks = re.search(r"\b(\d+)\s*week", lower)
-    if weeks:
-        return str(int(weeks.group(1)) * 7)
-    if price_unit == "week":
-        return "7"
-    if price_unit == "month":
-        return "30"
-    if price_unit == "4_weeks":
-        return "28"
-    if price_unit == "6_months":
-        return "180"
-    if price_unit == "year":
-        return "365"
-    return ""
-
-
-def _infer_class_length(context: str) -> str:
-    match = re.search(r"\b(\d{2,3})\s*(?:min|minutes)\b", context, re.I)
-    if match:
-        return match.group(1)
-    return ""
-
-
-def _infer_usage_restrictions(context: str) -> tuple[str, str, str]:
+
+class PageExtractions:
+    """Extraction results per competitor page, keyed by the body hash.
+
+    A page whose body is unchanged since the last crawl (HTTP 304 or the same
+    content) reuses its stored rows instead of being parsed again.
     """
-    Extract usage restrictions for memberships.
-    Returns: (usage_limit_type, usage_limit_value, usage_limit_period)
+
+    def __init__(self, path: Path = PAGE_EXTRACTIONS_PATH) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            try:
+                self._entries = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                self._entries = {}
+        self.hits = 0
+
+    def extract(
+        self, competitor_id: str, name: str, page_url: str, html_text: str
+    ) -> tuple[list[dict[str, str]], list[tuple[str, dict[str, str]]]]:
+        key = f"{competitor_id}|{page_url}"
+        digest = body_hash(html_text)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry.get("hash") == digest and entry.get("version") == EXTRACTOR_VERSION:
+            today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            pricing_rows = [{**row, "last_checked_date": today} for row in entry["pricing_rows"]]
+            offers = [(offer_key, {**offer, "last_checked_date": today}) for offer_key, offer in entry["offers"]]
+            with self._lock:
+                self.hits += 1
+            return pricing_rows, offers
+        pricing_rows, offers = _page_offers(competitor_id, name, page_url, html_text)
+        with self._lock:
+            self._entries[key] = {
+                "hash": digest,
+                "version": EXTRACTOR_VERSION,
+                "pricing_rows": pricing_rows,
+                "offers": offers,
+            }
+        return pricing_rows, offers
+
+    def save(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = json.dumps(self._entries)
+        self._path.write_text(payload, encoding="utf-8")
+
+
+@dataclass
+class CompetitorCrawl:
+    competitor_id: str
+    website: str
+    pricing_rows: list[dict[str, str]] = field(default_factory=list)
+    offer_rows: list[dict[str, str]] = field(default_factory=list)
+    page_hashes: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash over every fetched page body and the extractor version."""
+        pages = "\n".join(f"{url} {page_hash}" for url, page_hash in sorted(self.page_hashes.items()))
+        return body_hash(f"v{EXTRACTOR_VERSION}\n{pages}")
+
+
+def _try_fetch(fetch_text: Callable[[str], str], url: str) -> str | None:
+    try:
+        return fetch_text(url)
+    except Exception:
+        return None
+
+
+def _crawl_competitor(
+    row: dict[str, str],
+    website: str,
+    fetch_text: Callable[[str], str],
+    page_executor: ThreadPoolExecutor | None = None,
+    extractions: PageExtractions | None = None,
+    booking_fetch: Callable[[str], str] | None = None,
+) -> CompetitorCrawl | None:
+    """Crawl the homepage plus linked pricing pages; None when the site is unreachable.
+
+    With booking_fetch, links to a known booking platform are read through its
+    connector first and only fetched like any other page when that finds no
+    prices.
     """
-    lower = context.lower()
-    
-    # Check for unlimited first
-    if any(term in lower for term in ["unlimited", "onbeperkt", "no limit", "geen limiet"]):
-        return ("unlimited", "", "")
-    
-    # Check for classes per week
-    patterns_week = [
-        r"(\d+)\s*(?:x|times)?\s*(?:per|/)\s*week",
-        r"(\d+)\s*(?:classes?|lessen)\s*(?:per|/)\s*week",
-        r"(\d+)x\s*(?:per|/)\s*week",
-    ]
-    for pattern in patterns_week:
-        match = re.search(pattern, lower)
-        if match:
-            return ("classes_per_week", match.group(1), "week")
-    
-    # Check for classes per month
-    patterns_month = [
-        r"(\d+)\s*(?:x|times)?\s*(?:per|/)\s*(?:month|maand)",
-        r"(\d+)\s*(?:classes?|lessen)\s*(?:per|/)\s*(?:month|maand)",
-        r"(\d+)x\s*(?:per|/)\s*(?:month|maand)",
-    ]
-    for pattern in patterns_month:
-        match = re.search(pattern, lower)
-        if match:
-            return ("classes_per_month", match.group(1), "month")
-    
-    # Default: assume unlimited if it's a membership
-    if any(term in lower for term in ["membership", "abonnement"]):
-        return ("unlimited", "", "")
-    
-    return ("", "", "")
-
-
-def _infer_contract_terms(context: str) -> tuple[str, str, str]:
+    competitor_id = row.get("competitor_id") or ""
+    name = row.get("name") or ""
+    home_html = _try_fetch(fetch_text, website)
+    if home_html is None:
+        return None
+
+    def fetch_link(url: str) -> tuple[str, str | None, list[tuple[str, str]] | None]:
+        connector = find_connector(url) if booking_fetch is not None else None
+        if connector is not None:
+            booked = fetch_prices(connector, url, booking_fetch)
+            if booked is not None:
+                return booked
+        return url, _try_fetch(fetch_text, url), None
+
+    links = _collect_links(home_html, website)
+    if page_executor is not None:
+        link_pages = list(page_executor.map(fetch_link, links))
+    else:
+        link_pages = [fetch_link(url) for url in links]
+
+    result = CompetitorCrawl(competitor_id=competitor_id, website=website)
+    offer_keys: set[str] = set()
+    for page_url, html_text, booking_hits in [(website, home_html, None), *link_pages]:
+        if html_text is None:
+            continue
+        result.page_hashes[page_url] = body_hash(html_text)
+        if booking_hits is not None:
+            pricing_rows, offers = _hits_to_offers(competitor_id, name, page_url, booking_hits)
+        elif extractions is not None:
+            pricing_rows, offers = extractions.extract(competitor_id, name, page_url, html_text)
+        else:
+            pricing_rows, offers = _page_offers(competitor_id, name, page_url, html_text)
+        result.pricing_rows.extend(pricing_rows)
+        for offer_key, offer in offers:
+            if offer_key in offer_keys:
+                continue
+            offer_keys.add(offer_key)
+            result.offer_rows.append(offer)
+    return result
+
+
+def _crawl_all(
+    targets: list[tuple[dict[str, str], str]],
+    fetch_text: Callable[[str], str],
+    workers: int,
+    extractions: PageExtractions | None = None,
+    on_result: Callable[[dict[str, str], CompetitorCrawl | None], None] | None = None,
+    booking_fetch: Callable[[str], str] | None = None,
+) -> list[tuple[dict[str, str], CompetitorCrawl | None]]:
+    """Crawl competitors concurrently; results keep the order of targets.
+
+    on_result is called as soon as each competitor finishes.
     """
-    Extract contract terms.
-    Returns: (contract_type, minimum_commitment_months, cancellation_notice_days)
+
+    def crawl(
+        row: dict[str, str], website: str, page_executor: ThreadPoolExecutor | None = None
+    ) -> CompetitorCrawl | None:
+        result = _crawl_competitor(row, website, fetch_text, page_executor, extractions, booking_fetch)
+        if on_result is not None:
+            on_result(row, result)
+        return result
+
+    if workers <= 1:
+        return [(row, crawl(row, website)) for row, website in targets]
+    with ThreadPoolExecutor(max_workers=workers) as page_executor:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(crawl, row, website, page_executor) for row, website in targets]
+            return [(row, future.result()) for (row, _), future in zip(targets, futures)]
+
+
+CRAWL_JOURNAL_PATH = DATA_DIR / "crawl_journal.jsonl"
+
+# A journal older than this is from an abandoned crawl, not one to resume.
+JOURNAL_MAX_AGE_HOURS = 24
+
+# Arguments that change what a crawl produces; --resume needs them to match.
+JOURNAL_ARGS = ["limit", "fetch_mode", "incremental", "max_age_days", "no_booking_connectors"]
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class CrawlJournal:
+    """Append-only log of finished competitors for the crawl in progress.
+
+    Each competitor is written (and fsynced) as soon as it finishes, so a
+    killed or timed-out crawl can be resumed without fetching those sites
+    again. Unreachable sites are logged too. The first line records when the
+    crawl started and its JOURNAL_ARGS; a journal older than max_age_hours or
+    written with other arguments is not resumed. The journal is discarded
+    once the final write has succeeded.
     """
-    lower = context.lower()
-    
-    # Check for month-to-month / no commitment
-    if any(term in lower for term in [
-        "month-to-month", "month to month", "no commitment", "cancel anytime",
-        "geen binding", "opzegbaar", "maand-tot-maand"
-    ]):
-        # Check for cancellation notice period
-        notice_match = re.search(r"(\d+)\s*(?:days?|dagen)\s*(?:notice|opzegtermijn)", lower)
-        notice_days = notice_match.group(1) if notice_match else "30"
-        return ("month_to_month", "1", notice_days)
-    
-    # Check for annual commitment
-    if any(term in lower for term in [
-        "12 month", "12-month", "annual", "yearly", "jaar", "12 maanden"
-    ]):
-        return ("annual", "12", "0")
-    
-    # Check for 6-month commitment
-    if any(term in lower for term in ["6 month", "6-month", "half year", "6 maanden"]):
-        return ("semi_annual", "6", "0")
-    
-    # Check for 3-month commitment
-    if any(term in lower for term in ["3 month", "3-month", "quarterly", "3 maanden"]):
-        return ("quarterly", "3", "0")
-    
-    # Check for intro offers
-    if any(term in lower for term in ["intro", "trial", "proef"]):
-        return ("intro", "0", "0")
-    
-    # Default: assume month-to-month for memberships
-    if any(term in lower for term in ["membership", "abonnement"]):
-        return ("month_to_month", "1", "30")
-    
-    return ("", "", "")
-
-
-def _infer_class_style(class_type: str, context: str) -> tuple[str, str]:
+
+    def __init__(
+        self,
+        path: Path = CRAWL_JOURNAL_PATH,
+        resume: bool = False,
+        args: dict[str, Any] | None = None,
+        max_age_hours: float = JOURNAL_MAX_AGE_HOURS,
+    ) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._handle = None
+        self.header = {"started_at": _utc_now(), "args": args or {}}
+        self.completed: dict[str, CompetitorCrawl | None] = {}
+        self.finished_at: dict[str, str] = {}
+        if resume:
+            header, entries = self._read()
+            reason = self._stale_reason(header, max_age_hours)
+            if reason:
+                if entries:
+                    print(f"Not resuming the crawl journal: {reason}")
+                entries = {}
+            else:
+                self.header = header
+            for competitor_id, (result, finished_at) in entries.items():
+                self.completed[competitor_id] = result
+                self.finished_at[competitor_id] = finished_at
+            self._rewrite()
+        else:
+            path.unlink(missing_ok=True)
+
+    def _stale_reason(self, header: dict[str, Any] | None, max_age_hours: float) -> str:
+        if header is None:
+            return "it has no header"
+        if header.get("args") != self.header["args"]:
+            return "it was written with other crawl arguments"
+        try:
+            started = datetime.fromisoformat(header["started_at"])
+        except (KeyError, TypeError, ValueError):
+            return "it has no start time"
+        age_hours = (datetime.now(timezone.utc) - started).total_seconds() / 3600
+        if age_hours > max_age_hours:
+            return f"it was started {age_hours:.0f} hours ago"
+        return ""
+
+    def _read(self) -> tuple[dict[str, Any] | None, dict[str, tuple[CompetitorCrawl | None, str]]]:
+        if not self._path.exists():
+            return None, {}
+        header = None
+        entries: dict[str, tuple[CompetitorCrawl | None, str]] = {}
+        with self._path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crawl killed mid-write leaves a partial last line.
+                    continue
+                if "header" in entry:
+                    header = entry["header"]
+                    continue
+                result = entry.get("result")
+                entries[entry["competitor_id"]] = (
+                    CompetitorCrawl(**result) if result else None,
+                    entry.get("finished_at") or "",
+                )
+        return header, entries
+
+    def _rewrite(self) -> None:
+        if not self.completed:
+            self._path.unlink(missing_ok=True)
+            return
+        tmp_path = self._path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            handle.write(json.dumps({"header": self.header}) + "\n")
+            for competitor_id, result in self.completed.items():
+                handle.write(self._line(competitor_id, result, self.finished_at[competitor_id]))
+        os.replace(tmp_path, self._path)
+
+    @staticmethod
+    def _line(competitor_id: str, result: CompetitorCrawl | None, finished_at: str) -> str:
+        payload = {
+            "competitor_id": competitor_id,
+            "finished_at": finished_at,
+            "result": asdict(result) if result else None,
+        }
+        return json.dumps(payload) + "\n"
+
+    def record(self, row: dict[str, str], result: CompetitorCrawl | None) -> None:
+        line = self._line(row.get("competitor_id") or "", result, _utc_now())
+        with self._lock:
+            if self._handle is None:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                is_new = not self._path.exists()
+                self._handle = self._path.open("a", encoding="utf-8")
+                if is_new:
+                    self._handle.write(json.dumps({"header": self.header}) + "\n")
+            self._handle.write(line)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def discard(self) -> None:
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+        self._path.unlink(missing_ok=True)
+
+
+CRAWL_STATE_PATH = DATA_DIR / "crawl_state.json"
+
+# Fields that identify an offer across crawls. The price is left out on purpose
+# so a price change updates the offer instead of replacing it.
+OFFER_IDENTITY_FIELDS = [
+    "competitor_id",
+    "offer_type",
+    "class_type",
+    "heat",
+    "class_length_min",
+    "sessions_included",
+    "duration_days",
+    "price_unit",
+]
+
+
+def _load_crawl_state(path: Path = CRAWL_STATE_PATH) -> dict[str, dict[str, Any]]:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_crawl_state(state: dict[str, dict[str, Any]], path: Path = CRAWL_STATE_PATH) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _crawled_offer_counts(path: Path = OFFERS_TEMPLATE_PATH) -> dict[str, int]:
+    """Number of crawled (auto-) offers per competitor in the offers CSV."""
+    counts: dict[str, int] = {}
+    for row in _read_csv_rows(path):
+        if (row.get("offer_id") or "").startswith("auto-"):
+            competitor_id = row.get("competitor_id") or ""
+            counts[competitor_id] = counts.get(competitor_id, 0) + 1
+    return counts
+
+
+def _offers_intact(entry: dict[str, Any] | None, competitor_id: str, offer_counts: dict[str, int]) -> bool:
+    """True when the offers CSV still holds every offer the state entry recorded.
+
+    Entries from before the count was recorded are never trusted.
     """
-    Infer detailed class style and intensity level.
-    Returns: (class_style, intensity_level)
+    if not entry or entry.get("offers") is None:
+        return False
+    return offer_counts.get(competitor_id, 0) == entry["offers"]
+
+
+def _is_fresh(entry: dict[str, Any] | None, max_age_days: float) -> bool:
+    if not entry or not entry.get("crawled_at"):
+        return False
+    try:
+        crawled_at = datetime.fromisoformat(entry["crawled_at"])
+    except ValueError:
+        return False
+    age = datetime.now(timezone.utc) - crawled_at
+    return age.total_seconds() < max_age_days * 86400
+
+
+def _assign_offer_ids(offer_rows: list[dict[str, str]]) -> None:
+    """Give crawled offers ids derived from their identity rather than their position.
+
+    Offers that share an identity within a competitor are numbered in page
+    order, so the ids stay the same as long as the pages do.
     """
-    lower = context.lower()
-    
-    # Yoga styles
-    if class_type in ["yoga", "hot_yoga"]:
-        if any(term in lower for term in ["vinyasa", "flow"]):
-            if any(term in lower for term in ["power", "athletic", "strong"]):
-                return ("power_yoga", "high")
-            return ("vinyasa_flow", "moderate")
-        
-        if any(term in lower for term in ["power", "athletic"]):
-            return ("power_yoga", "high")
-        
-        if any(term in lower for term in ["yin", "restorative", "gentle", "slow"]):
-            return ("yin_restorative", "low")
-        
-        if any(term in lower for term in ["bikram", "26+2", "26 postures"]):
-            return ("bikram_26_2", "high")
-        
-        if any(term in lower for term in ["ashtanga"]):
-            return ("ashtanga", "moderate")
-        
-        if any(term in lower for term in ["hatha"]):
-            return ("hatha", "moderate")
-    
-    # Pilates styles
-    if class_type == "pilates":
-        if any(term in lower for term in ["reformer"]):
-            return ("reformer_pilates", "moderate")
-        return ("mat_pilates", "moderate")
-    
-    return ("", "")
+    seen: dict[str, int] = {}
+    for offer in offer_rows:
+        identity = "|".join(offer.get(name) or "" for name in OFFER_IDENTITY_FIELDS)
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        if occurrence:
+            identity = f"{identity}#{occurrence}"
+        offer["offer_id"] = f"auto-{body_hash(identity)[:10]}"
+
+
+def _read_csv_rows(path: Path) -> list[dict[str, str]]:
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _write_csv_rows(path: Path, fieldnames: list[str], rows: list[dict[str, str]]) -> None:
+    """Write to a temporary file and swap it in, so readers never see a partial CSV."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
 
 
 def _select_competitors(rows: list[dict[str, str]], limit: int) -> list[dict[str, str]]:
@@ -615,248 +1215,258 @@ def main() -> None:
     parser.add_argument(
         "--use-playwright",
         action="store_true",
-        help="Use Playwright to render JS-heavy pricing pages (slower, higher coverage).",
+        help="Use Playwright to render JS-heavy pricing pages (same as --fetch-mode playwright).",
+    )
+    parser.add_argument(
+        "--fetch-mode",
+        choices=["static", "playwright", "auto"],
+        default="static",
+        help="static: plain HTTP; playwright: render every page; "
+        "auto: plain HTTP first, render only pages that need it.",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        help="Also upsert results into this SQLite store (see offer_store.py); "
+        "defaults to data/benchmark.sqlite when it exists.",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Max concurrent page fetches.")
+    parser.add_argument("--per-domain", type=int, default=2, help="Max concurrent fetches per domain.")
+    parser.add_argument("--timeout", type=float, default=25, help="Per-request timeout in seconds.")
+    parser.add_argument("--retries", type=int, default=2, help="Retries for transient fetch errors.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP cache.")
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=24,
+        help="Serve cached pages younger than this without revalidating.",
+    )
+    parser.add_argument("--cache-max-mb", type=int, default=256, help="HTTP cache size cap (LRU eviction).")
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4,
+        help="Number of parallel Playwright pages (with --use-playwright).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-crawl competitors not crawled within --max-age-days and merge "
+        "the results into the existing offers instead of rewriting them.",
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=7,
+        help="With --incremental, competitors crawled more recently are skipped.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted crawl, reusing competitors already in the crawl journal.",
+    )
+    parser.add_argument(
+        "--resume-max-age-hours",
+        type=float,
+        default=JOURNAL_MAX_AGE_HOURS,
+        help="With --resume, ignore a crawl journal started longer ago than this.",
+    )
+    parser.add_argument(
+        "--no-booking-connectors",
+        action="store_true",
+        help="Fetch booking-platform links (Mindbody, Momoyoga, ...) like any other page.",
+    )
+    parser.add_argument(
+        "--places-max-requests",
+        type=int,
+        default=None,
+        help="Stop looking up missing websites after this many uncached Places requests.",
+    )
+    parser.add_argument(
+        "--places-ttl-days",
+        type=float,
+        default=30,
+        help="Reuse cached Places lookups younger than this.",
     )
     args = parser.parse_args()
+    if args.db is None and offer_store.STORE_PATH.exists():
+        # The server reads the store instead of the CSVs once it exists, so
+        # keep it in step with every crawl.
+        args.db = offer_store.STORE_PATH
 
-    api_key = _read_key()
+    api_key = read_key()
     competitors = _load_competitors()
     if not competitors:
         raise RuntimeError("No competitors found. Populate competitors_template.csv first.")
 
     selected = _select_competitors(competitors, args.limit)
-    places_cache = _load_places_cache()
-
-    pricing_rows: list[dict[str, str]] = []
-    offer_rows: list[dict[str, str]] = []
-    offer_keys: set[str] = set()
-
-    def run_crawl(fetch_text) -> None:
-        for row in selected:
-            competitor_id = row.get("competitor_id") or ""
-            name = row.get("name") or ""
-            address = row.get("address") or ""
-            city = row.get("city") or "Amsterdam"
-            website = row.get("website") or ""
-
-            cache_key = f"{name}|{address}|{city}"
-            if not website:
-                if cache_key in places_cache:
-                    website = places_cache[cache_key].get("website", "")
-                else:
-                    query = f"{name} {address} {city}"
-                    result = _places_text_search(api_key, query)
-                    place = result.get("results", [None])[0]
-                    if place and place.get("place_id"):
-                        details = _places_details(api_key, place["place_id"])
-                        website = details.get("website", "")
-                        places_cache[cache_key] = {
-                            "place_id": place.get("place_id"),
-                            "website": website,
-                            "formatted_address": details.get("formatted_address", ""),
-                        }
-                        time.sleep(0.2)
-
-            if not website:
-                continue
-
-            try:
-                home_html = fetch_text(website)
-            except Exception:
-                continue
-
-            pages = [website]
-            pages.extend(_collect_links(home_html, website))
-
-            for page_url in pages:
-                try:
-                    html_text = fetch_text(page_url)
-                except Exception:
-                    continue
-                text = re.sub(r"<[^>]+>", " ", html_text)
-                text = html.unescape(text)
-                text = re.sub(r"\s+", " ", text)
-                for raw_price, context in _extract_prices(text):
-                    price_value = _parse_price(raw_price)
-                    pricing_rows.append(
-                        {
-                            "competitor_id": competitor_id,
-                            "competitor_name": name,
-                            "page_url": page_url,
-                            "price_raw": raw_price,
-                            "price_eur": price_value,
-                            "context": context,
-                            "last_checked_date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-                        }
-                    )
-
-                    price_unit = _infer_price_unit(context, raw_price)
-                    sessions_included = _infer_sessions(context)
-                    duration_days = _infer_duration_days(context, raw_price, price_unit)
-                    offer_type = _infer_offer_type(context)
-                    class_type, heat = _infer_class_type(context)
-                    class_length_min = _infer_class_length(context)
-
-                    offer_name = _clean_offer_name(
-                        context,
-                        offer_type,
-                        sessions_included,
-                        duration_days,
-                        price_unit,
-                    )
-                    key_parts = [
-                        competitor_id,
-                        offer_type,
-                        class_type,
-                        heat,
-                        class_length_min,
-                        sessions_included,
-                        duration_days,
-                        price_unit,
-                        price_value,
-                    ]
-                    offer_key = "|".join(key_parts)
-                    if offer_key in offer_keys:
-                        continue
-                    offer_keys.add(offer_key)
-
-                    # Extract enhanced fields
-                    usage_limit_type, usage_limit_value, usage_limit_period = _infer_usage_restrictions(context)
-                    contract_type, min_commitment_months, cancellation_notice_days = _infer_contract_terms(context)
-                    class_style, intensity_level = _infer_class_style(class_type, context)
-
-                    offer_rows.append(
-                        {
-                            "offer_id": f"auto-{len(offer_rows)+1:04d}",
-                            "competitor_id": competitor_id,
-                            "offer_type": offer_type,
-                            "offer_name": offer_name,
-                            "class_type": class_type,
-                            "heat": heat,
-                            "class_length_min": class_length_min,
-                            "sessions_included": sessions_included,
-                            "duration_days": duration_days,
-                            "price_eur": price_value,
-                            "price_unit": price_unit,
-                            "currency": "EUR",
-                            "auto_renew": "",
-                            "contract_months": min_commitment_months,
-                            "booking_limit": "",
-                            "intro_restrictions": "",
-                            "usage_limit_type": usage_limit_type,
-                            "usage_limit_value": usage_limit_value,
-                            "usage_limit_period": usage_limit_period,
-                            "contract_type": contract_type,
-                            "cancellation_notice_days": cancellation_notice_days,
-                            "class_style": class_style,
-                            "intensity_level": intensity_level,
-                            "source_url": page_url,
-                            "last_checked_date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-                        }
-                    )
-
-            if args.update_competitors and website and not row.get("website"):
-                row["website"] = website
-
-            time.sleep(0.3)
-
-    if args.use_playwright:
-        with PlaywrightSession(USER_AGENT) as session:
-            run_crawl(session.fetch_text)
-    else:
-        run_crawl(_fetch_text)
-
-    _save_places_cache(places_cache)
-
-    with PRICING_PAGES_PATH.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "competitor_id",
-                "competitor_name",
-                "page_url",
-                "price_raw",
-                "price_eur",
-                "context",
-                "last_checked_date",
-            ],
+    crawl_state = _load_crawl_state(CRAWL_STATE_PATH)
+    offer_counts = _crawled_offer_counts(OFFERS_TEMPLATE_PATH)
+    if args.incremental:
+        # A competitor is only skipped while its offers are still on file.
+        stale = [
+            row for row in selected
+            if not _is_fresh(crawl_state.get(row.get("competitor_id") or ""), args.max_age_days)
+            or not _offers_intact(
+                crawl_state.get(row.get("competitor_id") or ""), row.get("competitor_id") or "", offer_counts
+            )
+        ]
+        print(f"Incremental: {len(selected) - len(stale)} competitors fresh, {len(stale)} to re-crawl")
+        selected = stale
+    fetch_mode = "playwright" if args.use_playwright else args.fetch_mode
+    journal_args = {name: getattr(args, name, None) for name in JOURNAL_ARGS}
+    journal_args["fetch_mode"] = fetch_mode
+    journal = CrawlJournal(
+        CRAWL_JOURNAL_PATH, resume=args.resume, args=journal_args, max_age_hours=args.resume_max_age_hours
+    )
+    if journal.completed:
+        print(f"Resuming: {len(journal.completed)} competitors already crawled")
+    pending = [row for row in selected if row.get("competitor_id") not in journal.completed]
+    with PlacesClient(
+        api_key, ttl_days=args.places_ttl_days, max_requests=args.places_max_requests
+    ) as places:
+        resolved = places.map(lambda row: _resolve_website(places, row), pending)
+        if places.stats["requests"] or places.stats["cached"]:
+            print(places.summary())
+    websites = list(zip(pending, resolved))
+    targets = [(row, website) for row, website in websites if website]
+
+    fetch_settings = {
+        "max_concurrency": args.workers,
+        "per_domain": args.per_domain,
+        "timeout": args.timeout,
+        "retries": args.retries,
+    }
+    http_cache = None
+    extractions = None
+    static_fetch: Callable[[str, float], str] = _fetch_text
+    if not args.no_cache:
+        http_cache = HttpCache(
+            user_agent=USER_AGENT,
+            ttl_seconds=args.cache_ttl_hours * 3600,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
         )
-        writer.writeheader()
-        writer.writerows(pricing_rows)
-
-    with OFFERS_AUTO_PATH.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "offer_id",
-                "competitor_id",
-                "offer_type",
-                "offer_name",
-                "class_type",
-                "heat",
-                "class_length_min",
-                "sessions_included",
-                "duration_days",
-                "price_eur",
-                "price_unit",
-                "currency",
-                "auto_renew",
-                "contract_months",
-                "booking_limit",
-                "intro_restrictions",
-                "usage_limit_type",
-                "usage_limit_value",
-                "usage_limit_period",
-                "contract_type",
-                "cancellation_notice_days",
-                "class_style",
-                "intensity_level",
-                "source_url",
-                "last_checked_date",
-            ],
+        extractions = PageExtractions()
+        static_fetch = http_cache.fetch_text
+    static = PoliteFetcher(static_fetch, **fetch_settings)
+    booking_fetch = None if args.no_booking_connectors else static.fetch_text
+    if fetch_mode == "static":
+        results = _crawl_all(
+            targets, static.fetch_text, args.workers, extractions, journal.record, booking_fetch
         )
-        writer.writeheader()
-        writer.writerows(offer_rows)
-
-    with OFFERS_TEMPLATE_PATH.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "offer_id",
-                "competitor_id",
-                "offer_type",
-                "offer_name",
-                "class_type",
-                "heat",
-                "class_length_min",
-                "sessions_included",
-                "duration_days",
-                "price_eur",
-                "price_unit",
-                "currency",
-                "auto_renew",
-                "contract_months",
-                "booking_limit",
-                "intro_restrictions",
-                "usage_limit_type",
-                "usage_limit_value",
-                "usage_limit_period",
-                "contract_type",
-                "cancellation_notice_days",
-                "class_style",
-                "intensity_level",
-                "source_url",
-                "last_checked_date",
-            ],
+    else:
+        lazy = fetch_mode == "auto"
+        with PlaywrightPool(USER_AGENT, pool_size=args.pool_size, lazy=lazy) as pool:
+            render = PoliteFetcher(pool.fetch_text, **fetch_settings)
+            if fetch_mode == "auto":
+                hybrid = HybridFetcher(static.fetch_text, render.fetch_text)
+                results = _crawl_all(
+                    targets, hybrid.fetch_text, args.workers, extractions, journal.record, booking_fetch
+                )
+                hybrid.save()
+            else:
+                results = _crawl_all(
+                    targets, render.fetch_text, args.workers, extractions, journal.record, booking_fetch
+                )
+        _print_render_times(pool.render_times)
+    if http_cache is not None:
+        http_cache.save()
+        extractions.save()
+        stats = http_cache.stats
+        print(
+            f"HTTP cache: {stats['fresh']} fresh, {stats['revalidated']} revalidated (304), "
+            f"{stats['fetched']} downloaded; {extractions.hits} pages unchanged, extraction skipped"
         )
-        writer.writeheader()
-        writer.writerows(offer_rows)
+
+    crawled = {row.get("competitor_id"): result for row, result in results}
+    crawled.update(journal.completed)
+    results = [
+        (row, crawled[row.get("competitor_id")])
+        for row in selected
+        if row.get("competitor_id") in crawled
+    ]
+
+    crawled_at = _utc_now()
+    pricing_rows: list[dict[str, str]] = []
+    offer_rows: list[dict[str, str]] = []
+    changed_ids: list[str] = []
+    unchanged = 0
+    if not args.incremental:
+        # A full crawl rewrites the offers with only what it crawled, so only
+        # those competitors may keep a state entry.
+        crawl_state = {}
+    for row, result in results:
+        if result is None:
+            continue
+        if args.update_competitors and not row.get("website"):
+            row["website"] = result.website
+        previous = crawl_state.get(result.competitor_id)
+        crawl_state[result.competitor_id] = {
+            "fingerprint": result.fingerprint,
+            # Competitors reused from the journal keep the time they were fetched.
+            "crawled_at": journal.finished_at.get(result.competitor_id) or crawled_at,
+            "offers": len(result.offer_rows),
+        }
+        if (
+            args.incremental
+            and previous is not None
+            and previous.get("fingerprint") == result.fingerprint
+            and _offers_intact(previous, result.competitor_id, offer_counts)
+        ):
+            unchanged += 1
+            continue
+        changed_ids.append(result.competitor_id)
+        pricing_rows.extend(result.pricing_rows)
+        offer_rows.extend(result.offer_rows)
+    _assign_offer_ids(offer_rows)
+
+    if args.incremental:
+        # Keep every other competitor's rows, and curated offers, as they are.
+        changed = set(changed_ids)
+        pricing_rows = [
+            row for row in _read_csv_rows(PRICING_PAGES_PATH)
+            if row.get("competitor_id") not in changed
+        ] + pricing_rows
+        offer_rows = [
+            row for row in _read_csv_rows(OFFERS_TEMPLATE_PATH)
+            if row.get("competitor_id") not in changed
+            or not (row.get("offer_id") or "").startswith("auto-")
+        ] + offer_rows
+        print(f"Incremental: {len(changed_ids)} competitors changed, {unchanged} unchanged")
+
+    auto_offer_rows = [row for row in offer_rows if (row.get("offer_id") or "").startswith("auto-")]
+    _write_csv_rows(PRICING_PAGES_PATH, offer_store.PRICING_PAGE_FIELDS, pricing_rows)
+    _write_csv_rows(OFFERS_AUTO_PATH, offer_store.OFFER_FIELDS, auto_offer_rows)
+    _write_csv_rows(OFFERS_TEMPLATE_PATH, offer_store.OFFER_FIELDS, offer_rows)
+    _save_crawl_state(crawl_state, CRAWL_STATE_PATH)
 
     if args.update_competitors:
-        with COMPETITORS_PATH.open("w", encoding="utf-8", newline="") as handle:
-            writer = csv.DictWriter(handle, fieldnames=competitors[0].keys())
-            writer.writeheader()
-            writer.writerows(competitors)
+        _write_csv_rows(COMPETITORS_PATH, list(competitors[0].keys()), competitors)
+
+    if args.db:
+        conn = offer_store.connect(args.db)
+        with offer_store.transaction(conn):
+            for competitor_id in changed_ids:
+                offer_store.replace_competitor_offers(
+                    conn,
+                    competitor_id,
+                    [row for row in offer_rows if row["competitor_id"] == competitor_id],
+                )
+                offer_store.replace_competitor_pricing_pages(
+                    conn,
+                    competitor_id,
+                    [row for row in pricing_rows if row["competitor_id"] == competitor_id],
+                )
+            if not args.incremental:
+                # A full crawl rewrote the CSVs with only what it crawled.
+                removed = offer_store.remove_crawled_except(conn, changed_ids)
+                if removed:
+                    print(f"Store: removed {removed} crawled offers of competitors not in this crawl")
+            if args.update_competitors:
+                offer_store.upsert_competitors(conn, competitors)
+        conn.close()
+        print(f"Store: {args.db}")
+    journal.discard()
 
     print(f"Pricing pages: {PRICING_PAGES_PATH}")
     print(f"Offers auto: {OFFERS_AUTO_PATH}")
@@ -3,15 +3,22 @@ from __future__ import annotations
 import argparse
 import csv
 import html
+import json
+import os
 import re
 import sys
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Iterable
-from urllib.parse import parse_qs, quote_plus, urlparse
+from typing import Callable, Iterable, Iterator
+from urllib.parse import parse_qs, parse_qsl, quote_plus, urlencode, urlparse
 from urllib.request import Request, urlopen
 
+from html_text import html_to_text
+from http_cache import HttpCache
+from pricing_crawl import PoliteFetcher
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
@@ -24,6 +31,15 @@ USER_AGENT = (
 
 DDG_SEARCH_URL = "https://duckduckgo.com/html/?q={query}&s={offset}"
 
+SEARCH_CACHE_PATH = DATA_DIR / "search_cache.json"
+
+# Query parameters that only track where a click came from.
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "dclid", "yclid", "igshid", "mc_cid", "mc_eid", "ref", "_ga", "_gl"}
+TRACKING_PREFIXES = ("utm_",)
+
+# Public suffixes with two labels, so "studio.co.uk" is a site of its own.
+MULTI_LABEL_SUFFIXES = {"co.uk", "org.uk", "ac.uk", "com.au", "net.au", "co.nz", "co.za", "com.br", "co.jp"}
+
 DEFAULT_QUERIES = [
     "yoga studio Amsterdam",
     "hot yoga Amsterdam",
@@ -67,6 +83,20 @@ OFFER_KEYWORDS = [
 ]
 
 
+FIELDNAMES = [
+    "query",
+    "rank",
+    "website",
+    "title",
+    "snippet",
+    "price_snippets",
+    "class_keywords",
+    "offer_keywords",
+    "postcode_guess",
+    "phone_guess",
+]
+
+
 @dataclass
 class SearchResult:
     query: str
@@ -76,13 +106,90 @@ class SearchResult:
     snippet: str
 
 
-def _fetch(url: str, timeout: int = 20) -> str:
+def _fetch(url: str, timeout: float = 20) -> str:
     request = Request(url, headers={"User-Agent": USER_AGENT})
     with urlopen(request, timeout=timeout) as response:
         charset = response.headers.get_content_charset() or "utf-8"
         return response.read().decode(charset, errors="replace")
 
 
+class SearchCache:
+    """Search result pages on disk, keyed by normalized query and result offset.
+
+    Pages younger than ttl_seconds are served without a request; expired
+    entries are dropped on save().
+    """
+
+    def __init__(self, path: Path = SEARCH_CACHE_PATH, ttl_seconds: float = 24 * 3600) -> None:
+        self._path = path
+        self._ttl = ttl_seconds
+        self._entries = self._load()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def _load(self) -> dict[str, dict]:
+        if not self._path.exists():
+            return {}
+        try:
+            return json.loads(self._path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return {}
+
+    @staticmethod
+    def _key(query: str, offset: int) -> str:
+        return f"{normalize_query(query)}|{offset}"
+
+    def get(self, query: str, offset: int) -> list[SearchResult] | None:
+        entry = self._entries.get(self._key(query, offset))
+        if entry is None or time.time() - entry["fetched_at"] > self._ttl:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return [SearchResult(query=query, **item) for item in entry["results"]]
+
+    def put(self, query: str, offset: int, results: list[SearchResult]) -> None:
+        items = [{key: value for key, value in asdict(result).items() if key != "query"} for result in results]
+        self._entries[self._key(query, offset)] = {"fetched_at": time.time(), "results": items}
+
+    def save(self) -> None:
+        now = time.time()
+        entries = {key: entry for key, entry in self._entries.items() if now - entry["fetched_at"] <= self._ttl}
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(entries), encoding="utf-8")
+        os.replace(tmp_path, self._path)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def canonical_url(url: str) -> str:
+    """Identity of a result URL: no scheme, www., fragment, tracking params or trailing slash."""
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower().removeprefix("www.")
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    canonical = host + (parsed.path.rstrip("/") or "")
+    if params:
+        canonical += "?" + urlencode(params)
+    return canonical
+
+
+def registrable_domain(url: str) -> str:
+    """The site a URL belongs to: its host without subdomains, e.g. "shop.example.nl" -> "example.nl"."""
+    host = (urlparse(url.strip()).hostname or "").lower().rstrip(".")
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
 def _extract_ddg_results(html_text: str, query: str) -> list[SearchResult]:
     results: list[SearchResult] = []
     pattern = re.compile(
@@ -145,9 +252,14 @@ def _find_keywords(text: str, keywords: Iterable[str]) -> list[str]:
     return list(dict.fromkeys(found))
 
 
-def _extract_candidate_fields(url: str, title: str, snippet: str) -> dict[str, str]:
+def _extract_candidate_fields(
+    url: str,
+    title: str,
+    snippet: str,
+    fetch: Callable[[str], str] = _fetch,
+) -> dict[str, str]:
     try:
-        page = _fetch(url)
+        page = fetch(url)
     except Exception:
         return {
             "website": url,
@@ -160,7 +272,7 @@ def _extract_candidate_fields(url: str, title: str, snippet: str) -> dict[str, s
             "phone_guess": "",
         }
 
-    text = _clean_text(page)
+    text = html_to_text(page)
     prices = _extract_prices(text)
     class_hits = _find_keywords(text, CLASS_KEYWORDS)
     offer_hits = _find_keywords(text, OFFER_KEYWORDS)
@@ -179,18 +291,57 @@ def _extract_candidate_fields(url: str, title: str, snippet: str) -> dict[str, s
     }
 
 
-def ddg_search(query: str, max_results: int, delay: float) -> list[SearchResult]:
+def enrich_candidates(
+    results: list[SearchResult],
+    fetch: Callable[[str], str],
+    workers: int = 8,
+) -> Iterator[dict[str, str]]:
+    """Yield a candidate row per result, as soon as its site has been read.
+
+    Each site (see registrable_domain) is fetched once, through its first
+    result, however many of its pages the queries returned; every result
+    from that site shares the extracted fields.
+    """
+    by_domain: dict[str, list[SearchResult]] = {}
+    for result in results:
+        by_domain.setdefault(registrable_domain(result.url) or canonical_url(result.url), []).append(result)
+
+    def enrich(key: str) -> dict[str, str]:
+        first = by_domain[key][0]
+        return _extract_candidate_fields(first.url, first.title, first.snippet, fetch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(enrich, key): key for key in by_domain}
+        for future in as_completed(futures):
+            fields = future.result()
+            for result in by_domain[futures[future]]:
+                yield {
+                    **fields,
+                    "website": result.url,
+                    "title": result.title,
+                    "snippet": result.snippet,
+                    "query": result.query,
+                    "rank": result.rank,
+                }
+
+
+def ddg_search(
+    query: str, max_results: int, delay: float, cache: SearchCache | None = None
+) -> list[SearchResult]:
     results: list[SearchResult] = []
     offset = 0
     while len(results) < max_results:
-        url = DDG_SEARCH_URL.format(query=quote_plus(query), offset=offset)
-        html_text = _fetch(url)
-        batch = _extract_ddg_results(html_text, query)
+        batch = cache.get(query, offset) if cache is not None else None
+        if batch is None:
+            url = DDG_SEARCH_URL.format(query=quote_plus(query), offset=offset)
+            batch = _extract_ddg_results(_fetch(url), query)
+            if cache is not None:
+                cache.put(query, offset, batch)
+            time.sleep(delay)
         if not batch:
             break
         results.extend(batch)
         offset += len(batch)
-        time.sleep(delay)
     return results[:max_results]
 
 
@@ -206,6 +357,21 @@ def main() -> None:
         default=DATA_DIR / "web_candidates.csv",
         help="CSV output for candidate list.",
     )
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP and search caches.")
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=24,
+        help="Serve cached candidate pages younger than this without revalidating.",
+    )
+    parser.add_argument(
+        "--search-cache-ttl-hours",
+        type=float,
+        default=24,
+        help="Reuse cached search result pages younger than this.",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Max concurrent candidate page fetches.")
+    parser.add_argument("--per-domain", type=int, default=2, help="Max concurrent fetches per domain.")
     args = parser.parse_args()
 
     queries: list[str] = []
@@ -215,18 +381,37 @@ def main() -> None:
         queries.extend(args.query)
     if not queries:
         queries = DEFAULT_QUERIES
+    unique_queries: list[str] = []
+    seen_queries: set[str] = set()
+    for query in queries:
+        if normalize_query(query) not in seen_queries:
+            seen_queries.add(normalize_query(query))
+            unique_queries.append(query)
+    if len(unique_queries) < len(queries):
+        print(f"Skipping {len(queries) - len(unique_queries)} duplicate queries")
+
+    search_cache = None
+    if not args.no_cache:
+        search_cache = SearchCache(ttl_seconds=args.search_cache_ttl_hours * 3600)
 
     all_results: list[SearchResult] = []
     seen_urls: set[str] = set()
 
-    for query in queries:
-        results = ddg_search(query, max_results=args.max_results, delay=args.delay)
+    for query in unique_queries:
+        results = ddg_search(query, max_results=args.max_results, delay=args.delay, cache=search_cache)
         for result in results:
-            if result.url in seen_urls:
+            key = canonical_url(result.url)
+            if key in seen_urls:
                 continue
-            seen_urls.add(result.url)
+            seen_urls.add(key)
             all_results.append(result)
 
+    if search_cache is not None:
+        search_cache.save()
+        hits, misses = search_cache.stats["hits"], search_cache.stats["misses"]
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        print(f"Search cache: {hits} of {hits + misses} result pages cached ({rate:.0%}), {misses} searched")
+
     if not all_results:
         print("No results found. Try different queries.")
         sys.exit(1)
@@ -234,28 +419,35 @@ def main() -> None:
     output_path = args.output
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    http_cache = None
+    fetch_page: Callable[[str, float], str] = _fetch
+    if not args.no_cache:
+        http_cache = HttpCache(user_agent=USER_AGENT, ttl_seconds=args.cache_ttl_hours * 3600)
+        fetch_page = http_cache.fetch_text
+    fetcher = PoliteFetcher(
+        fetch_page,
+        max_concurrency=args.workers,
+        per_domain=args.per_domain,
+        timeout=20,
+        retries=1,
+    )
+
     with output_path.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "query",
-                "rank",
-                "website",
-                "title",
-                "snippet",
-                "price_snippets",
-                "class_keywords",
-                "offer_keywords",
-                "postcode_guess",
-                "phone_guess",
-            ],
-        )
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
         writer.writeheader()
-        for result in all_results:
-            row = _extract_candidate_fields(result.url, result.title, result.snippet)
-            row.update({"query": result.query, "rank": result.rank})
+        # Rows are written in completion order, so an interrupted run keeps
+        # every candidate enriched so far.
+        for row in enrich_candidates(all_results, fetcher.fetch_text, workers=args.workers):
             writer.writerow(row)
-
+            handle.flush()
+
+    if http_cache is not None:
+        http_cache.save()
+        stats = http_cache.stats
+        print(
+            f"HTTP cache: {stats['fresh']} fresh, {stats['revalidated']} revalidated (304), "
+            f"{stats['fetched']} downloaded"
+        )
     print(f"Wrote candidate list to {output_path}")
 
 
@@ -6,16 +6,18 @@ import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
 
+import history_store
+from web_research import DEFAULT_QUERIES
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 WEB_RESEARCH = BASE_DIR / "analysis" / "web_research.py"
 
 LATEST_CANDIDATES = DATA_DIR / "web_candidates_latest.csv"
-HISTORY_CANDIDATES = DATA_DIR / "web_candidates_history.csv"
 
+COMPETITORS_PATH = DATA_DIR / "competitors_template.csv"
 OFFERS_TEMPLATE = DATA_DIR / "offers_template.csv"
-OFFERS_HISTORY = DATA_DIR / "offers_history.csv"
 PINNED_PATH = DATA_DIR / "pinned_competitors.json"
 
 
@@ -23,30 +25,22 @@ def _utc_date() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
 
-def _append_with_snapshot(input_path: Path, history_path: Path, snapshot_date: str) -> None:
-    if not input_path.exists():
-        print(f"Missing input file: {input_path}")
-        return
-
-    with input_path.open("r", encoding="utf-8", newline="") as handle:
-        reader = csv.DictReader(handle)
-        rows = list(reader)
-        if not rows:
-            print(f"No rows to append from {input_path}")
-            return
+def _load_csv(path: Path) -> list[dict[str, str]]:
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8", newline="") as handle:
+        return list(csv.DictReader(handle))
 
-    fieldnames = list(rows[0].keys())
-    if "snapshot_date" not in fieldnames:
-        fieldnames.append("snapshot_date")
 
-    write_header = not history_path.exists()
-    with history_path.open("a", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        if write_header:
-            writer.writeheader()
-        for row in rows:
-            row["snapshot_date"] = snapshot_date
-            writer.writerow(row)
+def _store_snapshot(input_path: Path, dataset: str, snapshot_date: str) -> None:
+    rows = _load_csv(input_path)
+    if not rows:
+        print(f"No rows to store from {input_path}")
+        return
+    if history_store.write_snapshot(dataset, rows, snapshot_date):
+        print(f"Stored {len(rows)} rows in {dataset} history snapshot {snapshot_date}")
+    else:
+        print(f"{dataset} unchanged since the last snapshot; recorded {snapshot_date} without a copy")
 
 
 def main() -> None:
@@ -77,15 +71,15 @@ def main() -> None:
                 if row and row.get("name"):
                     pinned_queries.append(f"{row['name']} Amsterdam yoga pricing")
 
-    for query in pinned_queries:
+    # Any --query replaces web_research's defaults, so pass them along with
+    # the pins to keep the regular discovery queries running.
+    for query in [*DEFAULT_QUERIES, *pinned_queries]:
         command.extend(["--query", query])
 
     subprocess.run(command, check=True)
 
-    _append_with_snapshot(LATEST_CANDIDATES, HISTORY_CANDIDATES, snapshot_date)
-
-    if OFFERS_TEMPLATE.exists():
-        _append_with_snapshot(OFFERS_TEMPLATE, OFFERS_HISTORY, snapshot_date)
+    _store_snapshot(LATEST_CANDIDATES, "web_candidates", snapshot_date)
+    _store_snapshot(OFFERS_TEMPLATE, "offers", snapshot_date)
 
     print("Refresh complete.")
 
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
 import csv
+import hashlib
+import math
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from typing import Any
 import subprocess
@@ -10,9 +14,12 @@ from datetime import datetime, timezone
 
 import json
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from analysis import offer_store, price_normalization
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
@@ -27,8 +34,12 @@ PINNED_PATH = DATA_DIR / "pinned_competitors.json"
 CLIENT_CONFIG_PATH = DATA_DIR / "client_config.json"
 REFRESH_STATUS_PATH = DATA_DIR / "pricing_refresh_status.json"
 PRICING_CRAWL_PATH = BASE_DIR / "analysis" / "pricing_crawl.py"
+STORE_PATH = offer_store.STORE_PATH
+# Written by `python analysis/benchmark_analysis.py --sweep 4-20`.
+SENSITIVITY_PATH = BASE_DIR / "analysis" / "benchmark_sensitivity.csv"
 
 app = FastAPI(title="Yoga Benchmark")
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 _refresh_lock = threading.Lock()
 _refresh_in_progress = False
 
@@ -41,66 +52,35 @@ def _load_csv(path: Path) -> list[dict[str, Any]]:
         return [row for row in reader]
 
 
-def _price_per_class(offer: dict[str, str], assumed_classes: int = 8) -> str:
-    offer_type = (offer.get("offer_type") or "").strip().lower()
-    price = offer.get("price_eur")
-    sessions = offer.get("sessions_included")
-    if not price:
-        return ""
-    try:
-        price_value = float(price)
-    except ValueError:
-        return ""
-    if offer_type in {"drop_in", "drop-in", "single"}:
-        return f"{price_value:.2f}"
-    if offer_type in {"pack", "bundle"} and sessions:
-        try:
-            sess = float(sessions)
-            if sess > 0:
-                return f"{price_value / sess:.2f}"
-        except ValueError:
-            return ""
-    if offer_type in {"membership", "subscription"}:
-        try:
-            sess = float(sessions) if sessions else float(assumed_classes)
-            if sess > 0:
-                return f"{price_value / sess:.2f}"
-        except ValueError:
-            return ""
+def _price_unit_label(price_unit: str) -> str:
+    if price_unit == "week":
+        return " / week"
+    if price_unit == "month":
+        return " / month"
+    if price_unit == "4_weeks":
+        return " / 4 weeks"
+    if price_unit == "6_months":
+        return " / 6 months"
+    if price_unit == "year":
+        return " / year"
+    if price_unit == "class":
+        return " / class"
     return ""
 
 
-def _build_offer_rows() -> list[dict[str, str]]:
-    competitors = {row.get("competitor_id"): row for row in _load_csv(COMPETITORS_PATH)}
-    offers = _load_csv(OFFERS_PATH)
-
-    if not offers:
-        offers = _load_csv(SAMPLE_OFFERS_DETAILED_PATH)
-        if offers:
-            return offers
-        return _load_csv(SAMPLE_OFFERS_PATH)
-
-    rows: list[dict[str, str]] = []
-    for offer in offers:
-        competitor = competitors.get(offer.get("competitor_id"), {})
+def _build_offer_rows(
+    competitors_by_id: dict[str, dict[str, str]],
+    offers: list[dict[str, str]],
+) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for offer in price_normalization.normalize_offers(offers):
+        competitor = competitors_by_id.get(offer.get("competitor_id"), {})
         studio = competitor.get("name") or competitor.get("brand") or "Unknown"
         tier = competitor.get("tier") or "Unassigned"
         offer_name = offer.get("offer_name") or offer.get("offer_type") or "Offer"
         price = offer.get("price_eur") or ""
         price_unit = offer.get("price_unit") or ""
-        unit_label = ""
-        if price_unit == "week":
-            unit_label = " / week"
-        elif price_unit == "month":
-            unit_label = " / month"
-        elif price_unit == "4_weeks":
-            unit_label = " / 4 weeks"
-        elif price_unit == "6_months":
-            unit_label = " / 6 months"
-        elif price_unit == "year":
-            unit_label = " / year"
-        elif price_unit == "class":
-            unit_label = " / class"
+        unit_label = _price_unit_label(price_unit)
         rows.append(
             {
                 "competitor_id": offer.get("competitor_id") or "",
@@ -116,17 +96,452 @@ def _build_offer_rows() -> list[dict[str, str]]:
                 "price_eur": price,
                 "price_unit": price_unit,
                 "price": f"EUR {price}{unit_label}" if price else "",
-                "price_per_class": _price_per_class(offer),
+                **{name: offer[name] for name in price_normalization.METRIC_FIELDS},
             }
         )
     return rows
 
 
-def _build_competitor_rows() -> list[dict[str, str]]:
-    competitors = _load_csv(COMPETITORS_PATH)
-    if not competitors:
-        return _load_csv(SAMPLE_COMPETITORS_PATH)
-    return competitors
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _json_bytes(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _etag(body: bytes) -> str:
+    return f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+@dataclass
+class _JsonView:
+    """Serialized response body with the validators used for conditional GETs."""
+
+    body: bytes
+    etag: str
+    last_modified: float
+
+    @classmethod
+    def build(cls, payload: Any, last_modified: float) -> "_JsonView":
+        body = _json_bytes(payload)
+        return cls(body=body, etag=_etag(body), last_modified=last_modified)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    opaque = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def _not_modified(request: Request, view: _JsonView) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return _etag_matches(if_none_match, view.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(view.last_modified) <= since
+    return False
+
+
+def _json_view_response(request: Request, view: _JsonView) -> Response:
+    headers = {
+        "ETag": view.etag,
+        "Last-Modified": formatdate(view.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, view):
+        return Response(status_code=304, headers=headers)
+    return Response(content=view.body, media_type="application/json", headers=headers)
+
+
+def _to_float(value: Any) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _RowIndex:
+    """Equality postings, numeric columns and sort orders over a list of rows.
+
+    Built once per dataset version so filtered/paged requests never rescan the
+    raw CSV rows.
+    """
+
+    def __init__(
+        self,
+        rows: list[dict[str, str]],
+        fields: tuple[str, ...],
+        numeric: dict[str, list[float | None]],
+        text_sort_fields: tuple[str, ...] = (),
+        search_fields: tuple[str, ...] = (),
+    ) -> None:
+        self.rows = rows
+        self.numeric = numeric
+        self._search_text = [
+            " ".join(row.get(name) or "" for name in search_fields).casefold() for row in rows
+        ]
+        self.postings: dict[str, dict[str, list[int]]] = {name: {} for name in fields}
+        for position, row in enumerate(rows):
+            for name in fields:
+                value = row.get(name) or ""
+                self.postings[name].setdefault(value, []).append(position)
+        self.sort_keys = set(numeric) | set(text_sort_fields)
+        self._text_sort_fields = text_sort_fields
+        self._orders: dict[str, list[int]] = {}
+
+    def _order(self, key: str) -> list[int]:
+        order = self._orders.get(key)
+        if order is None:
+            if key in self.numeric:
+                values = self.numeric[key]
+                order = sorted(
+                    range(len(self.rows)),
+                    key=lambda pos: (values[pos] is None, values[pos] or 0.0),
+                )
+            else:
+                order = sorted(
+                    range(len(self.rows)),
+                    key=lambda pos: (self.rows[pos].get(key) or "").casefold(),
+                )
+            self._orders[key] = order
+        return order
+
+    def query(
+        self,
+        equals: dict[str, list[str]],
+        ranges: dict[str, tuple[float | None, float | None]],
+        sort: str | None,
+        search: str | None = None,
+    ) -> list[int]:
+        candidates: set[int] | None = None
+        for name, values in equals.items():
+            postings = self.postings[name]
+            matched: set[int] = set()
+            for value in values:
+                matched.update(postings.get(value, ()))
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        for name, (low, high) in ranges.items():
+            column = self.numeric[name]
+            pool = candidates if candidates is not None else range(len(self.rows))
+            candidates = {
+                pos
+                for pos in pool
+                if column[pos] is not None
+                and (low is None or column[pos] >= low)
+                and (high is None or column[pos] <= high)
+            }
+
+        if search:
+            needle = search.casefold()
+            pool = candidates if candidates is not None else range(len(self.rows))
+            candidates = {pos for pos in pool if needle in self._search_text[pos]}
+
+        descending = bool(sort) and sort.startswith("-")
+        key = sort.lstrip("-") if sort else ""
+        if key:
+            order = self._order(key)
+            if descending:
+                # Keep rows without a value at the end in both directions.
+                if key in self.numeric:
+                    values = self.numeric[key]
+                    present = [pos for pos in order if values[pos] is not None]
+                    missing = [pos for pos in order if values[pos] is None]
+                    order = present[::-1] + missing
+                else:
+                    order = order[::-1]
+        else:
+            order = range(len(self.rows))
+        if candidates is None:
+            return list(order)
+        return [pos for pos in order if pos in candidates]
+
+
+EARTH_RADIUS_M = 6371000.0
+# Grid cell size in degrees (~1.1 km north-south); radius and viewport queries
+# only look at the cells they overlap.
+GEO_CELL_DEG = 0.01
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class _GeoIndex:
+    """Fixed-size lat/lng grid over rows with coordinates.
+
+    Rows without a valid latitude/longitude are left out.
+    """
+
+    def __init__(self, rows: list[dict[str, str]], cell_deg: float = GEO_CELL_DEG) -> None:
+        self.rows = rows
+        self._cell_deg = cell_deg
+        self._points: dict[int, tuple[float, float]] = {}
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for position, row in enumerate(rows):
+            lat = _to_float(row.get("latitude"))
+            lng = _to_float(row.get("longitude"))
+            if lat is None or lng is None or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                continue
+            self._points[position] = (lat, lng)
+            self._cells.setdefault(self._cell(lat, lng), []).append(position)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self._cell_deg), math.floor(lng / self._cell_deg)
+
+    def within_bbox(self, south: float, west: float, north: float, east: float) -> list[int]:
+        """Positions inside the box, in row order."""
+        low_row, low_col = self._cell(south, west)
+        high_row, high_col = self._cell(north, east)
+        if (high_row - low_row + 1) * (high_col - low_col + 1) > len(self._cells):
+            cells = [
+                positions
+                for (cell_row, cell_col), positions in self._cells.items()
+                if low_row <= cell_row <= high_row and low_col <= cell_col <= high_col
+            ]
+        else:
+            cells = [
+                self._cells.get((cell_row, cell_col), ())
+                for cell_row in range(low_row, high_row + 1)
+                for cell_col in range(low_col, high_col + 1)
+            ]
+        matched = []
+        for positions in cells:
+            for position in positions:
+                lat, lng = self._points[position]
+                if south <= lat <= north and west <= lng <= east:
+                    matched.append(position)
+        return sorted(matched)
+
+    def nearby(self, lat: float, lng: float, radius_m: float) -> list[tuple[int, float]]:
+        """(position, distance in metres) within radius_m, nearest first."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        coslat = math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+        dlng = min(math.degrees(radius_m / (EARTH_RADIUS_M * coslat)), 180.0)
+        hits = []
+        for position in self.within_bbox(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            distance = _haversine_m(lat, lng, *self._points[position])
+            if distance <= radius_m:
+                hits.append((position, distance))
+        hits.sort(key=lambda item: item[1])
+        return hits
+
+
+@dataclass
+class _Dataset:
+    """Parsed CSVs plus the views served by the API, built once per file version."""
+
+    signature: tuple[Any, ...]
+    competitors: list[dict[str, str]] = field(default_factory=list)
+    competitors_by_id: dict[str, dict[str, str]] = field(default_factory=dict)
+    offers: list[dict[str, str]] = field(default_factory=list)
+    offers_by_competitor: dict[str, list[dict[str, str]]] = field(default_factory=dict)
+    offer_rows: list[dict[str, str]] = field(default_factory=list)
+    competitor_rows: list[dict[str, str]] = field(default_factory=list)
+    offers_view: _JsonView | None = None
+    competitors_view: _JsonView | None = None
+    offers_index: _RowIndex | None = None
+    competitors_index: _RowIndex | None = None
+    competitors_geo: _GeoIndex | None = None
+
+
+class _DatasetCache:
+    """Keep the competitor/offer data in memory and reload when it changes.
+
+    When the SQLite store (data/benchmark.sqlite) exists it is the source and
+    its revision counter decides when to reload; a competitors or offers CSV
+    changed since its last sync (discovery, manual edits) is re-imported
+    first. Otherwise the CSV templates are compared by (mtime, size), so a
+    rewrite by pricing_crawl.py is picked up on the next request without
+    restarting the server.
+    """
+
+    SOURCES = (
+        COMPETITORS_PATH,
+        OFFERS_PATH,
+        SAMPLE_OFFERS_DETAILED_PATH,
+        SAMPLE_OFFERS_PATH,
+        SAMPLE_COMPETITORS_PATH,
+    )
+    STORE_CSVS = (("competitors", COMPETITORS_PATH), ("offers", OFFERS_PATH))
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._dataset: _Dataset | None = None
+        self._store = None
+
+    def _store_connection(self):
+        if self._store is None:
+            self._store = offer_store.connect(STORE_PATH)
+        return self._store
+
+    def _signature(self) -> tuple[Any, ...]:
+        if STORE_PATH.exists():
+            with self._lock:
+                conn = self._store_connection()
+                offer_store.sync_csvs(conn, self.STORE_CSVS)
+                return ("store", offer_store.read_revision(conn))
+        return ("csv", *(_file_signature(path) for path in self.SOURCES))
+
+    def get(self) -> _Dataset:
+        signature = self._signature()
+        dataset = self._dataset
+        if dataset is not None and dataset.signature == signature:
+            return dataset
+        with self._lock:
+            dataset = self._dataset
+            if dataset is None or dataset.signature != signature:
+                dataset = self._load(signature)
+                self._dataset = dataset
+        return dataset
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._dataset = None
+
+    def _load(self, signature: tuple[Any, ...]) -> _Dataset:
+        if signature[0] == "store":
+            conn = self._store_connection()
+            competitors, offers, revision = offer_store.load_dataset(conn)
+            signature = ("store", revision)
+            last_modified = offer_store.read_updated_at(conn)
+        else:
+            competitors = _load_csv(COMPETITORS_PATH)
+            offers = _load_csv(OFFERS_PATH)
+            mtimes = [item[0] / 1e9 for item in signature[1:] if item is not None]
+            last_modified = max(mtimes) if mtimes else 0.0
+        if not last_modified:
+            last_modified = datetime.now(timezone.utc).timestamp()
+        competitors_by_id = {row.get("competitor_id"): row for row in competitors}
+
+        offers_by_competitor: dict[str, list[dict[str, str]]] = {}
+        for offer in offers:
+            offers_by_competitor.setdefault(offer.get("competitor_id") or "", []).append(offer)
+
+        if offers:
+            offer_rows = _build_offer_rows(competitors_by_id, offers)
+        else:
+            offer_rows = price_normalization.normalize_offers(
+                _load_csv(SAMPLE_OFFERS_DETAILED_PATH) or _load_csv(SAMPLE_OFFERS_PATH)
+            )
+        competitor_rows = competitors or _load_csv(SAMPLE_COMPETITORS_PATH)
+
+        return _Dataset(
+            signature=signature,
+            competitors=competitors,
+            competitors_by_id=competitors_by_id,
+            offers=offers,
+            offers_by_competitor=offers_by_competitor,
+            offer_rows=offer_rows,
+            competitor_rows=competitor_rows,
+            offers_view=_JsonView.build(offer_rows, last_modified),
+            competitors_view=_JsonView.build(competitor_rows, last_modified),
+            offers_index=_build_offers_index(offer_rows, competitors_by_id),
+            competitors_index=_build_competitors_index(competitor_rows),
+            competitors_geo=_GeoIndex(competitor_rows),
+        )
+
+
+OFFER_FILTER_FIELDS = ("tier", "offer_type", "class_type", "heat", "competitor_id")
+COMPETITOR_FILTER_FIELDS = ("tier", "segment", "competitor_id")
+
+
+def _build_offers_index(
+    offer_rows: list[dict[str, str]],
+    competitors_by_id: dict[str, dict[str, str]],
+) -> _RowIndex:
+    bike_minutes = []
+    for row in offer_rows:
+        competitor = competitors_by_id.get(row.get("competitor_id"), {})
+        bike_minutes.append(_to_float(competitor.get("distance_bike_min")))
+    return _RowIndex(
+        offer_rows,
+        OFFER_FILTER_FIELDS,
+        numeric={
+            "price_eur": [_to_float(row.get("price_eur")) for row in offer_rows],
+            "price_per_class": [_to_float(row.get("price_per_class")) for row in offer_rows],
+            "distance_bike_min": bike_minutes,
+        },
+        text_sort_fields=("studio", "tier", "offer_type"),
+        search_fields=("studio", "offer"),
+    )
+
+
+def _build_competitors_index(competitor_rows: list[dict[str, str]]) -> _RowIndex:
+    return _RowIndex(
+        competitor_rows,
+        COMPETITOR_FILTER_FIELDS,
+        numeric={
+            "distance_bike_min": [_to_float(row.get("distance_bike_min")) for row in competitor_rows],
+            "distance_walk_min": [_to_float(row.get("distance_walk_min")) for row in competitor_rows],
+        },
+        text_sort_fields=("name", "tier"),
+        search_fields=("name", "brand", "address", "city"),
+    )
+
+
+_datasets = _DatasetCache()
+
+
+def _query_response(
+    request: Request,
+    index: _RowIndex,
+    last_modified: float,
+    equals: dict[str, list[str] | None],
+    ranges: dict[str, tuple[float | None, float | None]],
+    sort: str | None,
+    limit: int | None,
+    cursor: str | None,
+    search: str | None = None,
+) -> Response:
+    """Filter/sort/page an index; the next page offset is returned in X-Next-Cursor."""
+    if sort and sort.lstrip("-") not in index.sort_keys:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sort key '{sort}'. Use one of: {', '.join(sorted(index.sort_keys))}",
+        )
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    positions = index.query(
+        {name: values for name, values in equals.items() if values},
+        {name: bounds for name, bounds in ranges.items() if bounds != (None, None)},
+        sort,
+        search,
+    )
+    end = offset + limit if limit else len(positions)
+    page = [index.rows[pos] for pos in positions[offset:end]]
+    response = _json_view_response(request, _JsonView.build(page, last_modified))
+    response.headers["X-Total-Count"] = str(len(positions))
+    if end < len(positions):
+        response.headers["X-Next-Cursor"] = str(end)
+    return response
 
 
 def _write_refresh_status(payload: dict[str, Any]) -> None:
@@ -147,7 +562,7 @@ def _load_refresh_status() -> dict[str, Any]:
     return data
 
 
-def _run_pricing_refresh(limit: int) -> None:
+def _run_pricing_refresh(limit: int, pool_size: int | None = None) -> None:
     global _refresh_in_progress
     start_time = datetime.now(timezone.utc).isoformat()
     _write_refresh_status(
@@ -158,16 +573,24 @@ def _run_pricing_refresh(limit: int) -> None:
             "in_progress": True,
         }
     )
+    command = [
+        sys.executable,
+        str(PRICING_CRAWL_PATH),
+        "--limit",
+        str(limit),
+        "--update-competitors",
+        "--fetch-mode",
+        "auto",
+        # Picks up where a timed-out or crashed refresh stopped.
+        "--resume",
+    ]
+    if pool_size:
+        command.extend(["--pool-size", str(pool_size)])
+    if STORE_PATH.exists():
+        command.extend(["--db", str(STORE_PATH)])
     try:
         result = subprocess.run(
-            [
-                sys.executable,
-                str(PRICING_CRAWL_PATH),
-                "--limit",
-                str(limit),
-                "--update-competitors",
-                "--use-playwright",
-            ],
+            command,
             capture_output=True,
             text=True,
             timeout=1800,
@@ -197,17 +620,188 @@ def _run_pricing_refresh(limit: int) -> None:
             }
         )
     finally:
+        _datasets.invalidate()
         _refresh_in_progress = False
 
 
 @app.get("/api/offers")
-def get_offers() -> list[dict[str, str]]:
-    return _build_offer_rows()
+def get_offers(
+    request: Request,
+    tier: list[str] | None = Query(None),
+    offer_type: list[str] | None = Query(None),
+    class_type: list[str] | None = Query(None),
+    heat: list[str] | None = Query(None),
+    competitor_id: list[str] | None = Query(None),
+    min_price: float | None = None,
+    max_price: float | None = None,
+    max_bike_min: float | None = None,
+    q: str | None = None,
+    sort: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+) -> Response:
+    dataset = _datasets.get()
+    if not request.query_params:
+        return _json_view_response(request, dataset.offers_view)
+    return _query_response(
+        request,
+        dataset.offers_index,
+        dataset.offers_view.last_modified,
+        equals={
+            "tier": tier,
+            "offer_type": offer_type,
+            "class_type": class_type,
+            "heat": heat,
+            "competitor_id": competitor_id,
+        },
+        ranges={
+            "price_eur": (min_price, max_price),
+            "distance_bike_min": (None, max_bike_min),
+        },
+        sort=sort,
+        limit=limit,
+        cursor=cursor,
+        search=q,
+    )
 
 
 @app.get("/api/competitors")
-def get_competitors() -> list[dict[str, str]]:
-    return _build_competitor_rows()
+def get_competitors(
+    request: Request,
+    tier: list[str] | None = Query(None),
+    segment: list[str] | None = Query(None),
+    competitor_id: list[str] | None = Query(None),
+    max_bike_min: float | None = None,
+    q: str | None = None,
+    sort: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+) -> Response:
+    dataset = _datasets.get()
+    if not request.query_params:
+        return _json_view_response(request, dataset.competitors_view)
+    return _query_response(
+        request,
+        dataset.competitors_index,
+        dataset.competitors_view.last_modified,
+        equals={"tier": tier, "segment": segment, "competitor_id": competitor_id},
+        ranges={"distance_bike_min": (None, max_bike_min)},
+        sort=sort,
+        limit=limit,
+        cursor=cursor,
+        search=q,
+    )
+
+
+@app.get("/api/competitors/nearby")
+def get_competitors_nearby(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(..., gt=0, le=100_000),
+    tier: list[str] | None = Query(None),
+    segment: list[str] | None = Query(None),
+    q: str | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+) -> Response:
+    """Competitors within radius_m of a point, nearest first, with distance_m added.
+
+    tier, segment and q filter like on /api/competitors.
+    """
+    dataset = _datasets.get()
+    hits = dataset.competitors_geo.nearby(lat, lng, radius_m)
+    equals = {name: values for name, values in (("tier", tier), ("segment", segment)) if values}
+    if equals or q:
+        matches = set(dataset.competitors_index.query(equals, {}, None, q))
+        hits = [(position, distance) for position, distance in hits if position in matches]
+    hits = hits[:limit]
+    rows = [
+        {**dataset.competitor_rows[position], "distance_m": round(distance)}
+        for position, distance in hits
+    ]
+    return _json_view_response(request, _JsonView.build(rows, dataset.competitors_view.last_modified))
+
+
+@app.get("/api/competitors/bbox")
+def get_competitors_bbox(
+    request: Request,
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+) -> Response:
+    """Competitors inside a map viewport (e.g. Leaflet's getBounds())."""
+    if south > north or west > east:
+        raise HTTPException(status_code=400, detail="Expected south <= north and west <= east")
+    dataset = _datasets.get()
+    positions = dataset.competitors_geo.within_bbox(south, west, north, east)
+    rows = [dataset.competitor_rows[position] for position in positions]
+    return _json_view_response(request, _JsonView.build(rows, dataset.competitors_view.last_modified))
+
+
+class _SensitivityCache:
+    """The sensitivity sweep summary as numeric rows, reloaded when the file changes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._signature: tuple[int, int] | None = None
+        self._rows: list[dict[str, Any]] = []
+        self._view: _JsonView | None = None
+
+    def get(self) -> tuple[list[dict[str, Any]], _JsonView] | None:
+        signature = _file_signature(SENSITIVITY_PATH)
+        if signature is None:
+            return None
+        with self._lock:
+            if signature != self._signature:
+                rows = []
+                for row in _load_csv(SENSITIVITY_PATH):
+                    count = _to_float(row.get("count"))
+                    rows.append(
+                        {
+                            "assumed_classes": int(float(row.get("assumed_classes") or 0)),
+                            "tier": row.get("tier") or "",
+                            "offer_type": row.get("offer_type") or "",
+                            "count": int(count) if count is not None else 0,
+                            "min": _to_float(row.get("min")),
+                            "median": _to_float(row.get("median")),
+                            "max": _to_float(row.get("max")),
+                        }
+                    )
+                self._rows = rows
+                self._view = _JsonView.build(rows, signature[0] / 1e9)
+                self._signature = signature
+            return self._rows, self._view
+
+
+_sensitivity = _SensitivityCache()
+
+
+@app.get("/api/sensitivity")
+def get_sensitivity(
+    request: Request,
+    tier: list[str] | None = Query(None),
+    offer_type: list[str] | None = Query(None),
+    assumed_classes: list[int] | None = Query(None),
+) -> Response:
+    """Price per class (count/min/median/max) by assumed classes per month, tier and offer type."""
+    loaded = _sensitivity.get()
+    if loaded is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No sensitivity sweep yet. Run: python analysis/benchmark_analysis.py --sweep 4-20",
+        )
+    rows, view = loaded
+    if not request.query_params:
+        return _json_view_response(request, view)
+    rows = [
+        row
+        for row in rows
+        if (not tier or row["tier"] in tier)
+        and (not offer_type or row["offer_type"] in offer_type)
+        and (not assumed_classes or row["assumed_classes"] in assumed_classes)
+    ]
+    return _json_view_response(request, _JsonView.build(rows, view.last_modified))
 
 
 @app.get("/api/pins")
@@ -254,6 +848,10 @@ def refresh_pricing(payload: dict[str, Any]) -> dict[str, Any]:
             limit = int(limit)
         except (TypeError, ValueError):
             limit = 10
+        try:
+            pool_size = max(1, int(payload["pool_size"])) if payload.get("pool_size") else None
+        except (TypeError, ValueError):
+            pool_size = None
         _write_refresh_status(
             {
                 "status": "running",
@@ -262,7 +860,7 @@ def refresh_pricing(payload: dict[str, Any]) -> dict[str, Any]:
                 "in_progress": True,
             }
         )
-        thread = threading.Thread(target=_run_pricing_refresh, args=(limit,), daemon=True)
+        thread = threading.Thread(target=_run_pricing_refresh, args=(limit, pool_size), daemon=True)
         thread.start()
     return _load_refresh_status()
 
@@ -282,14 +880,13 @@ def get_own_studio() -> dict[str, Any]:
         return {}
     
     # Load competitor data
-    competitors = _load_csv(COMPETITORS_PATH)
-    competitor = next((c for c in competitors if c.get("competitor_id") == active_client_id), None)
+    dataset = _datasets.get()
+    competitor = dataset.competitors_by_id.get(active_client_id)
     if not competitor:
         return {}
     
     # Load offers for this client
-    all_offers = _load_csv(OFFERS_PATH)
-    client_offers = [o for o in all_offers if o.get("competitor_id") == active_client_id]
+    client_offers = dataset.offers_by_competitor.get(active_client_id, [])
     
     # Build response matching old format
     return {
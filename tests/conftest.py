@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The analysis scripts import their siblings by bare name.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "analysis"))
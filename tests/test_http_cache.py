@@ -0,0 +1,41 @@
+"""Runs sharing one cache directory keep each other's entries."""
+
+from http_cache import HttpCache
+
+
+def _store(cache, url, text):
+    cache._store(cache._key(url), url, text, etag="", last_modified="")
+
+
+def test_save_merges_entries_from_another_run(tmp_path):
+    first, second = HttpCache(tmp_path), HttpCache(tmp_path)
+    _store(first, "https://a.example/", "a")
+    _store(second, "https://b.example/", "b")
+    first.save()
+    second.save()
+    urls = {entry.url for entry in HttpCache(tmp_path)._entries.values()}
+    assert urls == {"https://a.example/", "https://b.example/"}
+    assert not (tmp_path / "index.lock").exists()
+
+
+def test_entries_evicted_by_another_run_are_dropped(tmp_path):
+    first = HttpCache(tmp_path, max_bytes=10)
+    second = HttpCache(tmp_path, max_bytes=10)
+    _store(second, "https://old.example/", "x" * 8)
+    second.save()
+    _store(first, "https://new.example/", "y" * 8)
+    first.save()
+    second.save()
+    cache = HttpCache(tmp_path)
+    assert {entry.url for entry in cache._entries.values()} == {"https://new.example/"}
+    assert sorted(path.name for path in tmp_path.glob("*.html")) == [f"{HttpCache._key('https://new.example/')}.html"]
+
+
+def test_truncated_body_is_not_served(tmp_path):
+    cache = HttpCache(tmp_path)
+    url = "https://a.example/"
+    _store(cache, url, "<p>full page</p>")
+    key = cache._key(url)
+    assert cache._read_body(key, cache._entries[key]) == "<p>full page</p>"
+    cache._body_path(key).write_text("<p>fu", encoding="utf-8")
+    assert cache._read_body(key, cache._entries[key]) is None
@@ -0,0 +1,37 @@
+"""Golden-output test for offer_extraction.infer_offer_fields.
+
+tests/data/offer_extraction_golden.json holds the field values the original
+per-field _infer_* helpers in pricing_crawl.py produced for the contexts in
+data/pricing_pages.csv plus 600 seeded synthetic contexts built from the
+hint tables. After an intended change to the rules, regenerate it with
+UPDATE_GOLDEN=1 python -m pytest tests/test_offer_extraction.py and review
+the diff.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from offer_extraction import infer_offer_fields
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "data" / "offer_extraction_golden.json"
+CASES = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+
+
+def test_update_golden():
+    if not os.getenv("UPDATE_GOLDEN"):
+        pytest.skip("set UPDATE_GOLDEN=1 to rewrite the golden file")
+    for case in CASES:
+        fields = infer_offer_fields(case["context"], case["raw_price"])
+        case["fields"] = {name: fields[name] for name in case["fields"]}
+    lines = ",\n".join(json.dumps(case, ensure_ascii=False) for case in CASES)
+    GOLDEN_PATH.write_text(f"[\n{lines}\n]\n", encoding="utf-8")
+
+
+@pytest.mark.parametrize("index", range(len(CASES)))
+def test_infer_offer_fields_matches_golden(index):
+    case = CASES[index]
+    fields = infer_offer_fields(case["context"], case["raw_price"])
+    assert {name: fields[name] for name in case["fields"]} == case["fields"], case["context"]
@@ -0,0 +1,36 @@
+import csv
+import os
+
+import offer_store
+
+
+def _write(path, rows):
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=offer_store.COMPETITOR_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_sync_reimports_only_changed_csvs(tmp_path):
+    path = tmp_path / "competitors.csv"
+    _write(path, [{"competitor_id": "a", "name": "Studio A"}])
+    conn = offer_store.connect(tmp_path / "store.sqlite")
+    offer_store.import_csv(conn, "competitors", path)
+    revision = offer_store.read_revision(conn)
+
+    assert offer_store.sync_csvs(conn, [("competitors", path)]) == []
+    assert offer_store.read_revision(conn) == revision
+
+    _write(path, [{"competitor_id": "a", "name": "Studio A"}, {"competitor_id": "b", "name": "Studio B"}])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert offer_store.sync_csvs(conn, [("competitors", path)]) == ["competitors"]
+    assert [row["competitor_id"] for row in offer_store.load_rows(conn, "competitors")] == ["a", "b"]
+    assert offer_store.read_revision(conn) > revision
+    conn.close()
+
+
+def test_sync_ignores_missing_csv(tmp_path):
+    conn = offer_store.connect(tmp_path / "store.sqlite")
+    assert offer_store.sync_csvs(conn, [("offers", tmp_path / "missing.csv")]) == []
+    conn.close()
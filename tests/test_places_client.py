@@ -0,0 +1,65 @@
+"""Paged searches are cached only when every page was read."""
+
+import pytest
+
+import places_client
+from places_client import PlacesClient, PlacesError
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(places_client.time, "sleep", lambda seconds: None)
+
+
+def _client(tmp_path, pages, **kwargs):
+    """A client whose requests answer with pages in order."""
+    calls = []
+
+    def fetch_json(url):
+        calls.append(url)
+        return pages[min(len(calls), len(pages)) - 1]
+
+    return PlacesClient("key", cache_path=tmp_path / "places.sqlite", fetch_json=fetch_json, **kwargs), calls
+
+
+def _page(names, token=None, status="OK"):
+    data = {"status": status, "results": [{"place_id": name} for name in names]}
+    if token:
+        data["next_page_token"] = token
+    return data
+
+
+def test_complete_search_is_cached(tmp_path):
+    client, calls = _client(tmp_path, [_page(["a"], "t1"), _page(["b"])])
+    assert [item["place_id"] for item in client.text_search("yoga")] == ["a", "b"]
+    results = client.text_search("yoga")
+    assert [item["place_id"] for item in results] == ["a", "b"] and results.complete
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("status", ["OVER_QUERY_LIMIT", "REQUEST_DENIED", "UNKNOWN_ERROR"])
+def test_failed_follow_up_page_raises_and_is_not_cached(tmp_path, status):
+    client, calls = _client(tmp_path, [_page(["a"], "t1"), _page([], status=status)])
+    with pytest.raises(PlacesError):
+        client.text_search("yoga")
+    assert not _keys(client)
+
+
+def test_page_token_that_never_becomes_valid_raises(tmp_path):
+    client, calls = _client(tmp_path, [_page(["a"], "t1"), _page([], status="INVALID_REQUEST")])
+    with pytest.raises(PlacesError):
+        client.text_search("yoga")
+    assert len(calls) == 1 + len(places_client.PAGE_TOKEN_DELAYS)
+    assert not _keys(client)
+
+
+def test_budget_spent_mid_pagination_keeps_partial_results_uncached(tmp_path):
+    client, calls = _client(tmp_path, [_page(["a"], "t1"), _page(["b"], "t2"), _page(["c"])], max_requests=2)
+    results = client.text_search("yoga")
+    assert [item["place_id"] for item in results] == ["a", "b"]
+    assert not results.complete
+    assert not _keys(client)
+
+
+def _keys(client):
+    return [row[0] for row in client._conn.execute("SELECT key FROM responses")]
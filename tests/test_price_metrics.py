@@ -0,0 +1,69 @@
+"""The column-wise offer_metrics must agree with the row-level price_normalization."""
+
+import csv
+import math
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import offer_metrics
+import price_normalization
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+OFFER_COLUMNS = ["offer_type", "price_eur", "sessions_included", "duration_days"]
+
+
+def _sample_offers() -> list[dict[str, str]]:
+    offers = []
+    for name in ("offers_template.csv", "offers_curated.csv", "offers_auto.csv"):
+        path = DATA_DIR / name
+        if path.exists():
+            with path.open("r", encoding="utf-8", newline="") as handle:
+                offers += [{column: row.get(column) or "" for column in OFFER_COLUMNS} for row in csv.DictReader(handle)]
+    rng = random.Random(7)
+    types = ["drop_in", "Drop-In ", "single", "pack", "bundle", "membership", "Subscription", "intro", "", "other"]
+    numbers = ["", "0", "-3", "1", "4", "10", "12.5", "abc", "30", "365"]
+    for _ in range(2000):
+        offers.append(
+            {
+                "offer_type": rng.choice(types),
+                "price_eur": rng.choice(numbers + ["99", "1150"]),
+                "sessions_included": rng.choice(numbers),
+                "duration_days": rng.choice(numbers),
+            }
+        )
+    return offers
+
+
+OFFERS = _sample_offers()
+FRAME = pd.DataFrame(OFFERS)
+
+
+def _same(expected: float | None, actual: float) -> bool:
+    if expected is None:
+        return math.isnan(actual)
+    return actual == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("assumed_classes", [4, 8, 12])
+def test_price_per_class_matches_row_level(assumed_classes):
+    column = offer_metrics.price_per_class(FRAME, assumed_classes)
+    for offer, actual in zip(OFFERS, column):
+        expected = price_normalization.price_per_class(offer, assumed_classes)
+        assert _same(expected, actual), offer
+
+
+def test_sweep_matches_row_level():
+    levels = [6, 10]
+    sweep = offer_metrics.price_per_class_sweep(FRAME, levels)
+    for offer, row in zip(OFFERS, sweep):
+        for level, actual in zip(levels, row):
+            assert _same(price_normalization.price_per_class(offer, level), actual), offer
+
+
+def test_monthly_equivalent_matches_row_level():
+    column = offer_metrics.monthly_equivalent(FRAME)
+    for offer, actual in zip(OFFERS, column):
+        assert _same(price_normalization.monthly_equivalent(offer), actual), offer
@@ -0,0 +1,95 @@
+"""The incremental crawl must never skip a competitor whose offers are gone."""
+
+import csv
+import sys
+
+import pytest
+
+import offer_store
+import pricing_crawl
+from pricing_crawl import CompetitorCrawl
+
+COMPETITORS = [
+    {"competitor_id": f"test-{index}", "name": f"Studio {index}", "website": "", "distance_bike_min": str(index)}
+    for index in range(3)
+]
+
+
+class FakePlaces:
+    stats = {"requests": 0, "cached": 0}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def map(self, func, rows):
+        return [f"https://{row['competitor_id']}.example/" for row in rows]
+
+
+def _fake_crawl_all(targets, fetch_text, workers, extractions=None, on_result=None, booking_fetch=None):
+    results = []
+    for row, website in targets:
+        competitor_id = row["competitor_id"]
+        result = CompetitorCrawl(
+            competitor_id=competitor_id,
+            website=website,
+            pricing_rows=[{"competitor_id": competitor_id, "source_url": website, "price_raw": "€20"}],
+            offer_rows=[
+                {"competitor_id": competitor_id, "offer_type": "drop_in", "price_eur": "20", "source_url": website}
+            ],
+            page_hashes={website: "same"},
+        )
+        if on_result is not None:
+            on_result(row, result)
+        results.append((row, result))
+    return results
+
+
+@pytest.fixture
+def crawl(tmp_path, monkeypatch):
+    for name in ("PRICING_PAGES_PATH", "OFFERS_AUTO_PATH", "OFFERS_TEMPLATE_PATH", "CRAWL_STATE_PATH", "CRAWL_JOURNAL_PATH"):
+        monkeypatch.setattr(pricing_crawl, name, tmp_path / name.lower())
+    monkeypatch.setattr(pricing_crawl, "PINS_PATH", tmp_path / "pins.json")
+    monkeypatch.setattr(offer_store, "STORE_PATH", tmp_path / "benchmark.sqlite")
+    monkeypatch.setattr(pricing_crawl, "read_key", lambda: "key")
+    monkeypatch.setattr(pricing_crawl, "PlacesClient", FakePlaces)
+    monkeypatch.setattr(pricing_crawl, "_load_competitors", lambda: [dict(row) for row in COMPETITORS])
+    monkeypatch.setattr(pricing_crawl, "_crawl_all", _fake_crawl_all)
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["pricing_crawl.py", "--no-cache", *args])
+        pricing_crawl.main()
+        with pricing_crawl.OFFERS_TEMPLATE_PATH.open("r", encoding="utf-8", newline="") as handle:
+            return sorted({row["competitor_id"] for row in csv.DictReader(handle)})
+
+    return run
+
+
+def test_incremental_recrawls_competitors_dropped_by_a_smaller_full_crawl(crawl):
+    assert crawl("--limit", "3") == ["test-0", "test-1", "test-2"]
+    assert crawl("--limit", "1") == ["test-0"]
+    assert crawl("--incremental", "--max-age-days", "0", "--limit", "3") == ["test-0", "test-1", "test-2"]
+
+
+def test_incremental_does_not_treat_dropped_competitors_as_fresh(crawl):
+    crawl("--limit", "3")
+    crawl("--limit", "1")
+    assert crawl("--incremental", "--limit", "3") == ["test-0", "test-1", "test-2"]
+
+
+def test_full_crawl_forgets_competitors_that_failed(crawl, monkeypatch):
+    crawl("--limit", "3")
+
+    def failing(targets, *args, **kwargs):
+        results = _fake_crawl_all(targets, *args, **kwargs)
+        return [(row, None if row["competitor_id"] == "test-2" else result) for row, result in results]
+
+    monkeypatch.setattr(pricing_crawl, "_crawl_all", failing)
+    assert crawl("--limit", "3") == ["test-0", "test-1"]
+    monkeypatch.setattr(pricing_crawl, "_crawl_all", _fake_crawl_all)
+    assert crawl("--incremental", "--limit", "3") == ["test-0", "test-1", "test-2"]
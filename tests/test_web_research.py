@@ -0,0 +1,32 @@
+"""Candidate enrichment reads each site once."""
+
+from web_research import SearchResult, enrich_candidates, registrable_domain
+
+
+def test_registrable_domain():
+    assert registrable_domain("https://www.shop.example.nl/prices?x=1") == "example.nl"
+    assert registrable_domain("http://example.nl:8080/") == "example.nl"
+    assert registrable_domain("https://studio.example.co.uk/") == "example.co.uk"
+    assert registrable_domain("http://127.0.0.1/page") == "127.0.0.1"
+
+
+def test_enrich_fetches_each_site_once():
+    results = [
+        SearchResult(query="yoga", rank=1, url="https://example.nl/prices", title="Prices", snippet=""),
+        SearchResult(query="yoga", rank=2, url="https://www.example.nl/schedule", title="Schedule", snippet=""),
+        SearchResult(query="hot yoga", rank=1, url="https://other.nl/", title="Other", snippet=""),
+    ]
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return "<p>Drop-in €22</p>"
+
+    rows = list(enrich_candidates(results, fetch, workers=2))
+    assert sorted(fetched) == ["https://example.nl/prices", "https://other.nl/"]
+    assert sorted(row["website"] for row in rows) == [
+        "https://example.nl/prices",
+        "https://other.nl/",
+        "https://www.example.nl/schedule",
+    ]
+    assert all(row["price_snippets"] == "€22" for row in rows)
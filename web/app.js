@@ -1,5 +1,5 @@
-const offersBody = document.getElementById("offers-body");
-const competitorsBody = document.getElementById("competitors-body");
+const offersBody = document.getElementById("all-offers-body");
+const competitorsBody = document.getElementById("competitor-list-body");
 const benchmarkBody = document.getElementById("benchmark-body");
 const competitorBenchmarkBody = document.getElementById("competitor-benchmark-body");
 const competitorDetail = document.getElementById("competitor-detail");
@@ -115,13 +115,6 @@ const ownLocations = [
 let pinnedCompetitors = new Set();
 window._selectedCompetitorName = "";
 window._ownStudioOffers = [];
-window._filterState = {
-  searchQuery: "",
-  tierFilter: "all",
-  segmentFilter: [],
-  distanceMax: 30,
-  showComparableOnly: false,
-};
 
 // ============================================================================
 // COMPARABILITY SCORING
@@ -352,16 +345,176 @@ function setRefreshStatus(message) {
 
 setStatus("Status: JS loaded");
 
+// ============================================================================
+// PAGED TABLES
+// ============================================================================
+
+// The offer and competitor tables fetch one page at a time from the server's
+// filtered, sorted endpoints; X-Total-Count and X-Next-Cursor drive the
+// "Load more" buttons.
+const PAGE_SIZE = 50;
+
+const tablePages = {
+  offers: { rows: [], total: 0, nextCursor: null, request: 0 },
+  competitors: { rows: [], pinned: [], total: 0, nextCursor: null, request: 0 },
+};
+
+function apiUrl(path, params) {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    (Array.isArray(value) ? value : [value]).forEach((item) => {
+      if (item !== undefined && item !== null && item !== "") {
+        search.append(key, item);
+      }
+    });
+  });
+  const query = search.toString();
+  return query ? `${path}?${query}` : path;
+}
+
+function fetchPage(path, params) {
+  return fetch(apiUrl(path, params)).then((response) => {
+    if (!response.ok) {
+      return Promise.reject();
+    }
+    return response.json().then((rows) => ({
+      rows,
+      total: Number(response.headers.get("X-Total-Count") || rows.length),
+      nextCursor: response.headers.get("X-Next-Cursor"),
+    }));
+  });
+}
+
+function currentFilterParams() {
+  return typeof filterParams === "function" ? filterParams() : {};
+}
+
+function updateLoadMore(buttonId, page) {
+  const button = document.getElementById(buttonId);
+  if (button) {
+    button.hidden = !page.nextCursor;
+    button.textContent = `Load more (${page.rows.length} of ${page.total})`;
+  }
+}
+
+function loadOfferPage(append = false) {
+  const page = tablePages.offers;
+  const request = ++page.request;
+  const { tier, q } = currentFilterParams();
+  const params = { tier, q, sort: "studio", limit: PAGE_SIZE, cursor: append ? page.nextCursor : "" };
+  return fetchPage("/api/offers", params)
+    .then((result) => {
+      // A newer filter change has superseded this request.
+      if (request !== page.request) {
+        return;
+      }
+      page.rows = append ? [...page.rows, ...result.rows] : result.rows;
+      page.total = result.total;
+      page.nextCursor = result.nextCursor;
+      renderOfferRows(page.rows);
+      updateLoadMore("offers-load-more", page);
+    })
+    .catch(() => {
+      if (request === page.request) {
+        renderOfferRows(fallbackOffers);
+      }
+    });
+}
+
+// With a distance filter the list is every match within radius_m of the
+// nearest Movements studio, nearest first, from /api/competitors/nearby.
+function loadNearbyCompetitors(filters) {
+  const { radius_m: radius, tier, segment, q } = filters;
+  const requests = ownLocations.map((studio) =>
+    fetch(apiUrl("/api/competitors/nearby", { lat: studio.latitude, lng: studio.longitude, radius_m: radius, tier, segment, q }))
+      .then((response) => (response.ok ? response.json() : Promise.reject()))
+  );
+  return Promise.all(requests).then((results) => {
+    const nearest = new Map();
+    results.flat().forEach((row) => {
+      const known = nearest.get(row.competitor_id);
+      if (!known || row.distance_m < known.distance_m) {
+        nearest.set(row.competitor_id, row);
+      }
+    });
+    const rows = [...nearest.values()].sort((a, b) => a.distance_m - b.distance_m);
+    return { rows, total: rows.length, nextCursor: null };
+  });
+}
+
+function loadCompetitorPage(append = false) {
+  const page = tablePages.competitors;
+  const request = ++page.request;
+  const filters = currentFilterParams();
+  if (filters.radius_m) {
+    return loadNearbyCompetitors(filters)
+      .then((result) => {
+        if (request !== page.request) {
+          return;
+        }
+        Object.assign(page, result, { pinned: [] });
+        window._competitors = page.rows;
+        renderCompetitorRows(page.rows);
+        updateLoadMore("competitors-load-more", page);
+        if (typeof updateFilterStatus === "function") {
+          updateFilterStatus(page.rows.length, page.total);
+        }
+      })
+      .catch(() => {
+        if (request === page.request) {
+          renderCompetitorRows([]);
+        }
+      });
+  }
+  const listFilters = { ...filters };
+  delete listFilters.radius_m;
+  const params = { ...listFilters, sort: "distance_bike_min", limit: PAGE_SIZE, cursor: append ? page.nextCursor : "" };
+  // Pinned competitors that match the filters are listed first, whatever page they are on.
+  const pinnedIds = Array.from(pinnedCompetitors);
+  const pinnedRequest = !append && pinnedIds.length
+    ? fetchPage("/api/competitors", { ...listFilters, competitor_id: pinnedIds }).then((result) => result.rows)
+    : Promise.resolve(page.pinned);
+  return Promise.all([fetchPage("/api/competitors", params), pinnedRequest])
+    .then(([result, pinned]) => {
+      if (request !== page.request) {
+        return;
+      }
+      page.pinned = append ? page.pinned : pinned;
+      page.rows = append ? [...page.rows, ...result.rows] : result.rows;
+      page.total = result.total;
+      page.nextCursor = result.nextCursor;
+      const pinnedIdSet = new Set(page.pinned.map((row) => row.competitor_id));
+      window._competitors = [...page.pinned, ...page.rows.filter((row) => !pinnedIdSet.has(row.competitor_id))];
+      renderCompetitorRows(window._competitors);
+      updateLoadMore("competitors-load-more", page);
+      if (typeof updateFilterStatus === "function") {
+        updateFilterStatus(page.rows.length, page.total);
+      }
+    })
+    .catch(() => {
+      if (request === page.request) {
+        window._competitors = fallbackCompetitors;
+        renderCompetitorRows(fallbackCompetitors);
+      }
+    });
+}
+
 function renderOfferRows(rows) {
   offersBody.innerHTML = "";
-  rows.slice(0, 50).forEach((row) => {
+  rows.forEach((row) => {
     const tr = document.createElement("tr");
-    const offerLabel = formatOfferLabel(row);
     tr.innerHTML = `
       <td>${row.studio || ""}</td>
       <td>${row.tier || ""}</td>
-      <td>${offerLabel}</td>
+      <td>${row.offer || row.offer_name || ""}</td>
+      <td>${row.offer_type || ""}</td>
+      <td>${row.class_type || ""}</td>
+      <td>${row.heat || ""}</td>
+      <td>${row.class_length_min ? `${row.class_length_min}m` : ""}</td>
+      <td>${row.sessions_included || ""}</td>
+      <td>${formatPeriodLabel(row)}</td>
       <td>${row.price || ""}</td>
+      <td>${formatEur(row.price_per_class)}</td>
     `;
     offersBody.appendChild(tr);
   });
@@ -369,25 +522,20 @@ function renderOfferRows(rows) {
 
 function renderCompetitorRows(rows) {
   competitorsBody.innerHTML = "";
+  // Rows arrive sorted by the server; pinned competitors go first.
   const filtered = rows.filter((row) => !isOurStudio(row));
-  const sorted = [...filtered].sort((a, b) => {
-    const aDist = getDistance(a);
-    const bDist = getDistance(b);
-    if (aDist === bDist) {
-      return (a.name || "").localeCompare(b.name || "");
-    }
-    return aDist - bDist;
-  });
-  const pinned = sorted.filter((row) => pinnedCompetitors.has(row.competitor_id));
-  const unpinned = sorted.filter((row) => !pinnedCompetitors.has(row.competitor_id));
+  const pinned = filtered.filter((row) => pinnedCompetitors.has(row.competitor_id));
+  const unpinned = filtered.filter((row) => !pinnedCompetitors.has(row.competitor_id));
   const ordered = [...pinned, ...unpinned];
   window._rowIndex = new Map();
   ordered.forEach((row) => {
-    const distance = row.distance_walk_min
-      ? `${row.distance_walk_min}m walk`
-      : row.distance_bike_min
-        ? `${row.distance_bike_min}m bike`
-        : "";
+    const distance = row.distance_m !== undefined
+      ? `${(row.distance_m / 1000).toFixed(1)} km`
+      : row.distance_walk_min
+        ? `${row.distance_walk_min}m walk`
+        : row.distance_bike_min
+          ? `${row.distance_bike_min}m bike`
+          : "";
     const tr = document.createElement("tr");
     tr.classList.add("clickable");
     if (pinnedCompetitors.has(row.competitor_id)) {
@@ -404,8 +552,8 @@ function renderCompetitorRows(rows) {
       <td class="pin-cell"></td>
       <td>${row.name || row.brand || ""}</td>
       <td>${row.tier || ""}</td>
-      <td>${distance}</td>
       <td>${row.segment || ""}</td>
+      <td>${distance}</td>
     `;
     tr.querySelector(".pin-cell").appendChild(pinButton);
     tr.addEventListener("click", () => showCompetitorDetail(row));
@@ -423,7 +571,7 @@ function getDistance(row) {
   return candidates.length ? Math.min(...candidates) : 9999;
 }
 
-function buildMap(rows) {
+function buildMap() {
   const map = L.map("map").setView([ownLocations[0].latitude, ownLocations[0].longitude], 12);
   L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
     maxZoom: 19,
@@ -470,6 +618,7 @@ function buildMap(rows) {
     greenIcon,
     markers: new Map(),
     markersByName: new Map(),
+    request: 0,
   };
 
   const bounds = L.latLngBounds();
@@ -480,50 +629,97 @@ function buildMap(rows) {
     bounds.extend(marker.getLatLng());
   });
 
-  rows.forEach((row) => {
-    if (isOurStudio(row) || row.competitor_id === "our-studio") {
+  if (bounds.isValid()) {
+    map.fitBounds(bounds, { padding: [20, 20] });
+  }
+  // Competitor markers are loaded for the visible area only.
+  map.on("moveend", loadVisibleCompetitors);
+  loadVisibleCompetitors();
+}
+
+function addCompetitorMarker(row) {
+  const mapState = window._mapState;
+  const lat = Number(row.latitude);
+  const lng = Number(row.longitude);
+  if (!Number.isFinite(lat) || !Number.isFinite(lng)) {
+    return;
+  }
+  const isPinned = pinnedCompetitors.has(row.competitor_id);
+  const marker = L.marker([lat, lng], { icon: isPinned ? mapState.greenIcon : mapState.blueIcon })
+    .addTo(mapState.map)
+    .bindPopup(
+      `<strong>${row.name || row.brand || "Studio"}</strong><br>${row.tier || ""}` +
+      `<br><button class="pin-button popup-pin">Pin</button>`
+    );
+  marker.on("click", () => showCompetitorDetail(row));
+  marker.on("popupopen", () => {
+    const container = marker.getPopup().getElement();
+    if (!container) {
       return;
     }
-    const lat = Number(row.latitude);
-    const lng = Number(row.longitude);
-    if (Number.isFinite(lat) && Number.isFinite(lng)) {
-      const isPinned = pinnedCompetitors.has(row.competitor_id);
-      const marker = L.marker([lat, lng], { icon: isPinned ? greenIcon : blueIcon })
-        .addTo(map)
-        .bindPopup(
-          `<strong>${row.name || row.brand || "Studio"}</strong><br>${row.tier || ""}` +
-          `<br><button class="pin-button popup-pin">Pin</button>`
-        );
-      bounds.extend(marker.getLatLng());
-      marker.on("click", () => showCompetitorDetail(row));
-      marker.on("popupopen", () => {
-        const container = marker.getPopup().getElement();
-        if (!container) {
-          return;
-        }
-        const button = container.querySelector(".popup-pin");
-        if (!button) {
-          return;
-        }
-        button.onclick = () => togglePin(row);
-        button.textContent = pinnedCompetitors.has(row.competitor_id) ? "Pinned" : "Pin";
-        button.className = `pin-button popup-pin ${pinnedCompetitors.has(row.competitor_id) ? "pinned" : ""}`;
-      });
-      if (row.competitor_id) {
-        window._mapState.markers.set(row.competitor_id, marker);
-      }
-      const markerName = (row.name || row.brand || "").toLowerCase();
-      if (markerName) {
-        window._mapState.markersByName.set(markerName, marker);
-      }
+    const button = container.querySelector(".popup-pin");
+    if (!button) {
+      return;
     }
+    button.onclick = () => togglePin(row);
+    button.textContent = pinnedCompetitors.has(row.competitor_id) ? "Pinned" : "Pin";
+    button.className = `pin-button popup-pin ${pinnedCompetitors.has(row.competitor_id) ? "pinned" : ""}`;
   });
-
-  if (bounds.isValid()) {
-    map.fitBounds(bounds, { padding: [20, 20] });
+  mapState.markers.set(row.competitor_id, marker);
+  const markerName = (row.name || row.brand || "").toLowerCase();
+  if (markerName) {
+    marker.competitorName = markerName;
+    mapState.markersByName.set(markerName, marker);
   }
 }
 
+function showVisibleCompetitors(rows) {
+  const mapState = window._mapState;
+  const visible = rows.filter(
+    (row) => row.competitor_id && !isOurStudio(row) && row.competitor_id !== "our-studio"
+  );
+  const visibleIds = new Set(visible.map((row) => row.competitor_id));
+  // Drop markers that left the viewport and add the new ones.
+  mapState.markers.forEach((marker, competitorId) => {
+    if (!visibleIds.has(competitorId)) {
+      marker.remove();
+      mapState.markers.delete(competitorId);
+      mapState.markersByName.delete(marker.competitorName);
+    }
+  });
+  visible.forEach((row) => {
+    if (!mapState.markers.has(row.competitor_id)) {
+      addCompetitorMarker(row);
+    }
+  });
+  highlightCompetitorMarker(window._selectedCompetitorId || "");
+}
+
+function loadVisibleCompetitors() {
+  const mapState = window._mapState;
+  const request = ++mapState.request;
+  const bounds = mapState.map.getBounds();
+  const params = {
+    south: bounds.getSouth(),
+    west: bounds.getWest(),
+    north: bounds.getNorth(),
+    east: bounds.getEast(),
+  };
+  return fetch(apiUrl("/api/competitors/bbox", params))
+    .then((response) => (response.ok ? response.json() : Promise.reject()))
+    .then((rows) => {
+      // A later pan or zoom has superseded this request.
+      if (request === mapState.request) {
+        showVisibleCompetitors(rows);
+      }
+    })
+    .catch(() => {
+      if (request === mapState.request) {
+        showVisibleCompetitors(fallbackCompetitors.map((row) => ({ competitor_id: row.name, ...row })));
+      }
+    });
+}
+
 function updatePinnedMarkers() {
   const mapState = window._mapState;
   if (!mapState) {
@@ -595,58 +791,9 @@ function renderBenchmark(offers) {
 }
 
 // ============================================================================
-// FILTERING AND INSIGHTS
+// INSIGHTS
 // ============================================================================
 
-function applyFilters(competitors, offers) {
-  const { searchQuery, tierFilter, segmentFilter, showComparableOnly } = window._filterState;
-
-  let filteredCompetitors = competitors.filter((comp) => !isOurStudio(comp));
-
-  // Search filter
-  if (searchQuery) {
-    const query = searchQuery.toLowerCase();
-    filteredCompetitors = filteredCompetitors.filter((comp) => {
-      const name = (comp.name || "").toLowerCase();
-      const address = (comp.address || "").toLowerCase();
-      const city = (comp.city || "").toLowerCase();
-      return name.includes(query) || address.includes(query) || city.includes(query);
-    });
-  }
-
-  // Tier filter
-  if (tierFilter !== "all") {
-    filteredCompetitors = filteredCompetitors.filter((comp) => comp.tier === tierFilter);
-  }
-
-  // Segment filter
-  if (segmentFilter.length > 0 && !segmentFilter.includes("all")) {
-    filteredCompetitors = filteredCompetitors.filter((comp) => {
-      const segment = (comp.segment || "").toLowerCase();
-      return segmentFilter.some((s) => segment.includes(s.toLowerCase()));
-    });
-  }
-
-  updateFilterStatus(filteredCompetitors.length, competitors.length);
-  return filteredCompetitors;
-}
-
-function updateFilterStatus(filtered, total) {
-  const statusEl = document.getElementById("filter-status");
-  if (!statusEl) return;
-
-  const activeFilters = [];
-  if (window._filterState.searchQuery) activeFilters.push("search");
-  if (window._filterState.tierFilter !== "all") activeFilters.push("tier");
-  if (window._filterState.segmentFilter.length > 0) activeFilters.push("segment");
-
-  if (activeFilters.length === 0) {
-    statusEl.textContent = `Showing all ${total} competitors`;
-  } else {
-    statusEl.textContent = `Showing ${filtered} of ${total} competitors (${activeFilters.length} filter${activeFilters.length > 1 ? "s" : ""} active)`;
-  }
-}
-
 function generatePricingInsights(offers) {
   const insightsContainer = document.getElementById("insights-container");
   if (!insightsContainer) return;
@@ -722,66 +869,6 @@ function generatePricingInsights(offers) {
     .join("");
 }
 
-function setupFilters() {
-  const searchInput = document.getElementById("search-input");
-  const tierFilter = document.getElementById("tier-filter");
-  const segmentFilter = document.getElementById("segment-filter");
-  const comparableOnly = document.getElementById("comparable-only");
-  const resetButton = document.getElementById("reset-filters");
-
-  if (searchInput) {
-    searchInput.addEventListener("input", (e) => {
-      window._filterState.searchQuery = e.target.value;
-      refreshCompetitorList();
-    });
-  }
-
-  if (tierFilter) {
-    tierFilter.addEventListener("change", (e) => {
-      window._filterState.tierFilter = e.target.value;
-      refreshCompetitorList();
-    });
-  }
-
-  if (segmentFilter) {
-    segmentFilter.addEventListener("change", (e) => {
-      const value = e.target.value;
-      window._filterState.segmentFilter = value === "all" ? [] : [value];
-      refreshCompetitorList();
-    });
-  }
-
-  if (comparableOnly) {
-    comparableOnly.addEventListener("change", (e) => {
-      window._filterState.showComparableOnly = e.target.checked;
-      refreshCompetitorList();
-    });
-  }
-
-  if (resetButton) {
-    resetButton.addEventListener("click", () => {
-      window._filterState = {
-        searchQuery: "",
-        tierFilter: "all",
-        segmentFilter: [],
-        distanceMax: 30,
-        showComparableOnly: false,
-      };
-      if (searchInput) searchInput.value = "";
-      if (tierFilter) tierFilter.value = "all";
-      if (segmentFilter) segmentFilter.value = "all";
-      if (comparableOnly) comparableOnly.checked = false;
-      refreshCompetitorList();
-    });
-  }
-}
-
-function refreshCompetitorList() {
-  if (!window._competitors) return;
-  const filtered = applyFilters(window._competitors, window._offers || []);
-  renderCompetitorRows(filtered);
-}
-
 // ============================================================================
 // TOP COMPARABLE COMPETITORS RECOMMENDATION
 // ============================================================================
@@ -933,8 +1020,7 @@ function pinTopCompetitors() {
   savePinnedCompetitors();
 
   if (window._competitors) {
-    const filtered = applyFilters(window._competitors, window._offers || []);
-    renderCompetitorRows(filtered);
+    renderCompetitorRows(window._competitors);
   }
 
   if (window._offers) {
@@ -1163,40 +1249,34 @@ function showCompetitorDetail(row) {
   updateCompetitorDetailPinButton(row);
 }
 
+function formatEur(value) {
+  const number = Number(value);
+  return value !== null && value !== "" && Number.isFinite(number) ? `EUR ${number.toFixed(2)}` : "";
+}
+
+function formatVisits(value) {
+  return value === null || value === undefined || value === "" ? "" : Number(value).toFixed(2);
+}
+
+// Visit rates and price per class are computed by the server
+// (analysis/price_normalization.py); this only picks the labels.
 function computePackMetrics(offer) {
   const offerType = (offer.offer_type || "").toLowerCase();
   const sessions = Number(offer.sessions_included);
-  const duration = Number(offer.duration_days);
-  const price = Number(offer.price_eur || offer.price_per_class);
+  const pricePerVisit = formatEur(offer.price_per_class);
 
   if (offerType !== "pack" && offerType !== "bundle" && offerType !== "membership") {
-    return {
-      visitsWeek: "",
-      visitsMonth: "",
-      pricePerVisit: offer.price_per_class ? `EUR ${offer.price_per_class}` : "",
-    };
+    return { visitsWeek: "", visitsMonth: "", pricePerVisit };
   }
 
-  let visitsWeek = "";
-  let visitsMonth = "";
+  let visitsWeek = formatVisits(offer.visits_per_week);
+  let visitsMonth = formatVisits(offer.visits_per_month);
   if (offerType === "membership" && (!Number.isFinite(sessions) || sessions <= 0)) {
     visitsWeek = "unlimited";
     visitsMonth = "unlimited";
-  } else if (Number.isFinite(sessions) && sessions > 0) {
-    if (Number.isFinite(duration) && duration > 0) {
-      visitsWeek = (sessions / (duration / 7)).toFixed(2);
-      visitsMonth = (sessions / (duration / 30)).toFixed(2);
-    } else {
-      visitsWeek = "indef";
-      visitsMonth = "indef";
-    }
-  }
-
-  let pricePerVisit = "";
-  if (Number.isFinite(sessions) && sessions > 0 && Number.isFinite(price)) {
-    pricePerVisit = `EUR ${(price / sessions).toFixed(2)}`;
-  } else if (offer.price_per_class) {
-    pricePerVisit = `EUR ${offer.price_per_class}`;
+  } else if (Number.isFinite(sessions) && sessions > 0 && !visitsWeek) {
+    visitsWeek = "indef";
+    visitsMonth = "indef";
   }
 
   return { visitsWeek, visitsMonth, pricePerVisit };
@@ -1302,11 +1382,12 @@ function highlightCompetitorRow(competitorId) {
   }
 }
 
+// The benchmark, insights and pricing dashboard compare against every offer,
+// so they still load the full list; the tables below page instead.
 fetch("/api/offers")
   .then((response) => (response.ok ? response.json() : Promise.reject()))
   .then((rows) => {
     window._offers = rows;
-    renderOfferRows(rows);
     renderBenchmark(rows);
     renderCompetitorBenchmark(rows, null);
     generatePricingInsights(rows);
@@ -1314,52 +1395,44 @@ fetch("/api/offers")
   })
   .catch(() => {
     window._offers = fallbackOffers;
-    renderOfferRows(fallbackOffers);
     renderBenchmark(fallbackOffers);
     renderCompetitorBenchmark(fallbackOffers, null);
     generatePricingInsights(fallbackOffers);
     setStatus("Status: JS loaded | Offers: fallback");
   });
 
-fetch("/api/competitors")
-  .then((response) => (response.ok ? response.json() : Promise.reject()))
-  .then((rows) => {
-    window._competitors = rows;
-    const filtered = applyFilters(rows, window._offers || []);
-    renderCompetitorRows(filtered);
-    if (typeof L === "undefined") {
-      setStatus("Status: JS loaded | Map error: Leaflet not loaded");
-    } else {
-      buildMap(rows);
-    }
+if (typeof L === "undefined") {
+  setStatus("Status: JS loaded | Map error: Leaflet not loaded");
+} else {
+  buildMap();
+}
+
+loadOfferPage();
+
+const offersLoadMore = document.getElementById("offers-load-more");
+if (offersLoadMore) {
+  offersLoadMore.addEventListener("click", () => loadOfferPage(true));
+}
+
+const competitorsLoadMore = document.getElementById("competitors-load-more");
+if (competitorsLoadMore) {
+  competitorsLoadMore.addEventListener("click", () => loadCompetitorPage(true));
+}
+
+loadPinnedCompetitors().then(() => {
+  // Wait for the pins so they can be listed first.
+  loadCompetitorPage().then(() => {
     const base = statusLine ? statusLine.textContent : "Status: JS loaded";
-    setStatus(`${base} | Competitors: ${rows.length}`);
-  })
-  .catch(() => {
-    window._competitors = fallbackCompetitors;
-    const filtered = applyFilters(fallbackCompetitors, window._offers || []);
-    renderCompetitorRows(filtered);
-    if (typeof L === "undefined") {
-      setStatus("Status: JS loaded | Map error: Leaflet not loaded");
-    } else {
-      buildMap(fallbackCompetitors);
+    setStatus(`${base} | Competitors: ${tablePages.competitors.total}`);
+    if (window._offers) {
+      generateTopCompetitors(window._competitors || [], window._offers);
     }
-    const base = statusLine ? statusLine.textContent : "Status: JS loaded";
-    setStatus(`${base} | Competitors: fallback`);
   });
-
-loadPinnedCompetitors().then(() => {
-  if (window._competitors) {
-    const filtered = applyFilters(window._competitors, window._offers || []);
-    renderCompetitorRows(filtered);
-    updatePinnedMarkers();
-  }
+  updatePinnedMarkers();
   if (window._offers) {
     generatePricingInsights(window._offers);
-    generateTopCompetitors(window._competitors || [], window._offers);
   }
   loadRefreshStatus();
-  setupFilters();
 
   // Wire up pin top competitors button
   const pinTopBtn = document.getElementById("pin-top-competitors");
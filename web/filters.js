@@ -6,6 +6,7 @@ let currentFilters = {
     search: '',
     tier: 'all',
     segment: 'all',
+    radiusKm: '',
     comparableOnly: false
 };
 
@@ -13,6 +14,7 @@ function setupFilters() {
     const searchInput = document.getElementById('search-input');
     const tierFilter = document.getElementById('tier-filter');
     const segmentFilter = document.getElementById('segment-filter');
+    const distanceFilter = document.getElementById('distance-filter');
     const comparableOnlyCheckbox = document.getElementById('comparable-only');
     const resetButton = document.getElementById('reset-filters');
     const filterStatus = document.getElementById('filter-status');
@@ -37,6 +39,14 @@ function setupFilters() {
         applyFilters();
     });
 
+    // Distance filter (km from the nearest Movements studio)
+    if (distanceFilter) {
+        distanceFilter.addEventListener('change', (e) => {
+            currentFilters.radiusKm = e.target.value;
+            applyFilters();
+        });
+    }
+
     // Comparable only toggle
     if (comparableOnlyCheckbox) {
         comparableOnlyCheckbox.addEventListener('change', (e) => {
@@ -51,60 +61,45 @@ function setupFilters() {
             searchInput.value = '';
             tierFilter.value = 'all';
             segmentFilter.value = 'all';
+            if (distanceFilter) distanceFilter.value = '';
             if (comparableOnlyCheckbox) comparableOnlyCheckbox.checked = false;
-            currentFilters = { search: '', tier: 'all', segment: 'all', comparableOnly: false };
+            currentFilters = { search: '', tier: 'all', segment: 'all', radiusKm: '', comparableOnly: false };
             applyFilters();
         });
     }
 }
 
-function applyFilters() {
-    if (!window._competitors || !window._offers) return;
-
-    let filtered = window._competitors.filter(comp => {
-        // Search filter
-        if (currentFilters.search) {
-            const searchLower = currentFilters.search;
-            const name = (comp.name || '').toLowerCase();
-            const city = (comp.city || '').toLowerCase();
-            const address = (comp.address || '').toLowerCase();
-            if (!name.includes(searchLower) && !city.includes(searchLower) && !address.includes(searchLower)) {
-                return false;
-            }
-        }
-
-        // Tier filter
-        if (currentFilters.tier !== 'all' && comp.tier !== currentFilters.tier) {
-            return false;
-        }
+// Filters are applied by the server: changing one reloads the first page of
+// the competitor and offer tables (loadCompetitorPage/loadOfferPage in app.js).
+function filterParams() {
+    return {
+        q: currentFilters.search,
+        tier: currentFilters.tier === 'all' ? '' : currentFilters.tier,
+        segment: currentFilters.segment === 'all' ? '' : currentFilters.segment,
+        radius_m: currentFilters.radiusKm ? Number(currentFilters.radiusKm) * 1000 : ''
+    };
+}
 
-        // Segment filter
-        if (currentFilters.segment !== 'all') {
-            const segment = (comp.segment || '').toLowerCase();
-            if (!segment.includes(currentFilters.segment.toLowerCase())) {
-                return false;
-            }
-        }
+let filterTimer = null;
 
-        return true;
-    });
+function applyFilters() {
+    // Debounced so typing in the search box sends one request, not one per key.
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(() => {
+        if (typeof loadCompetitorPage === 'function') loadCompetitorPage();
+        if (typeof loadOfferPage === 'function') loadOfferPage();
+    }, 200);
+}
 
-    // Update filter status
+function updateFilterStatus(shown, total) {
     const filterStatus = document.getElementById('filter-status');
-    if (filterStatus) {
-        const total = window._competitors.length;
-        const shown = filtered.length;
-        if (shown < total) {
-            filterStatus.textContent = `Showing ${shown} of ${total} competitors`;
-            filterStatus.style.color = '#f57c00';
-        } else {
-            filterStatus.textContent = '';
-        }
-    }
-
-    // Re-render competitors table with filtered list
-    if (typeof renderCompetitorRows === 'function') {
-        renderCompetitorRows(filtered);
+    if (!filterStatus) return;
+    const active = filterParams();
+    if (active.q || active.tier || active.segment || active.radius_m) {
+        filterStatus.textContent = `Showing ${shown} of ${total} matching competitors`;
+        filterStatus.style.color = '#f57c00';
+    } else {
+        filterStatus.textContent = '';
     }
 }
 
@@ -246,11 +241,12 @@ function pinTopCompetitors() {
 
 // Initialize filters and top competitors when page loads
 document.addEventListener('DOMContentLoaded', () => {
+    setupFilters();
+
     // Wait for app.js to load data
     const checkDataInterval = setInterval(() => {
         if (window._competitors && window._offers) {
             clearInterval(checkDataInterval);
-            setupFilters();
             generateTopCompetitors();
         }
     }, 100);